@@ -0,0 +1,39 @@
+"""Rename user table to users
+
+Revision ID: d4e8a1c27f90
+Revises: b25fefe7fc52
+Create Date: 2026-10-19 18:05:12.614208
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd4e8a1c27f90'
+down_revision = 'b25fefe7fc52'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # 模型表名为 users，初始迁移创建的是 user；
+    # 已由 create_all 建出 users 表再 stamp 的数据库无需处理
+    tables = sa.inspect(op.get_bind()).get_table_names()
+    if 'user' not in tables or 'users' in tables:
+        return
+
+    op.drop_index(op.f('ix_user_username'), table_name='user')
+    op.drop_index(op.f('ix_user_email'), table_name='user')
+    # 重命名表时 PostgreSQL 与 SQLite (>= 3.26) 会同步更新 user_role_links 的外键引用
+    op.rename_table('user', 'users')
+    op.create_index(op.f('ix_users_email'), 'users', ['email'], unique=True)
+    op.create_index(op.f('ix_users_username'), 'users', ['username'], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_users_username'), table_name='users')
+    op.drop_index(op.f('ix_users_email'), table_name='users')
+    op.rename_table('users', 'user')
+    op.create_index(op.f('ix_user_email'), 'user', ['email'], unique=True)
+    op.create_index(op.f('ix_user_username'), 'user', ['username'], unique=True)
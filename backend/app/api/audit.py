@@ -0,0 +1,71 @@
+from datetime import datetime
+from typing import Any
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlmodel import Session, col, func, select
+
+from app.api.deps import get_current_active_user
+from app.core.database import get_session
+from app.models import AuditEvent, AuditEventRead, User
+from app.services.audit import audit_writer
+
+router = APIRouter()
+
+
+@router.get("/")
+def read_audit_events(
+    skip: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=500),
+    action: str | None = Query(None, description="筛选操作类型，如 user.delete"),
+    actor_id: int | None = Query(None, description="筛选操作人"),
+    target_type: str | None = Query(None, description="筛选目标类型，如 user、role"),
+    target_id: str | None = Query(None, description="筛选目标ID"),
+    start_time: datetime | None = Query(None, description="起始时间"),
+    end_time: datetime | None = Query(None, description="结束时间"),
+    session: Session = Depends(get_session),
+    current_user: User = Depends(get_current_active_user),
+) -> dict[str, Any]:
+    """分页查询审计日志（按时间倒序）"""
+    if not current_user.has_permission("audit:read"):
+        raise HTTPException(status_code=403, detail="权限不足")
+
+    conditions = []
+    if action:
+        conditions.append(AuditEvent.action == action)
+    if actor_id is not None:
+        conditions.append(AuditEvent.actor_id == actor_id)
+    if target_type:
+        conditions.append(AuditEvent.target_type == target_type)
+    if target_id:
+        conditions.append(AuditEvent.target_id == target_id)
+    if start_time:
+        conditions.append(AuditEvent.created_at >= start_time)
+    if end_time:
+        conditions.append(AuditEvent.created_at < end_time)
+
+    count_statement = select(func.count(col(AuditEvent.id))).where(*conditions)
+    statement = (
+        select(AuditEvent)
+        .where(*conditions)
+        .order_by(col(AuditEvent.created_at).desc(), col(AuditEvent.id).desc())
+        .offset(skip)
+        .limit(limit)
+    )
+
+    total = session.exec(count_statement).one()
+    events = session.exec(statement).all()
+
+    return {
+        "data": [AuditEventRead.model_validate(event) for event in events],
+        "total": total,
+        "skip": skip,
+        "limit": limit,
+    }
+
+
+@router.get("/stats")
+def read_audit_writer_stats(current_user: User = Depends(get_current_active_user)) -> dict[str, int]:
+    """审计日志写入队列统计"""
+    if not current_user.has_permission("audit:read"):
+        raise HTTPException(status_code=403, detail="权限不足")
+    return audit_writer.stats()
@@ -2,16 +2,18 @@ import logging
 from datetime import datetime, timedelta
 from typing import Any
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordRequestForm
 from pydantic import BaseModel
 from sqlmodel import Session
 
+from app.api.deps import enforce_username_rate_limit
 from app.core.config import settings
 from app.core.database import get_session
 from app.core.security import create_access_token, create_refresh_token, verify_token
 from app.crud import authenticate_user, get_user_by_username
 from app.models import User
+from app.services.audit import record_audit_event
 
 logger = logging.getLogger("auth")
 
@@ -52,15 +54,18 @@ def _create_auth_response(user: User) -> dict[str, Any]:
 
 @router.post("/login")
 def login_for_access_token(
+    request: Request,
     form_data: OAuth2PasswordRequestForm = Depends(),
     session: Session = Depends(get_session)
 ) -> dict[str, Any]:
     """OAuth2兼容的登录接口，使用form格式"""
     logger.info(f"Form login attempt: {form_data.username}")
+    enforce_username_rate_limit(request, form_data.username)
 
     user = authenticate_user(session, form_data.username, form_data.password)
     if not user:
         logger.warning(f"Form login failed: {form_data.username}")
+        record_audit_event("auth.login_failed", details={"username": form_data.username})
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="用户名或密码错误",
@@ -68,20 +73,24 @@ def login_for_access_token(
         )
 
     logger.info(f"Form login successful: {user.username} (superuser: {user.is_superuser})")
+    record_audit_event("auth.login", user, "user", user.id)
     return _create_auth_response(user)
 
 
 @router.post("/sessions")
 def create_session(
+    request: Request,
     login_data: LoginRequest,
     session: Session = Depends(get_session)
 ) -> dict[str, Any]:
     """创建用户会话（JSON格式登录）"""
     logger.info(f"JSON login attempt: {login_data.username}")
+    enforce_username_rate_limit(request, login_data.username)
 
     user = authenticate_user(session, login_data.username, login_data.password)
     if not user:
         logger.warning(f"JSON login failed: {login_data.username}")
+        record_audit_event("auth.login_failed", details={"username": login_data.username})
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="用户名或密码错误",
@@ -89,6 +98,7 @@ def create_session(
         )
 
     logger.info(f"JSON login successful: {user.username} (superuser: {user.is_superuser})")
+    record_audit_event("auth.login", user, "user", user.id)
     return _create_auth_response(user)
 
 
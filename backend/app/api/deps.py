@@ -1,16 +1,34 @@
+import hmac
+import time
+from collections.abc import AsyncIterator
+
+import anyio
 import jwt
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from sqlmodel import Session
 
+from app.core.concurrency import concurrency_limiter
 from app.core.config import settings
 from app.core.database import get_session
+from app.core.global_middleware import get_route_template
+from app.core.rate_limit import (
+    SCOPE_GLOBAL,
+    SCOPE_IP,
+    SCOPE_USERNAME,
+    RateLimitExceeded,
+    rate_limiter,
+)
+from app.core.streaming import collect_streams
+from app.core.tracing import traced
 from app.crud import get_user_by_username
 from app.models import TokenData, User
 
 security = HTTPBearer()
+monitoring_security = HTTPBearer(auto_error=False)
 
 
+@traced("dependency get_current_user")
 def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
     session: Session = Depends(get_session)
@@ -37,7 +55,87 @@ def get_current_user(
     return user
 
 
+@traced("dependency get_current_active_user")
 def get_current_active_user(current_user: User = Depends(get_current_user)) -> User:
     if not current_user.is_active:
         raise HTTPException(status_code=400, detail="用户未激活")
     return current_user
+
+
+def require_monitoring_access(
+    credentials: HTTPAuthorizationCredentials | None = Depends(monitoring_security),
+    session: Session = Depends(get_session),
+) -> None:
+    """运维端点（/metrics、/health/* 统计）鉴权：静态抓取令牌或超级管理员的访问令牌"""
+    if settings.MONITORING_ENDPOINTS_PUBLIC:
+        return
+    if credentials is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="未提供认证凭据",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    token = settings.METRICS_AUTH_TOKEN
+    if token and hmac.compare_digest(credentials.credentials.encode(), token.encode()):
+        return
+    user = get_current_user(credentials, session)
+    if not user.is_active or not user.is_superuser:
+        raise HTTPException(status_code=403, detail="权限不足")
+
+
+def _too_many_requests(exc: RateLimitExceeded) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        detail="请求过于频繁，请稍后再试",
+        headers={"Retry-After": exc.retry_after_header},
+    )
+
+
+async def enforce_rate_limit(request: Request) -> None:
+    """按路由模板执行 IP / 全局限流（应用级依赖，未配置规则的路由直接跳过）"""
+    route = get_route_template(request.scope)
+    if not (rate_limiter.has_rule(route, SCOPE_IP) or rate_limiter.has_rule(route, SCOPE_GLOBAL)):
+        return
+    client_ip = request.client.host if request.client else "unknown"
+    try:
+        if rate_limiter.blocking:
+            await anyio.to_thread.run_sync(rate_limiter.check_request, route, client_ip)
+        else:
+            rate_limiter.check_request(route, client_ip)
+    except RateLimitExceeded as e:
+        raise _too_many_requests(e)
+
+
+async def limit_concurrency(request: Request) -> AsyncIterator[None]:
+    """按路由类别执行自适应并发限制（应用级依赖），超出上限时直接返回 503"""
+    route = get_route_template(request.scope)
+    permit = concurrency_limiter.try_acquire(request.method, route)
+    if permit is None:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="服务繁忙，请稍后再试",
+            headers={"Retry-After": "1"},
+        )
+    started = time.perf_counter()
+    failed = False
+    with collect_streams() as streams:
+        try:
+            yield
+        except Exception as e:
+            # 4xx 属于正常完成，仍可作为延迟样本
+            failed = not isinstance(e, HTTPException) or e.status_code >= 500
+            raise
+        finally:
+            if failed or not streams:
+                concurrency_limiter.release(permit, started, failed)
+            else:
+                # 流式响应体在依赖退出之后才发送，发送结束时再释放并发名额
+                streams[-1].on_complete(lambda error: concurrency_limiter.release(permit, started, error))
+
+
+def enforce_username_rate_limit(request: Request, username: str) -> None:
+    """按用户名限流，需在查询用户和校验密码之前调用"""
+    try:
+        rate_limiter.check(get_route_template(request.scope), SCOPE_USERNAME, username.strip().lower())
+    except RateLimitExceeded as e:
+        raise _too_many_requests(e)
@@ -0,0 +1,100 @@
+import json
+import logging
+from typing import Any
+
+from fastapi import APIRouter, Depends, HTTPException
+from pydantic import BaseModel, Field
+
+from app.api.deps import get_current_active_user
+from app.core.invalidation import invalidation_bus
+from app.core.logging_config import (
+    get_log_levels,
+    get_logging_stats,
+    request_log_sampler,
+    set_log_levels,
+)
+from app.models import User
+
+router = APIRouter()
+logger = logging.getLogger("api")
+
+# 通过失效总线广播日志配置变更，使所有 worker 同步生效；
+# 以保留消息发布，之后启动或重启的 worker 会回放这些变更
+LOGGING_TOPIC = "logging"
+
+
+class LogLevelsUpdate(BaseModel):
+    levels: dict[str, str] = Field(..., description="日志器名称到级别的映射，根日志器使用 root")
+
+
+class SamplingUpdate(BaseModel):
+    sample_rate: float | None = Field(None, ge=0, le=1)
+    status_class_rates: dict[str, float] | None = None
+    route_rates: dict[str, float] | None = None
+    slow_threshold_ms: float | None = Field(None, ge=0)
+    log_request_start: bool | None = None
+
+
+def _apply_logging_update(topic: str, key: str) -> None:
+    if topic != LOGGING_TOPIC:
+        return
+    payload = json.loads(key)
+    if "levels" in payload:
+        set_log_levels(payload["levels"])
+    if "sampling" in payload:
+        request_log_sampler.configure(**payload["sampling"])
+
+
+invalidation_bus.subscribe(_apply_logging_update)
+
+
+def _require_admin(current_user: User) -> None:
+    if not current_user.has_permission("system:logging"):
+        raise HTTPException(status_code=403, detail="权限不足")
+
+
+def _rates_valid(rates: dict[str, float] | None) -> bool:
+    return rates is None or all(0 <= rate <= 1 for rate in rates.values())
+
+
+@router.get("/")
+def read_logging_config(current_user: User = Depends(get_current_active_user)) -> dict[str, Any]:
+    """查看当前日志级别、请求日志采样配置及统计"""
+    _require_admin(current_user)
+    return {
+        "levels": get_log_levels(),
+        "sampling": request_log_sampler.snapshot(),
+        "queue": get_logging_stats(),
+    }
+
+
+@router.put("/levels")
+def update_log_levels(
+    update: LogLevelsUpdate,
+    current_user: User = Depends(get_current_active_user),
+) -> dict[str, Any]:
+    """运行时调整日志级别（无需重启）"""
+    _require_admin(current_user)
+    for level in update.levels.values():
+        if not isinstance(logging.getLevelName(level.upper()), int):
+            raise HTTPException(status_code=400, detail=f"无效的日志级别: {level}")
+
+    invalidation_bus.publish(LOGGING_TOPIC, json.dumps({"levels": update.levels}), retain=True)
+    logger.info(f"日志级别已由 {current_user.username} 调整: {update.levels}")
+    return {"levels": get_log_levels(list(update.levels))}
+
+
+@router.put("/sampling")
+def update_sampling(
+    update: SamplingUpdate,
+    current_user: User = Depends(get_current_active_user),
+) -> dict[str, Any]:
+    """运行时调整请求日志采样配置（无需重启）"""
+    _require_admin(current_user)
+    if not _rates_valid(update.status_class_rates) or not _rates_valid(update.route_rates):
+        raise HTTPException(status_code=400, detail="采样率必须在 0 到 1 之间")
+
+    sampling = update.model_dump(exclude_none=True)
+    invalidation_bus.publish(LOGGING_TOPIC, json.dumps({"sampling": sampling}), retain=True)
+    logger.info(f"请求日志采样配置已由 {current_user.username} 调整: {sampling}")
+    return request_log_sampler.snapshot()
@@ -0,0 +1,88 @@
+import logging
+import re
+from datetime import datetime
+from typing import Any
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import PlainTextResponse
+
+from app.api.deps import get_current_active_user
+from app.core.config import settings
+from app.core.profiling import PROFILE_FILE_SUFFIX, continuous_profiler, get_profile_dir
+from app.core.security import create_profile_token
+from app.models import User
+
+router = APIRouter()
+logger = logging.getLogger("api")
+
+REQUEST_ID_PATTERN = re.compile(r"^[0-9a-f-]{36}$")
+
+
+def _require_superuser(current_user: User) -> None:
+    if not current_user.is_superuser:
+        raise HTTPException(status_code=403, detail="权限不足")
+
+
+@router.post("/tokens")
+def create_token(current_user: User = Depends(get_current_active_user)) -> dict[str, Any]:
+    """签发剖析令牌，放入 X-Profile 请求头即可剖析该请求（令牌有效期内可重复使用）"""
+    _require_superuser(current_user)
+    logger.info(f"用户 {current_user.username} 签发剖析令牌")
+    return {
+        "token": create_profile_token(current_user.username),
+        "expires_in": settings.PROFILE_TOKEN_EXPIRE_MINUTES * 60,
+    }
+
+
+@router.get("/")
+def list_profiles(
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=settings.LIST_MAX_PAGE_SIZE),
+    current_user: User = Depends(get_current_active_user),
+) -> dict[str, Any]:
+    """列出已生成的请求剖析结果（按时间倒序）"""
+    _require_superuser(current_user)
+    profile_dir = get_profile_dir()
+    files = sorted(
+        profile_dir.glob(f"*{PROFILE_FILE_SUFFIX}"),
+        key=lambda path: path.stat().st_mtime,
+        reverse=True,
+    ) if profile_dir.is_dir() else []
+    data = [
+        {
+            "request_id": path.name[:-len(PROFILE_FILE_SUFFIX)],
+            "size": path.stat().st_size,
+            "created_at": datetime.fromtimestamp(path.stat().st_mtime),
+        }
+        for path in files[skip:skip + limit]
+    ]
+    return {"data": data, "total": len(files), "skip": skip, "limit": limit}
+
+
+@router.get("/continuous", response_class=PlainTextResponse)
+def export_continuous_profile(
+    minutes: int = Query(10, ge=1, le=settings.CONTINUOUS_PROFILE_RETENTION_MINUTES),
+    current_user: User = Depends(get_current_active_user),
+) -> PlainTextResponse:
+    """下载最近 N 分钟的持续剖析结果（折叠栈格式，可直接生成火焰图）"""
+    _require_superuser(current_user)
+    return PlainTextResponse(continuous_profiler.export(minutes))
+
+
+@router.get("/continuous/stats")
+def continuous_profile_stats(current_user: User = Depends(get_current_active_user)) -> dict[str, Any]:
+    """持续剖析采样统计（含采样线程 CPU 占用）"""
+    _require_superuser(current_user)
+    return continuous_profiler.stats()
+
+
+@router.get("/{request_id}", response_class=PlainTextResponse)
+def read_profile(request_id: str, current_user: User = Depends(get_current_active_user)) -> PlainTextResponse:
+    """下载折叠栈格式的剖析结果"""
+    _require_superuser(current_user)
+    if not REQUEST_ID_PATTERN.match(request_id):
+        raise HTTPException(status_code=400, detail="无效的请求ID")
+    path = get_profile_dir() / f"{request_id}{PROFILE_FILE_SUFFIX}"
+    if not path.is_file():
+        raise HTTPException(status_code=404, detail="剖析结果不存在")
+    return PlainTextResponse(path.read_text(encoding="utf-8"))
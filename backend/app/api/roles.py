@@ -1,11 +1,30 @@
 from datetime import datetime
+from typing import Any
+
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlmodel import Session, select, func
-from typing import Optional, Dict, Any
+from sqlmodel import Session, col, func, select
 
 from app.api.deps import get_current_active_user
+from app.core.config import settings
 from app.core.database import get_session
-from app.models import Role, User, RoleCreate, RoleRead, RoleUpdate, UserRoleAssign
+from app.core.invalidation import publish_role_changed, publish_user_changed
+from app.core.streaming import (
+    StreamingJSONResponse,
+    iter_json_array,
+    iter_query,
+    should_stream,
+)
+from app.crud import get_role_by_name, get_roles_by_ids
+from app.models import (
+    USER_ROLES,
+    Role,
+    RoleCreate,
+    RoleRead,
+    RoleUpdate,
+    User,
+    UserRoleAssign,
+)
+from app.services.audit import record_audit_event
 
 router = APIRouter()
 
@@ -14,25 +33,25 @@ router = APIRouter()
 def read_roles(
     skip: int = 0,
     limit: int = 100,
-    search: Optional[str] = Query(None, description="搜索角色名称或描述"),
-    is_active: Optional[bool] = Query(None, description="筛选角色状态"),
+    search: str | None = Query(None, description="搜索角色名称或描述"),
+    is_active: bool | None = Query(None, description="筛选角色状态"),
     session: Session = Depends(get_session),
     current_user: User = Depends(get_current_active_user),
-) -> Dict[str, Any]:
+) -> dict[str, Any]:
     """获取角色列表"""
     # 检查权限：需要角色读取权限
     if not current_user.has_permission("role:read"):
         raise HTTPException(status_code=403, detail="权限不足")
 
     # 构建基础查询
-    count_statement = select(func.count(Role.id))
+    count_statement = select(func.count(col(Role.id)))
     statement = select(Role)
 
     # 搜索条件
     if search:
         search_condition = (
-            (Role.name.contains(search)) |
-            (Role.description.contains(search))
+            (col(Role.name).contains(search)) |
+            (col(Role.description).contains(search))
         )
         statement = statement.where(search_condition)
         count_statement = count_statement.where(search_condition)
@@ -46,7 +65,7 @@ def read_roles(
     total = session.exec(count_statement).one()
 
     # 分页和排序
-    statement = statement.offset(skip).limit(limit).order_by(Role.created_at.desc())
+    statement = statement.offset(skip).limit(limit).order_by(col(Role.created_at).desc())
 
     roles = session.exec(statement).all()
 
@@ -63,14 +82,14 @@ def create_role(
     role: RoleCreate,
     session: Session = Depends(get_session),
     current_user: User = Depends(get_current_active_user),
-) -> RoleRead:
+) -> Role:
     """创建新角色"""
     # 检查权限：需要角色创建权限
     if not current_user.has_permission("role:create"):
         raise HTTPException(status_code=403, detail="权限不足")
 
     # 检查角色名是否已存在
-    existing_role = session.exec(select(Role).where(Role.name == role.name)).first()
+    existing_role = get_role_by_name(session, role.name)
     if existing_role:
         raise HTTPException(status_code=400, detail="角色名已存在")
 
@@ -78,6 +97,8 @@ def create_role(
     session.add(db_role)
     session.commit()
     session.refresh(db_role)
+    publish_role_changed(db_role.id)
+    record_audit_event("role.create", current_user, "role", db_role.id, {"name": db_role.name})
 
     return db_role
 
@@ -87,7 +108,7 @@ def read_role(
     role_id: int,
     session: Session = Depends(get_session),
     current_user: User = Depends(get_current_active_user),
-) -> RoleRead:
+) -> Role:
     """获取指定角色详情"""
     if not current_user.has_permission("role:read"):
         raise HTTPException(status_code=403, detail="权限不足")
@@ -105,7 +126,7 @@ def update_role(
     role_update: RoleUpdate,
     session: Session = Depends(get_session),
     current_user: User = Depends(get_current_active_user),
-) -> RoleRead:
+) -> Role:
     """更新角色信息"""
     # 需要角色更新权限
     if not current_user.has_permission("role:update"):
@@ -117,7 +138,7 @@ def update_role(
 
     # 检查角色名唯一性（如果要更新的话）
     if role_update.name and role_update.name != role.name:
-        existing_role = session.exec(select(Role).where(Role.name == role_update.name)).first()
+        existing_role = get_role_by_name(session, role_update.name)
         if existing_role:
             raise HTTPException(status_code=400, detail="角色名已存在")
 
@@ -133,6 +154,8 @@ def update_role(
     session.add(role)
     session.commit()
     session.refresh(role)
+    publish_role_changed(role.id)
+    record_audit_event("role.update", current_user, "role", role.id, {"fields": sorted(update_data)})
 
     return role
 
@@ -142,7 +165,7 @@ def delete_role(
     role_id: int,
     session: Session = Depends(get_session),
     current_user: User = Depends(get_current_active_user),
-) -> dict:
+) -> dict[str, Any]:
     """删除角色"""
     # 只有超级管理员可以删除角色
     if not current_user.is_superuser:
@@ -158,6 +181,8 @@ def delete_role(
 
     session.delete(role)
     session.commit()
+    publish_role_changed(role_id)
+    record_audit_event("role.delete", current_user, "role", role_id, {"name": role.name})
 
     return {"message": f"角色 {role.name} 已删除"}
 
@@ -167,7 +192,7 @@ def assign_user_roles(
     assignment: UserRoleAssign,
     session: Session = Depends(get_session),
     current_user: User = Depends(get_current_active_user),
-) -> dict:
+) -> dict[str, Any]:
     """为用户分配角色"""
     if not current_user.has_permission("role:assign"):
         raise HTTPException(status_code=403, detail="权限不足")
@@ -178,7 +203,7 @@ def assign_user_roles(
         raise HTTPException(status_code=404, detail="用户不存在")
 
     # 获取角色
-    roles = session.exec(select(Role).where(Role.id.in_(assignment.role_ids))).all()
+    roles = get_roles_by_ids(session, assignment.role_ids)
     if len(roles) != len(assignment.role_ids):
         raise HTTPException(status_code=400, detail="部分角色不存在")
 
@@ -188,18 +213,31 @@ def assign_user_roles(
 
     session.add(user)
     session.commit()
+    publish_user_changed(user.id)
+    record_audit_event("role.assign", current_user, "user", user.id, {"role_ids": assignment.role_ids})
 
     return {"message": f"已为用户 {user.username} 分配角色: {[role.name for role in roles]}"}
 
 
-@router.get("/{role_id}/users", response_model=list[dict])
+def _role_user_row(user: User) -> dict[str, Any]:
+    return {
+        "id": user.id,
+        "username": user.username,
+        "email": user.email,
+        "full_name": user.full_name,
+        "is_active": user.is_active,
+        "created_at": user.created_at
+    }
+
+
+@router.get("/{role_id}/users", response_model=list[dict[str, Any]])
 def get_role_users(
     role_id: int,
-    skip: int = 0,
-    limit: int = 100,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=settings.LIST_MAX_PAGE_SIZE),
     session: Session = Depends(get_session),
     current_user: User = Depends(get_current_active_user),
-) -> list[dict]:
+) -> list[dict[str, Any]] | StreamingJSONResponse:
     """获取拥有指定角色的用户列表"""
     if not current_user.has_permission("role:read"):
         raise HTTPException(status_code=403, detail="权限不足")
@@ -209,18 +247,18 @@ def get_role_users(
         raise HTTPException(status_code=404, detail="角色不存在")
 
     # 获取拥有该角色的用户
-    statement = select(User).join(User.roles).where(Role.id == role_id)
-    statement = statement.offset(skip).limit(limit).order_by(User.created_at.desc())
+    statement = select(User).join(USER_ROLES).where(Role.id == role_id)
+    statement = statement.offset(skip).limit(limit).order_by(col(User.created_at).desc())
+
+    # 不查询总数，按 limit 判断是否分块序列化
+    if should_stream(limit):
+        return StreamingJSONResponse(
+            lambda: iter_json_array(
+                iter_query(statement, _role_user_row, settings.LIST_STREAM_BATCH_SIZE),
+                settings.LIST_STREAM_BATCH_SIZE,
+            ),
+            route="/api/v1/roles/{role_id}/users",
+        )
 
     users = session.exec(statement).all()
-    return [
-        {
-            "id": user.id,
-            "username": user.username,
-            "email": user.email,
-            "full_name": user.full_name,
-            "is_active": user.is_active,
-            "created_at": user.created_at
-        }
-        for user in users
-    ]
\ No newline at end of file
+    return [_role_user_row(user) for user in users]
@@ -1,72 +1,24 @@
-import logging
-from typing import Any
-
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Request, Response
 
 from app.api.deps import get_current_user
 from app.models import User
+from app.services.menus import menu_registry
 
 router = APIRouter()
-logger = logging.getLogger("routes")
 
 
-@router.get("/get-async-routes")
-def get_async_routes(current_user: User = Depends(get_current_user)) -> dict[str, Any]:
-    """获取异步路由（动态菜单）"""
-    logger.info(f"Route request from user: {current_user.username} (superuser: {current_user.is_superuser})")
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    if if_none_match.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(","))
 
-    # 根据用户角色返回不同的路由
-    if current_user.is_superuser:
-        # 管理员路由
-        routes = [
-            {
-                "path": "/dashboard",
-                "name": "Dashboard",
-                "meta": {
-                    "title": "仪表板",
-                    "icon": "dashboard",
-                    "rank": 1
-                }
-            },
-            {
-                "path": "/users",
-                "name": "Users",
-                "meta": {
-                    "title": "用户管理",
-                    "icon": "user",
-                    "rank": 2
-                }
-            },
-            {
-                "path": "/system",
-                "name": "System",
-                "meta": {
-                    "title": "系统管理",
-                    "icon": "system",
-                    "rank": 3
-                }
-            }
-        ]
-        logger.info(f"Returning admin routes: {len(routes)} routes")
-        return {
-            "success": True,
-            "data": routes
-        }
-    else:
-        # 普通用户路由
-        routes = [
-            {
-                "path": "/dashboard",
-                "name": "Dashboard",
-                "meta": {
-                    "title": "仪表板",
-                    "icon": "dashboard",
-                    "rank": 1
-                }
-            }
-        ]
-        logger.info(f"Returning user routes: {len(routes)} routes")
-        return {
-            "success": True,
-            "data": routes
-        }
+
+@router.get("/get-async-routes")
+def get_async_routes(request: Request, current_user: User = Depends(get_current_user)) -> Response:
+    """获取异步路由（动态菜单），按权限集合返回预编译的响应，支持 If-None-Match"""
+    menu = menu_registry.get(current_user.permission_key())
+    headers = {"ETag": menu.etag, "Cache-Control": "private, no-cache"}
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and _etag_matches(if_none_match, menu.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(menu.body, media_type="application/json", headers=headers)
@@ -1,44 +1,50 @@
 
-from datetime import datetime
 import secrets
 import string
+from datetime import datetime
+from typing import Any
+
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlmodel import Session, select, func
-from typing import Optional, Dict, Any
+from sqlalchemy.orm import selectinload
+from sqlmodel import Session, col, func, select
 
 from app.api.deps import get_current_active_user
+from app.core.config import settings
 from app.core.database import get_session
+from app.core.invalidation import publish_user_changed
 from app.core.security import get_password_hash
-from app.crud import create_user, get_user, get_users, update_user
-from app.models import User, UserCreate, UserRead, UserUpdate, Role
+from app.core.streaming import StreamingJSONResponse, iter_json_page, should_stream
+from app.crud import create_user, get_roles_by_ids, get_user
+from app.models import USER_ROLES, Role, User, UserCreate, UserRead, UserUpdate
+from app.services.audit import record_audit_event
 
 router = APIRouter()
 
 
-@router.get("/")
+@router.get("/", response_model=dict[str, Any])
 def read_users(
-    skip: int = 0,
-    limit: int = 100,
-    search: Optional[str] = Query(None, description="搜索用户名、邮箱或姓名"),
-    is_active: Optional[bool] = Query(None, description="筛选用户状态"),
-    role_name: Optional[str] = Query(None, description="筛选角色"),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=settings.LIST_MAX_PAGE_SIZE),
+    search: str | None = Query(None, description="搜索用户名、邮箱或姓名"),
+    is_active: bool | None = Query(None, description="筛选用户状态"),
+    role_name: str | None = Query(None, description="筛选角色"),
     session: Session = Depends(get_session),
     current_user: User = Depends(get_current_active_user),
-) -> Dict[str, Any]:
+) -> dict[str, Any] | StreamingJSONResponse:
     # 检查权限：只有管理员可以查看用户列表
     if not current_user.has_permission("user:read"):
         raise HTTPException(status_code=403, detail="权限不足")
 
     # 构建基础查询
-    count_statement = select(func.count(User.id)).join(User.roles, isouter=True)
-    statement = select(User).join(User.roles, isouter=True).distinct()
+    count_statement = select(func.count(col(User.id))).join(USER_ROLES, isouter=True)
+    statement = select(User).join(USER_ROLES, isouter=True).distinct()
 
     # 搜索条件
     if search:
         search_condition = (
-            (User.username.contains(search)) |
-            (User.email.contains(search)) |
-            (User.full_name.contains(search))
+            (col(User.username).contains(search)) |
+            (col(User.email).contains(search)) |
+            (col(User.full_name).contains(search))
         )
         statement = statement.where(search_condition)
         count_statement = count_statement.where(search_condition)
@@ -56,8 +62,21 @@ def read_users(
     # 获取总数
     total = session.exec(count_statement).one()
 
-    # 分页和排序
-    statement = statement.offset(skip).limit(limit).order_by(User.created_at.desc())
+    # 分页和排序（角色批量预加载，避免逐个用户查询）
+    statement = (
+        statement.offset(skip).limit(limit).order_by(col(User.created_at).desc())
+        .options(selectinload(USER_ROLES))
+    )
+
+    # 大页面按批读取、分块序列化，不在内存中构建完整的结果列表
+    if should_stream(min(limit, total - skip)):
+        return StreamingJSONResponse(
+            lambda: iter_json_page(
+                statement, count_statement, User.to_read, settings.LIST_STREAM_BATCH_SIZE,
+                skip=skip, limit=limit,
+            ),
+            route="/api/v1/users/",
+        )
 
     users = session.exec(statement).all()
 
@@ -80,6 +99,8 @@ def create_new_user(
         raise HTTPException(status_code=403, detail="权限不足")
 
     db_user = create_user(session, user)
+    publish_user_changed(db_user.id)
+    record_audit_event("user.create", current_user, "user", db_user.id, {"username": db_user.username})
     return db_user.to_read()
 
 
@@ -133,10 +154,12 @@ def update_existing_user(
             setattr(user, field, value)
 
     # 处理角色分配（只有管理员可以分配角色）
+    assigned_role_ids = None
     if user_update.role_ids is not None and current_user.has_permission("role:assign"):
         # 获取角色对象
-        roles = session.exec(select(Role).where(Role.id.in_(user_update.role_ids))).all()
+        roles = get_roles_by_ids(session, user_update.role_ids)
         user.roles = roles
+        assigned_role_ids = [role.id for role in roles]
 
     # 更新时间戳
     user.updated_at = datetime.utcnow()
@@ -144,6 +167,15 @@ def update_existing_user(
     session.add(user)
     session.commit()
     session.refresh(user)
+    publish_user_changed(user.id)
+    record_audit_event(
+        "user.update",
+        current_user,
+        "user",
+        user.id,
+        # 只记录实际生效的角色：无 role:assign 权限时传入的 role_ids 被忽略
+        {"fields": sorted(update_data), "role_ids": assigned_role_ids},
+    )
 
     return user.to_read()
 
@@ -160,7 +192,7 @@ def reset_user_password(
     user_id: int,
     session: Session = Depends(get_session),
     current_user: User = Depends(get_current_active_user),
-) -> dict:
+) -> dict[str, Any]:
     # 检查权限：需要用户管理权限
     if not current_user.has_permission("user:update"):
         raise HTTPException(status_code=403, detail="权限不足")
@@ -178,6 +210,8 @@ def reset_user_password(
     session.add(user)
     session.commit()
     session.refresh(user)
+    publish_user_changed(user.id)
+    record_audit_event("user.reset_password", current_user, "user", user.id, {"username": user.username})
 
     return {
         "message": f"用户 {user.username} 的密码已重置",
@@ -190,7 +224,7 @@ def delete_user(
     user_id: int,
     session: Session = Depends(get_session),
     current_user: User = Depends(get_current_active_user),
-) -> dict:
+) -> dict[str, Any]:
     # 检查权限：需要用户删除权限
     if not current_user.has_permission("user:delete"):
         raise HTTPException(status_code=403, detail="权限不足")
@@ -205,5 +239,7 @@ def delete_user(
 
     session.delete(user)
     session.commit()
+    publish_user_changed(user_id)
+    record_audit_event("user.delete", current_user, "user", user_id, {"username": user.username})
 
     return {"message": f"用户 {user.username} 已删除"}
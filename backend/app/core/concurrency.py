@@ -0,0 +1,203 @@
+"""
+自适应并发限制
+
+同步端点共用 AnyIO 默认线程池，线程池饱和后请求在队列中无声等待，直到客户端超时。
+这里按路由类别（critical / default / expensive）分别限制同时处理的请求数，超出
+上限的请求在进入端点之前直接拒绝（503 + Retry-After），而不是排队。
+
+每个类别的上限按 Gradient2 算法根据观测到的延迟自适应调整:
+    long_rtt   长期延迟基线（指数移动平均，窗口约 600 个样本）
+    gradient   = clamp(tolerance * long_rtt / rtt, 0.5, 1.0)
+    new_limit  = limit * gradient + queue_size
+    limit      = limit * (1 - smoothing) + new_limit * smoothing
+延迟稳定时上限缓慢增长（每次最多 + queue_size），排队导致延迟升高时按比例收缩；
+并发数不足上限一半时（应用本身没有压满）不增长。
+
+优先级通过类别之间的隔离实现：普通和高开销类别的 max_limit 之和小于线程池容量，
+它们被压满时关键类别（/health、/users/me 等）仍有可用线程，也不会被 503 拒绝。
+
+所有计数只在事件循环线程中读写（由应用级异步依赖调用），不需要加锁。
+"""
+import logging
+import math
+import time
+from typing import Any
+
+from app.core.config import settings
+from app.core.metrics import LabelValues, MetricFunction, registry
+from app.core.route_table import RouteTable
+
+logger = logging.getLogger("concurrency")
+
+concurrency_rejections_total = registry.counter(
+    "concurrency_limit_rejections_total", "超出并发上限被拒绝（503）的请求数", ("class",)
+)
+
+
+class GradientLimit:
+    """单个类别的自适应并发上限（Gradient2）"""
+
+    def __init__(
+        self,
+        initial_limit: float,
+        min_limit: float,
+        max_limit: float,
+        tolerance: float = 2.0,
+        smoothing: float = 0.2,
+        long_window: int = 600,
+        warmup: int = 10,
+    ) -> None:
+        self.limit = float(initial_limit)
+        self.min_limit = float(min_limit)
+        self.max_limit = float(max_limit)
+        self.tolerance = tolerance
+        self.smoothing = smoothing
+        self.warmup = warmup
+        self._long_factor = 2.0 / (long_window + 1)
+        self.long_rtt = 0.0
+        self.samples = 0
+
+    @property
+    def queue_size(self) -> float:
+        return max(1.0, math.sqrt(self.limit) / 2)
+
+    def update(self, rtt: float, in_flight: int) -> None:
+        self.samples += 1
+        if self.samples <= self.warmup:
+            # 预热阶段用算术平均建立基线
+            self.long_rtt += (rtt - self.long_rtt) / self.samples
+            return
+        self.long_rtt += (rtt - self.long_rtt) * self._long_factor
+        if rtt <= 0:
+            return
+        # 基线远高于当前延迟（负载下降后），让基线尽快回落
+        if self.long_rtt / rtt > 2:
+            self.long_rtt *= 0.95
+        if in_flight < self.limit / 2:
+            return
+        gradient = max(0.5, min(1.0, self.tolerance * self.long_rtt / rtt))
+        new_limit = self.limit * gradient + self.queue_size
+        new_limit = self.limit * (1 - self.smoothing) + new_limit * self.smoothing
+        self.limit = max(self.min_limit, min(self.max_limit, new_limit))
+
+
+class ConcurrencyClass:
+    """一个路由类别：在途请求计数 + 自适应上限"""
+
+    __slots__ = ("name", "limiter", "in_flight", "rejected", "completed")
+
+    def __init__(self, name: str, limiter: GradientLimit) -> None:
+        self.name = name
+        self.limiter = limiter
+        self.in_flight = 0
+        self.rejected = 0
+        self.completed = 0
+
+
+def _gradient_limit(params: dict[str, float], tolerance: float) -> GradientLimit:
+    """按 CONCURRENCY_CLASSES 中的一项配置创建并发上限，整数参数显式转换"""
+    return GradientLimit(
+        initial_limit=params["initial_limit"],
+        min_limit=params["min_limit"],
+        max_limit=params["max_limit"],
+        tolerance=tolerance,
+        smoothing=params.get("smoothing", 0.2),
+        long_window=int(params.get("long_window", 600)),
+        warmup=int(params.get("warmup", 10)),
+    )
+
+
+class ConcurrencyLimiter:
+    """按路由类别分组的并发限制器"""
+
+    def __init__(
+        self,
+        classes: dict[str, dict[str, float]],
+        route_classes: dict[str, str],
+        default_class: str,
+        tolerance: float = 2.0,
+        enabled: bool = True,
+    ) -> None:
+        if default_class not in classes:
+            raise ValueError(f"默认并发类别 {default_class} 未配置")
+        unknown = set(route_classes.values()) - set(classes)
+        if unknown:
+            raise ValueError(f"路由引用了未配置的并发类别: {sorted(unknown)}")
+        self.enabled = enabled
+        self.default_class = default_class
+        self.classes = {
+            name: ConcurrencyClass(name, _gradient_limit(params, tolerance))
+            for name, params in classes.items()
+        }
+        self._route_classes = RouteTable(
+            {key: self.classes[value] for key, value in route_classes.items()},
+            self.classes[default_class],
+        )
+
+    def classify(self, method: str, route: str) -> ConcurrencyClass:
+        return self._route_classes.lookup(method, route)
+
+    def try_acquire(self, method: str, route: str) -> ConcurrencyClass | None:
+        """占用一个并发名额，超出当前上限时返回 None"""
+        cls = self.classify(method, route)
+        if self.enabled and cls.in_flight >= cls.limiter.limit:
+            cls.rejected += 1
+            concurrency_rejections_total.inc(1.0, (cls.name,))
+            logger.warning(
+                f"并发超限，拒绝请求: {method} {route} 类别={cls.name} "
+                f"在途={cls.in_flight} 上限={cls.limiter.limit:.1f}"
+            )
+            return None
+        cls.in_flight += 1
+        return cls
+
+    def release(self, cls: ConcurrencyClass, started: float, failed: bool = False) -> None:
+        """释放名额；正常完成的请求用于更新延迟基线和上限"""
+        in_flight = cls.in_flight
+        cls.in_flight -= 1
+        cls.completed += 1
+        if not failed:
+            cls.limiter.update(time.perf_counter() - started, in_flight)
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "classes": {
+                name: {
+                    "limit": round(cls.limiter.limit, 2),
+                    "min_limit": cls.limiter.min_limit,
+                    "max_limit": cls.limiter.max_limit,
+                    "in_flight": cls.in_flight,
+                    "completed": cls.completed,
+                    "rejected": cls.rejected,
+                    "latency_baseline_ms": round(cls.limiter.long_rtt * 1000, 3),
+                }
+                for name, cls in self.classes.items()
+            },
+        }
+
+
+concurrency_limiter = ConcurrencyLimiter(
+    settings.CONCURRENCY_CLASSES,
+    settings.CONCURRENCY_ROUTE_CLASSES,
+    settings.CONCURRENCY_DEFAULT_CLASS,
+    tolerance=settings.CONCURRENCY_LATENCY_TOLERANCE,
+    enabled=settings.CONCURRENCY_LIMIT_ENABLED,
+)
+
+
+def _class_stats(field: str) -> MetricFunction:
+    def collect() -> dict[LabelValues, float]:
+        return {
+            (name,): float(cls.limiter.limit if field == "limit" else cls.in_flight)
+            for name, cls in concurrency_limiter.classes.items()
+        }
+    return collect
+
+
+registry.gauge(
+    "concurrency_limit", "各路由类别当前的自适应并发上限", ("class",), function=_class_stats("limit")
+)
+registry.gauge(
+    "concurrency_in_flight", "各路由类别正在处理的请求数", ("class",), function=_class_stats("in_flight")
+)
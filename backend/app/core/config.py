@@ -1,4 +1,6 @@
 
+from typing import Any
+
 from pydantic_settings import BaseSettings
 
 
@@ -13,6 +15,165 @@ class Settings(BaseSettings):
     POSTGRES_USER: str | None = None
     POSTGRES_PASSWORD: str | None = None
     POSTGRES_DB: str | None = None
+    # 启动时是否执行 create_all（默认由 Alembic 管理表结构，启动时仅校验迁移版本）
+    DB_AUTO_CREATE_TABLES: bool = False
+
+    # 多 worker 缓存失效总线（本地 SQLite 变更表）
+    INVALIDATION_BUS_ENABLED: bool = True
+    INVALIDATION_BUS_PATH: str = "./.cache/invalidation_bus.db"
+    INVALIDATION_BUS_POLL_INTERVAL: float = 0.5
+
+    # 审计日志（后台批量写入）
+    AUDIT_QUEUE_SIZE: int = 10000
+    AUDIT_BATCH_SIZE: int = 200
+    AUDIT_FLUSH_INTERVAL: float = 1.0
+    AUDIT_OVERFLOW_POLICY: str = "drop"  # drop 或 block
+    AUDIT_BLOCK_TIMEOUT: float = 0.05
+
+    # 日志队列（后台线程批量写入）
+    LOG_QUEUE_SIZE: int = 10000
+    LOG_BATCH_SIZE: int = 256
+    LOG_FLUSH_INTERVAL: float = 0.5
+    LOG_INCLUDE_LOCATION: bool = True  # 是否记录 module/function/line
+    LOG_JSON_COMPACT: bool = False  # 使用 orjson 紧凑输出（需安装 orjson）
+
+    # 日志轮转（多进程安全），压缩和清理在后台线程执行
+    LOG_MAX_BYTES: int = 100 * 1024 * 1024  # 单个文件最大字节数，0 表示不按大小轮转
+    LOG_ROTATE_INTERVAL: int = 86400  # 按时间轮转的间隔（秒，UTC 对齐），0 表示不按时间轮转
+    LOG_BACKUP_COUNT: int = 14  # 每个日志保留的轮转文件数量，0 表示不限
+    LOG_RETENTION_DAYS: int = 30  # 轮转文件保留天数，0 表示不限
+    LOG_COMPRESS: bool = True
+    LOG_MAINTENANCE_INTERVAL: float = 60.0
+
+    # 请求日志采样（5xx、异常和慢请求始终记录）
+    LOG_REQUEST_SAMPLE_RATE: float = 1.0
+    LOG_REQUEST_STATUS_SAMPLE_RATES: dict[str, float] = {}  # 例如 {"2xx": 0.1, "4xx": 0.5}
+    LOG_REQUEST_ROUTE_SAMPLE_RATES: dict[str, float] = {}  # 按路由模板，例如 {"/health": 0}
+    LOG_SLOW_REQUEST_MS: float = 1000.0
+    LOG_REQUEST_START: bool = True  # 是否记录 "HTTP请求开始"
+
+    # 指标（/metrics）。多 worker 时由启动器设置快照目录，为空表示单进程模式
+    METRICS_MULTIPROCESS_DIR: str | None = None
+    METRICS_FLUSH_INTERVAL: float = 5.0
+    # /metrics 和 /health/* 统计端点默认只对超级管理员开放；METRICS_AUTH_TOKEN 为
+    # Prometheus 等抓取方使用的静态 Bearer 令牌，MONITORING_ENDPOINTS_PUBLIC 关闭鉴权（仅限内网）
+    METRICS_AUTH_TOKEN: str | None = None
+    MONITORING_ENDPOINTS_PUBLIC: bool = False
+
+    # 按需单请求剖析（X-Profile 请求头）
+    PROFILING_ENABLED: bool = True
+    PROFILE_DIR: str = "logs/profiles"
+    PROFILE_SAMPLE_INTERVAL: float = 0.001  # 采样间隔（秒）
+    PROFILE_TOKEN_EXPIRE_MINUTES: int = 10
+
+    # 持续采样剖析（按路由聚合的折叠栈，保存在 PROFILE_DIR/continuous），默认关闭，按需开启
+    CONTINUOUS_PROFILING_ENABLED: bool = False
+    CONTINUOUS_PROFILE_HZ: float = 100.0
+    CONTINUOUS_PROFILE_CPU_BUDGET: float = 0.02  # 采样线程 CPU 占用上限，超出时自动降低采样频率
+    CONTINUOUS_PROFILE_MAX_STACKS: int = 5000  # 每分钟保留的不同调用栈数量上限
+    CONTINUOUS_PROFILE_RETENTION_MINUTES: int = 60
+
+    # 链路追踪（OTLP/JSON 文件导出，无需 collector）
+    TRACING_ENABLED: bool = False
+    TRACING_SAMPLE_RATE: float = 1.0  # 未携带 traceparent 的请求的采样率
+    TRACING_EXPORT_PATH: str = "logs/traces.otlp.jsonl"
+    TRACING_QUEUE_SIZE: int = 10000
+    TRACING_BATCH_SIZE: int = 512
+    TRACING_FLUSH_INTERVAL: float = 1.0
+
+    # 事件循环阻塞检测
+    LOOP_MONITOR_ENABLED: bool = False
+    LOOP_MONITOR_INTERVAL: float = 0.1  # 心跳间隔（秒）
+    LOOP_MONITOR_THRESHOLD: float = 0.1  # 心跳超时超过该值视为阻塞（秒）
+
+    # 限流（认证接口在查库和 bcrypt 之前拒绝过量请求）
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_STORE: str = "memory"  # memory（进程内）或 sqlite（多 worker 共享）
+    RATE_LIMIT_SQLITE_PATH: str = "./.cache/rate_limits.db"
+    RATE_LIMIT_MAX_KEYS: int = 100000  # 进程内存储的桶数量上限（LRU 淘汰）
+    # 路由模板 -> {维度: 速率}，维度为 ip / username / global，速率如 "10/minute"、"5/30"
+    RATE_LIMIT_RULES: dict[str, dict[str, str]] = {
+        "/api/v1/auth/login": {"ip": "20/minute", "username": "10/minute", "global": "50/second"},
+        "/api/v1/auth/sessions": {"ip": "20/minute", "username": "10/minute", "global": "50/second"},
+        "/api/v1/auth/refresh-token": {"ip": "60/minute"},
+    }
+
+    # 自适应并发限制（按路由类别限制同时处理的请求数，超出时直接返回 503）
+    CONCURRENCY_LIMIT_ENABLED: bool = True
+    # 类别 -> 并发上限参数；普通和高开销类别的 max_limit 之和应小于线程池容量（默认 40），
+    # 为关键类别保留线程
+    CONCURRENCY_CLASSES: dict[str, dict[str, float]] = {
+        "critical": {"initial_limit": 32, "min_limit": 8, "max_limit": 128},
+        "default": {"initial_limit": 16, "min_limit": 4, "max_limit": 24},
+        "expensive": {"initial_limit": 6, "min_limit": 2, "max_limit": 12},
+    }
+    CONCURRENCY_DEFAULT_CLASS: str = "default"
+    # "方法 路由模板" 或 "路由模板" -> 类别，以 * 结尾表示前缀匹配
+    CONCURRENCY_ROUTE_CLASSES: dict[str, str] = {
+        "/": "critical",
+        "/health*": "critical",
+        "/metrics": "critical",
+        "GET /api/v1/users/me": "critical",
+        "/api/v1/auth/login": "expensive",
+        "/api/v1/auth/sessions": "expensive",
+        "GET /api/v1/users/": "expensive",
+        "GET /api/v1/roles/": "expensive",
+        "GET /api/v1/roles/{role_id}/users": "expensive",
+        "GET /api/v1/audit/": "expensive",
+        "GET /api/v1/profiling/continuous": "expensive",
+    }
+    CONCURRENCY_LATENCY_TOLERANCE: float = 2.0  # 短期延迟超过长期基线的倍数后开始收缩上限
+
+    # 按工作负载划分的同步端点执行器（独立线程数和排队上限，排队已满返回 503）
+    EXECUTORS: dict[str, dict[str, int]] = {
+        "auth-hash": {"size": 4, "queue_limit": 64},
+        "db-read": {"size": 16, "queue_limit": 256},
+        "db-write": {"size": 8, "queue_limit": 128},
+        "bulk": {"size": 2, "queue_limit": 8},
+    }
+    # 路由 -> 执行器，键的写法同 CONCURRENCY_ROUTE_CLASSES，前缀模式按配置顺序匹配；
+    # 未匹配的同步端点使用默认线程池
+    ROUTE_EXECUTORS: dict[str, str] = {
+        "POST /api/v1/auth/login": "auth-hash",
+        "POST /api/v1/auth/sessions": "auth-hash",
+        "POST /api/v1/users/": "auth-hash",
+        "POST /api/v1/users/{user_id}/reset-password": "auth-hash",
+        "PUT /api/v1/users/{user_id}": "db-write",
+        "GET /api/v1/audit/": "bulk",
+        "GET /api/v1/profiling/*": "bulk",
+        "GET /api/v1/users/*": "db-read",
+        "GET /api/v1/roles/*": "db-read",
+        "POST /api/v1/roles/*": "db-write",
+        "PUT /api/v1/roles/*": "db-write",
+        "DELETE /api/v1/*": "db-write",
+    }
+
+    # 响应缓存（按权限集合共享，按标签失效）
+    RESPONSE_CACHE_ENABLED: bool = True
+    RESPONSE_CACHE_MAX_ENTRIES: int = 2000
+    RESPONSE_CACHE_DEFAULT_TTL: float = 30.0
+    # "GET 路由模板" -> {"ttl": 秒, "tags": [...], "vary": "permissions" | "user"}，
+    # 标签中的 {参数名} 替换为路径参数；ttl 为 0 表示只合并并发请求、不缓存
+    RESPONSE_CACHE_ROUTES: dict[str, dict[str, Any]] = {
+        "GET /api/v1/users/": {"ttl": 30, "tags": ["users"]},
+        "GET /api/v1/roles/": {"ttl": 60, "tags": ["roles"]},
+        "GET /api/v1/roles/{role_id}": {"ttl": 60, "tags": ["role:{role_id}"]},
+        "GET /api/v1/roles/{role_id}/users": {"ttl": 30, "tags": ["users", "role:{role_id}"]},
+        "GET /api/v1/users/me": {"ttl": 0, "vary": "user"},
+    }
+    # 相同并发请求合并（single-flight），等待者超时返回 503
+    SINGLE_FLIGHT_ENABLED: bool = True
+    SINGLE_FLIGHT_TIMEOUT: float = 10.0
+
+    # 动态菜单定义（JSON 文件，为空时使用 app/menus.json），按修改时间自动重新编译
+    MENU_CONFIG_PATH: str | None = None
+    MENU_RELOAD_INTERVAL: float = 5.0
+
+    # 列表接口的内存上限：limit 超过最大页大小返回 422，
+    # 页面行数超过阈值时按批读取并分块序列化
+    LIST_MAX_PAGE_SIZE: int = 1000
+    LIST_STREAM_THRESHOLD: int = 200
+    LIST_STREAM_BATCH_SIZE: int = 100
 
     # JWT配置
     SECRET_KEY: str = "change-this-to-a-secure-random-secret-in-production"
@@ -1,16 +1,187 @@
+import logging
+import threading
+import time
 from collections.abc import Generator
+from pathlib import Path
+from typing import Any
 
+from sqlalchemy import event
+from sqlalchemy.engine.default import CACHE_HIT, CACHE_MISS
 from sqlmodel import Session, SQLModel, create_engine
 
 from app.core.config import settings
+from app.core.metrics import db_query_duration_seconds, registry
+from app.core.tracing import SPAN_KIND_CLIENT, end_span, start_span
 
 engine = create_engine(settings.SQLALCHEMY_DATABASE_URI, echo=True)
 
+logger = logging.getLogger("database")
+
+ALEMBIC_SCRIPT_LOCATION = Path(__file__).resolve().parent.parent / "alembic"
+
+
+class StatementCacheStats:
+    """SQL编译缓存命中统计（基于 SQLAlchemy 执行上下文的 cache_hit 标记）"""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.uncached = 0
+
+    def record(self, cache_hit: Any) -> None:
+        with self._lock:
+            if cache_hit is CACHE_HIT:
+                self.hits += 1
+            elif cache_hit is CACHE_MISS:
+                self.misses += 1
+            else:
+                self.uncached += 1
+
+    def snapshot(self) -> dict[str, Any]:
+        with self._lock:
+            cached = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "uncached": self.uncached,
+                "hit_rate": round(self.hits / cached, 4) if cached else 0.0,
+            }
+
+    def reset(self) -> None:
+        with self._lock:
+            self.hits = self.misses = self.uncached = 0
+
+
+statement_cache_stats = StatementCacheStats()
+
+
+registry.counter(
+    "sqlalchemy_statement_cache_total", "SQL编译缓存查找次数", ("result",),
+    function=lambda: {
+        (key,): float(value)
+        for key, value in statement_cache_stats.snapshot().items()
+        if key in ("hits", "misses", "uncached")
+    },
+)
+
+_QUERY_OPERATIONS = frozenset({"SELECT", "INSERT", "UPDATE", "DELETE"})
+
+
+def _query_operation(statement: str) -> str:
+    operation = statement.lstrip()[:6].upper()
+    return operation if operation in _QUERY_OPERATIONS else "OTHER"
+
+
+@event.listens_for(engine, "before_cursor_execute")
+def _start_query_timer(
+    conn: Any, _cursor: Any, statement: Any, _parameters: Any, context: Any, _executemany: bool
+) -> None:
+    if context is not None:
+        context._query_start_time = time.perf_counter()
+        context._trace_span = start_span(
+            f"db {_query_operation(statement)}",
+            SPAN_KIND_CLIENT,
+            {"db.system": conn.dialect.name, "db.statement": statement[:1000]},
+        )
+
+
+@event.listens_for(engine, "after_cursor_execute")
+def _record_statement_cache(
+    _conn: Any, _cursor: Any, statement: Any, _parameters: Any, context: Any, _executemany: bool
+) -> None:
+    if context is not None:
+        statement_cache_stats.record(getattr(context, "cache_hit", None))
+        start_time = getattr(context, "_query_start_time", None)
+        if start_time is not None:
+            db_query_duration_seconds.observe(
+                time.perf_counter() - start_time, (_query_operation(statement),)
+            )
+        span = getattr(context, "_trace_span", None)
+        if span is not None:
+            context._trace_span = None
+            end_span(span)
+
+
+@event.listens_for(engine, "handle_error")
+def _end_failed_query_span(exception_context: Any) -> None:
+    context = exception_context.execution_context
+    span = getattr(context, "_trace_span", None) if context is not None else None
+    if span is not None:
+        context._trace_span = None
+        end_span(span, exception_context.original_exception)
+
+
+def get_statement_cache_stats() -> dict[str, Any]:
+    """获取SQL编译缓存统计，包含当前缓存容量"""
+    stats = statement_cache_stats.snapshot()
+    compiled_cache = engine._compiled_cache
+    stats["cache_size"] = len(compiled_cache) if compiled_cache is not None else 0
+    return stats
+
 
 def create_db_and_tables() -> None:
     SQLModel.metadata.create_all(engine)
 
 
+def get_alembic_revisions() -> tuple[str | None, str | None]:
+    """返回 (数据库当前迁移版本, 迁移脚本 head 版本)"""
+    # alembic 仅在启动校验时需要，延迟导入以缩短冷启动时间
+    from alembic.config import Config
+    from alembic.runtime.migration import MigrationContext
+    from alembic.script import ScriptDirectory
+
+    config = Config()
+    config.set_main_option("script_location", str(ALEMBIC_SCRIPT_LOCATION))
+    head = ScriptDirectory.from_config(config).get_current_head()
+
+    with engine.connect() as connection:
+        current = MigrationContext.configure(connection).get_current_revision()
+    return current, head
+
+
+def get_missing_schema() -> list[str]:
+    """返回模型中存在但数据库中缺失的表和列（表名或 表名.列名）"""
+    from sqlalchemy import inspect
+
+    inspector = inspect(engine)
+    existing_tables = set(inspector.get_table_names())
+    missing = []
+    for table in SQLModel.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            missing.append(table.name)
+            continue
+        existing_columns = {column["name"] for column in inspector.get_columns(table.name)}
+        missing.extend(
+            f"{table.name}.{column.name}" for column in table.columns if column.name not in existing_columns
+        )
+    return missing
+
+
+def check_database_schema() -> bool:
+    """校验数据库迁移版本是否为最新、模型的表和列是否都存在，不执行任何 DDL"""
+    current, head = get_alembic_revisions()
+    if current != head:
+        logger.warning(
+            f"数据库迁移版本不是最新 (当前: {current}, 最新: {head})，请执行 alembic upgrade head"
+        )
+        return False
+    # 迁移版本一致不代表表结构一致（例如迁移脚本与模型不符），再按模型核对表和列
+    missing = get_missing_schema()
+    if missing:
+        logger.warning(f"数据库缺少模型中的表或列: {', '.join(missing)}，请检查迁移脚本与模型是否一致")
+        return False
+    return True
+
+
+def init_database() -> None:
+    """启动时的数据库初始化：默认只校验迁移版本，开发环境可开启自动建表"""
+    if settings.DB_AUTO_CREATE_TABLES:
+        create_db_and_tables()
+    else:
+        check_database_schema()
+
+
 def get_session() -> Generator[Session, None, None]:
     with Session(engine) as session:
         yield session
@@ -0,0 +1,264 @@
+"""
+按工作负载划分的同步端点执行器
+
+FastAPI 默认把所有同步端点放进同一个 AnyIO 线程池（40 个令牌），bcrypt 校验、
+数据库读写和批量导出互相争抢线程：一次登录风暴或慢导出就能让用户列表排队。
+
+这里按 EXECUTORS 配置多个具名执行器（如 auth-hash、db-read、db-write、bulk），
+每个执行器有独立的 CapacityLimiter（线程数）和排队上限；ROUTE_EXECUTORS 把路由
+模板绑定到执行器。应用启动前由 bind_route_executors 把匹配到的同步端点替换为
+异步包装函数，在对应执行器中运行原函数；排队已满时直接返回 503。
+
+端点被包装为协程后，FastAPI 会在事件循环中校验和序列化返回值，因此包装函数在同一
+执行器线程中按 response_model 校验、序列化并渲染 JSON，直接返回 RenderedJSONResponse
+（端点声明了 Response 参数或使用非 JSON 响应类时仍交给 FastAPI 处理）。
+
+端点在执行器线程中运行时 current_executor 指向该执行器，端点返回的流式响应据此在
+同一执行器中生成响应体（见 app.core.streaming）。
+
+未绑定的端点和所有同步依赖项（get_current_user 等）仍使用默认线程池。工作线程
+本身由 AnyIO 统一复用，执行器只限制各自同时占用的线程数。
+"""
+import functools
+import inspect
+import logging
+import time
+from collections.abc import Callable
+from contextvars import ContextVar
+from typing import Any, TypeVar
+
+import anyio
+from fastapi import FastAPI, HTTPException, status
+from fastapi.datastructures import DefaultPlaceholder
+from fastapi.dependencies.models import Dependant
+from fastapi.encoders import jsonable_encoder
+from fastapi.exceptions import ResponseValidationError
+from fastapi.responses import JSONResponse, Response
+from fastapi.routing import APIRoute
+from fastapi.utils import is_body_allowed_for_status_code
+from starlette.routing import request_response
+
+from app.core.config import settings
+from app.core.metrics import LabelValues, MetricFunction, registry
+from app.core.route_table import RouteTable
+
+logger = logging.getLogger("executors")
+
+T = TypeVar("T")
+
+executor_rejections_total = registry.counter(
+    "executor_rejections_total", "执行器排队已满被拒绝的任务数", ("executor",)
+)
+executor_queue_wait_seconds = registry.histogram(
+    "executor_queue_wait_seconds", "任务在执行器中等待线程的时间（秒）", ("executor",)
+)
+
+
+# 当前线程正在运行的已绑定端点所属的执行器
+current_executor: ContextVar["WorkloadExecutor | None"] = ContextVar("current_executor", default=None)
+
+
+class ExecutorSaturated(Exception):
+    def __init__(self, name: str) -> None:
+        super().__init__(f"执行器 {name} 排队已满")
+        self.name = name
+
+
+class WorkloadExecutor:
+    """具名的有界执行器：最多 size 个任务并行，最多 queue_limit 个任务排队"""
+
+    def __init__(self, name: str, size: int, queue_limit: int) -> None:
+        if size <= 0 or queue_limit < 0:
+            raise ValueError(f"执行器 {name} 的 size 必须大于 0，queue_limit 不能为负数")
+        self.name = name
+        self.size = size
+        self.queue_limit = queue_limit
+        self.limiter = anyio.CapacityLimiter(size)
+        # 已提交但未完成的任务数，只在事件循环线程中修改
+        self.pending = 0
+        self.completed = 0
+        self.rejected = 0
+
+    @property
+    def active(self) -> int:
+        return min(self.pending, self.size)
+
+    @property
+    def queued(self) -> int:
+        return max(0, self.pending - self.size)
+
+    async def run(self, func: Callable[..., T], *args: Any, admitted: bool = False) -> T:
+        """
+        在执行器的线程中运行同步函数，排队已满时抛出 ExecutorSaturated
+
+        admitted 为 True 表示已被接纳请求的后续任务（如流式响应体），不受排队上限限制。
+        """
+        if not admitted and self.pending >= self.size + self.queue_limit:
+            self.rejected += 1
+            executor_rejections_total.inc(1.0, (self.name,))
+            raise ExecutorSaturated(self.name)
+        self.pending += 1
+        submitted = time.perf_counter()
+        labels = (self.name,)
+
+        def call() -> T:
+            executor_queue_wait_seconds.observe(time.perf_counter() - submitted, labels)
+            return func(*args)
+
+        try:
+            return await anyio.to_thread.run_sync(call, limiter=self.limiter)
+        finally:
+            self.pending -= 1
+            self.completed += 1
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "size": self.size,
+            "queue_limit": self.queue_limit,
+            "active": self.active,
+            "queued": self.queued,
+            "completed": self.completed,
+            "rejected": self.rejected,
+        }
+
+
+executors: dict[str, WorkloadExecutor] = {
+    name: WorkloadExecutor(name, int(params["size"]), int(params["queue_limit"]))
+    for name, params in settings.EXECUTORS.items()
+}
+
+
+def _service_unavailable() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="服务繁忙，请稍后再试",
+        headers={"Retry-After": "1"},
+    )
+
+
+class RenderedJSONResponse(JSONResponse):
+    """已在执行器线程中校验并序列化的端点返回值"""
+
+
+def _uses_response_param(dependant: Dependant) -> bool:
+    if dependant.response_param_name is not None:
+        return True
+    return any(_uses_response_param(sub) for sub in dependant.dependencies)
+
+
+def _can_render(route: APIRoute) -> bool:
+    """返回值能否在执行器线程中渲染：默认 JSON 响应类、有响应体，且没有通过 Response 参数修改响应"""
+    response_class = route.response_class
+    if isinstance(response_class, DefaultPlaceholder):
+        response_class = response_class.value
+    if response_class is not JSONResponse:
+        return False
+    if route.status_code is not None and not is_body_allowed_for_status_code(route.status_code):
+        return False
+    return not _uses_response_param(route.dependant)
+
+
+def _render(route: APIRoute, raw: Any) -> Any:
+    """按 FastAPI 的方式校验并序列化返回值（response_model），在执行器线程中调用"""
+    if isinstance(raw, Response):
+        return raw
+    field = route.response_field
+    if field is None:
+        content = jsonable_encoder(raw)
+    else:
+        value, errors = field.validate(raw, {}, loc=("response",))
+        if errors:
+            raise ResponseValidationError(errors=errors if isinstance(errors, list) else [errors], body=raw)
+        content = field.serialize(
+            value,
+            include=route.response_model_include,
+            exclude=route.response_model_exclude,
+            by_alias=route.response_model_by_alias,
+            exclude_unset=route.response_model_exclude_unset,
+            exclude_defaults=route.response_model_exclude_defaults,
+            exclude_none=route.response_model_exclude_none,
+        )
+    if route.status_code is None:
+        return RenderedJSONResponse(content)
+    return RenderedJSONResponse(content, status_code=route.status_code)
+
+
+def _wrap_endpoint(route: APIRoute, executor: WorkloadExecutor) -> Callable[..., Any]:
+    endpoint = route.dependant.call
+    assert endpoint is not None
+    render = _can_render(route)
+
+    def call(kwargs: dict[str, Any]) -> Any:
+        token = current_executor.set(executor)
+        try:
+            raw = endpoint(**kwargs)
+        finally:
+            current_executor.reset(token)
+        return _render(route, raw) if render else raw
+
+    # functools.wraps 保留原签名，FastAPI 按原参数解析请求
+    @functools.wraps(endpoint)
+    async def run_in_executor(**kwargs: Any) -> Any:
+        try:
+            return await executor.run(call, kwargs)
+        except ExecutorSaturated:
+            raise _service_unavailable()
+
+    return run_in_executor
+
+
+def bind_route_executors(
+    app: FastAPI,
+    route_executors: dict[str, str] | None = None,
+) -> dict[str, str]:
+    """
+    按 ROUTE_EXECUTORS 把同步端点绑定到具名执行器
+
+    需在所有路由注册完成后、应用开始处理请求前调用；异步端点和未匹配的路由不变。
+    返回 "方法 路由模板" -> 执行器名称。
+    """
+    mapping = settings.ROUTE_EXECUTORS if route_executors is None else route_executors
+    unknown = set(mapping.values()) - set(executors)
+    if unknown:
+        raise ValueError(f"路由引用了未配置的执行器: {sorted(unknown)}")
+    table: RouteTable[str | None] = RouteTable(dict(mapping), None)
+    bound: dict[str, str] = {}
+    for route in app.routes:
+        if not isinstance(route, APIRoute) or route.dependant.call is None:
+            continue
+        if inspect.iscoroutinefunction(route.dependant.call):
+            continue
+        for method in sorted(route.methods):
+            name = table.lookup(method, route.path_format)
+            if name is not None:
+                break
+        else:
+            continue
+        wrapper = _wrap_endpoint(route, executors[name])
+        route.endpoint = wrapper
+        route.dependant.call = wrapper
+        # 请求处理函数在路由创建时按端点是否为协程生成，替换端点后需要重新生成
+        route.app = request_response(route.get_route_handler())
+        for method in route.methods:
+            bound[f"{method} {route.path_format}"] = name
+    logger.info(f"同步端点执行器绑定完成: {len(bound)} 个路由")
+    return bound
+
+
+def executor_stats() -> dict[str, dict[str, int]]:
+    return {name: executor.stats() for name, executor in executors.items()}
+
+
+def _executor_stats(field: str) -> MetricFunction:
+    def collect() -> dict[LabelValues, float]:
+        return {(name,): float(getattr(executor, field)) for name, executor in executors.items()}
+    return collect
+
+
+registry.gauge("executor_size", "执行器线程数上限", ("executor",), function=_executor_stats("size"))
+registry.gauge(
+    "executor_active", "执行器中正在运行的任务数", ("executor",), function=_executor_stats("active")
+)
+registry.gauge(
+    "executor_queued", "执行器中等待线程的任务数", ("executor",), function=_executor_stats("queued")
+)
@@ -4,121 +4,216 @@
 import logging
 import time
 import uuid
-from collections.abc import Awaitable, Callable
+from contextvars import ContextVar
+from typing import Any
 
 from fastapi import Request, Response
 from fastapi.responses import JSONResponse
 from starlette.exceptions import HTTPException as StarletteHTTPException
-from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.routing import Match
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
 from app.core.exceptions import TAdminException
+from app.core.logging_config import request_log_sampler
+from app.core.metrics import (
+    http_request_duration_seconds,
+    http_requests_in_progress,
+    http_requests_total,
+)
+from app.core.profiling import (
+    PROFILE_HEADER,
+    continuous_profiler,
+    finish_request_profile,
+    start_request_profile,
+)
+from app.core.tracing import TRACEPARENT_HEADER, finish_request_span, start_request_span
 
 logger = logging.getLogger("middleware")
 
+# 当前请求上下文，供审计日志等非请求对象感知的代码使用
+request_id_var: ContextVar[str | None] = ContextVar("request_id", default=None)
+client_ip_var: ContextVar[str | None] = ContextVar("client_ip", default=None)
 
-class SecurityHeadersMiddleware(BaseHTTPMiddleware):
-    """安全头中间件"""
 
-    async def dispatch(self, request: Request, call_next: Callable[[Request], Awaitable[Response]]) -> Response:
-        response = await call_next(request)
+# 每个响应都附加的安全头（预先编码，避免逐请求构造）
+SECURITY_HEADERS: list[tuple[bytes, bytes]] = [
+    (b"x-content-type-options", b"nosniff"),
+    (b"x-frame-options", b"DENY"),
+    (b"x-xss-protection", b"1; mode=block"),
+    (b"referrer-policy", b"strict-origin-when-cross-origin"),
+]
+HSTS_HEADER = (b"strict-transport-security", b"max-age=31536000; includeSubDomains")
 
-        # 添加安全头
-        response.headers["X-Content-Type-Options"] = "nosniff"
-        response.headers["X-Frame-Options"] = "DENY"
-        response.headers["X-XSS-Protection"] = "1; mode=block"
-        response.headers["Referrer-Policy"] = "strict-origin-when-cross-origin"
+# 未匹配到任何路由的请求统一归为一类，避免按原始路径产生无界的标签/键
+UNMATCHED_ROUTE = "<unmatched>"
 
-        # 在生产环境中添加HSTS
-        if not getattr(request.app.state, 'DEBUG', True):
-            response.headers["Strict-Transport-Security"] = "max-age=31536000; includeSubDomains"
 
-        return response
+def _route_path(route: Any) -> str:
+    path = getattr(route, "path_format", None) or getattr(route, "path", None)
+    return str(path) if path else UNMATCHED_ROUTE
 
 
-class RequestLoggingMiddleware(BaseHTTPMiddleware):
-    """请求日志中间件"""
+def get_route_template(scope: Scope) -> str:
+    """返回请求匹配到的路由模板（如 /api/v1/users/{user_id}），需在路由匹配之后调用"""
+    route = scope.get("route")
+    return UNMATCHED_ROUTE if route is None else _route_path(route)
 
-    async def dispatch(self, request: Request, call_next: Callable[[Request], Awaitable[Response]]) -> Response:
-        # 生成请求ID
-        request_id = str(uuid.uuid4())
-        request.state.request_id = request_id
 
-        # 记录请求开始时间
-        start_time = time.time()
+def match_route_template(scope: Scope) -> str:
+    """在路由匹配之前按与路由器相同的顺序查找路由模板（方法不符时取路径匹配的路由）"""
+    app = scope.get("app")
+    partial = None
+    for route in getattr(getattr(app, "router", None), "routes", ()):
+        match, _ = route.matches(scope)
+        if match is Match.FULL:
+            return _route_path(route)
+        if match is Match.PARTIAL and partial is None:
+            partial = route
+    return UNMATCHED_ROUTE if partial is None else _route_path(partial)
 
-        # 记录请求信息
-        client_ip = request.client.host if request.client else "unknown"
-        method = request.method
-        url = str(request.url)
 
-        # 调试日志
-        logger.info(f"RequestLoggingMiddleware: {method} {request.url.path} from {client_ip}")
+class RequestContextMiddleware:
+    """
+    请求上下文中间件（纯 ASGI 实现）
 
-        # 创建请求日志记录 - 使用extra参数
-        request_logger = logging.getLogger("http_request")
-        request_logger.info(
-            "HTTP请求开始",
-            extra={
-                "client_ip": client_ip,
-                "method": method,
-                "path": request.url.path,
-                "user_agent": request.headers.get("user-agent", ""),
-                "status_code": None,
-                "response_time": None
-            }
-        )
+    单次处理完成请求ID、计时、安全头和访问日志，直接在 http.response.start
+    消息中追加响应头，不包装请求/响应对象，也不会缓冲流式响应。
+    """
 
-        try:
-            # 处理请求
-            response = await call_next(request)
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+        self.request_logger = logging.getLogger("http_request")
 
-            # 计算处理时间
-            process_time = time.time() - start_time
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
 
-            # 记录响应信息
-            request_logger.info(
-                "HTTP请求完成",
+        # 生成请求ID，写入 scope["state"] 供 request.state.request_id 读取
+        request_id = str(uuid.uuid4())
+        scope.setdefault("state", {})["request_id"] = request_id
+        start_time = time.perf_counter()
+
+        client = scope.get("client")
+        client_ip = client[0] if client else "unknown"
+        method = scope["method"]
+        path = scope["path"]
+        user_agent = ""
+        profile_header = None
+        authorization = ""
+        traceparent = None
+        for name, value in scope["headers"]:
+            if name == b"user-agent":
+                user_agent = value.decode("latin-1")
+            elif name == PROFILE_HEADER:
+                profile_header = value.decode("latin-1")
+            elif name == b"authorization":
+                authorization = value.decode("latin-1")
+            elif name == TRACEPARENT_HEADER:
+                traceparent = value.decode("latin-1")
+
+        request_id_var.set(request_id)
+        client_ip_var.set(client_ip)
+
+        logger.debug(f"RequestContextMiddleware: {method} {path} from {client_ip}")
+        sample_draw = request_log_sampler.draw()
+        # 按路由采样时开始记录也要按路由判断，此时请求尚未经过路由匹配
+        start_route = match_route_template(scope) if request_log_sampler.needs_route else None
+        if request_log_sampler.keep_start(sample_draw, start_route):
+            self.request_logger.info(
+                "HTTP请求开始",
                 extra={
                     "client_ip": client_ip,
                     "method": method,
-                    "path": request.url.path,
-                    "status_code": response.status_code,
-                    "response_time": process_time,
-                    "user_agent": request.headers.get("user-agent", "")
+                    "path": path,
+                    "user_agent": user_agent,
+                    "status_code": None,
+                    "response_time": None
                 }
             )
 
-            # 添加响应头
-            response.headers["X-Request-ID"] = request_id
-            response.headers["X-Process-Time"] = f"{process_time:.3f}"
-
-            return response
-
+        app = scope.get("app")
+        add_hsts = not getattr(getattr(app, "state", None), "DEBUG", True)
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                process_time = time.perf_counter() - start_time
+                headers = list(message.get("headers", ()))
+                headers.extend(SECURITY_HEADERS)
+                if add_hsts:
+                    headers.append(HSTS_HEADER)
+                headers.append((b"x-request-id", request_id.encode("latin-1")))
+                headers.append((b"x-process-time", f"{process_time:.3f}".encode("latin-1")))
+                message["headers"] = headers
+            await send(message)
+
+        request_span = start_request_span(traceparent, request_id, method, path)
+        profiled_task = continuous_profiler.enter_request(scope) if continuous_profiler.running else None
+        profiler = None
+        if profile_header is not None:
+            profiler = await start_request_profile(request_id, profile_header, authorization)
+
+        http_requests_in_progress.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
         except Exception as e:
-            # 计算处理时间
-            process_time = time.time() - start_time
-
-            # 记录错误信息
-            log_record = request_logger.makeRecord(
-                request_logger.name,
+            process_time = time.perf_counter() - start_time
+            _record_request_metrics(method, get_route_template(scope), 500, process_time)
+            if request_span is not None:
+                finish_request_span(request_span, get_route_template(scope), 500, e)
+            log_record = self.request_logger.makeRecord(
+                self.request_logger.name,
                 logging.ERROR,
                 "", 0,  # filename, lineno
                 "HTTP请求失败",
                 (), None  # args, exc_info
             )
-            # 设置自定义属性
             log_record.client_ip = client_ip
             log_record.method = method
-            log_record.path = request.url.path
+            log_record.path = path
             log_record.status_code = 500
             log_record.response_time = process_time
-            log_record.user_agent = request.headers.get("user-agent", "")
+            log_record.user_agent = user_agent
             log_record.error = str(e)
+            self.request_logger.handle(log_record)
+            raise
+        finally:
+            http_requests_in_progress.dec()
+            if profiled_task is not None:
+                continuous_profiler.exit_request(profiled_task)
+            if profiler is not None:
+                await finish_request_profile(profiler)
+
+        process_time = time.perf_counter() - start_time
+        route = get_route_template(scope)
+        _record_request_metrics(method, route, status_code, process_time)
+        if request_span is not None:
+            finish_request_span(request_span, route, status_code)
+        if request_log_sampler.keep_completion(sample_draw, route, status_code, process_time):
+            self.request_logger.info(
+                "HTTP请求完成",
+                extra={
+                    "client_ip": client_ip,
+                    "method": method,
+                    "path": path,
+                    "status_code": status_code,
+                    "response_time": process_time,
+                    "user_agent": user_agent
+                }
+            )
 
-            request_logger.handle(log_record)
 
-            # 重新抛出异常让全局异常处理器处理
-            raise
+def _record_request_metrics(method: str, route: str, status_code: int, process_time: float) -> None:
+    http_requests_total.inc(1.0, (method, route, str(status_code)))
+    http_request_duration_seconds.observe(process_time, (method, route))
+
+
+def _log_level_for_status(status_code: int) -> int:
+    """客户端错误（4xx）按 INFO 记录，只有服务端错误才记为 ERROR"""
+    return logging.ERROR if status_code >= 500 else logging.INFO
 
 
 class GlobalExceptionHandler:
@@ -131,7 +226,8 @@ class GlobalExceptionHandler:
             # 如果不是TAdminException，让通用异常处理器处理
             return await GlobalExceptionHandler.general_exception_handler(request, exc)
 
-        logger.error(
+        logger.log(
+            _log_level_for_status(exc.status_code),
             f"自定义异常 [{getattr(request.state, 'request_id', 'unknown')}]: {exc.message}",
             extra={
                 "request_id": getattr(request.state, 'request_id', 'unknown'),
@@ -163,7 +259,8 @@ class GlobalExceptionHandler:
             # 如果不是HTTP异常，让通用异常处理器处理
             return await GlobalExceptionHandler.general_exception_handler(request, exc)
 
-        logger.error(
+        logger.log(
+            _log_level_for_status(getattr(exc, 'status_code', 500)),
             f"HTTP异常 [{getattr(request.state, 'request_id', 'unknown')}]: {str(exc)}",
             extra={
                 "request_id": getattr(request.state, 'request_id', 'unknown'),
@@ -182,7 +279,8 @@ class GlobalExceptionHandler:
                 },
                 "timestamp": time.time(),
                 "request_id": getattr(request.state, 'request_id', 'unknown'),
-            }
+            },
+            headers=getattr(exc, 'headers', None),
         )
 
     @staticmethod
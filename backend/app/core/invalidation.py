@@ -0,0 +1,196 @@
+"""
+进程间缓存失效总线
+
+多 worker 部署时，每个进程内的缓存彼此独立，一个 worker 中的写操作对其他
+worker 不可见。这里使用一个本地 SQLite 变更表作为轻量级消息总线（无需外部
+broker）：写操作插入一条 "topic/key 已变更" 记录，每个 worker 的后台线程
+轮询新记录并分发给本进程的订阅者。发布方所在进程会立即在本地分发，轮询时
+跳过自己发布的记录。
+
+描述运行时状态（而非缓存失效）的消息，例如日志级别和采样配置，以 retain=True
+发布：除正常分发外还会写入保留表，新启动的 worker 先按顺序回放保留消息，
+再从当前位置开始轮询，因此重启或滚动替换的 worker 不会回到默认配置。
+"""
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections.abc import Callable
+from pathlib import Path
+
+from app.core.config import settings
+
+logger = logging.getLogger("invalidation")
+
+InvalidationCallback = Callable[[str, str], None]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS cache_invalidations (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    topic TEXT NOT NULL,
+    key TEXT NOT NULL,
+    origin_pid INTEGER NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS retained_messages (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    topic TEXT NOT NULL,
+    key TEXT NOT NULL,
+    created_at REAL NOT NULL
+)
+"""
+
+
+class InvalidationBus:
+    """基于 SQLite 变更表的缓存失效总线"""
+
+    def __init__(
+        self,
+        path: str | Path,
+        poll_interval: float = 0.5,
+        retention_seconds: float = 300.0,
+        enabled: bool = True,
+    ):
+        self.path = Path(path)
+        self.enabled = enabled
+        self.poll_interval = poll_interval
+        self.retention_seconds = retention_seconds
+        self._subscribers: list[InvalidationCallback] = []
+        self._local = threading.local()
+        self._last_id = 0
+        self._stop_event = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def _connect(self) -> sqlite3.Connection:
+        # 每个线程持有独立连接；fork 后按 pid 重新建立
+        conn: sqlite3.Connection | None = getattr(self._local, "conn", None)
+        if conn is None or getattr(self._local, "pid", None) != os.getpid():
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def subscribe(self, callback: InvalidationCallback) -> None:
+        """注册订阅者，回调参数为 (topic, key)"""
+        self._subscribers.append(callback)
+
+    def _dispatch(self, topic: str, key: str) -> None:
+        for callback in self._subscribers:
+            try:
+                callback(topic, key)
+            except Exception:
+                logger.exception(f"缓存失效回调执行失败: {topic}/{key}")
+
+    def publish(self, topic: str, key: str | int, retain: bool = False) -> None:
+        """
+        发布变更消息：本地立即分发，并写入变更表通知其他 worker
+
+        retain 为 True 时同时写入保留表，之后启动的 worker 会在启动时回放
+        """
+        key = str(key)
+        self._dispatch(topic, key)
+        if not self.enabled:
+            return
+        now = time.time()
+        try:
+            conn = self._connect()
+            with conn:
+                conn.execute("BEGIN")
+                conn.execute(
+                    "INSERT INTO cache_invalidations (topic, key, origin_pid, created_at) VALUES (?, ?, ?, ?)",
+                    (topic, key, os.getpid(), now),
+                )
+                if retain:
+                    conn.execute(
+                        "INSERT INTO retained_messages (topic, key, created_at) VALUES (?, ?, ?)",
+                        (topic, key, now),
+                    )
+        except sqlite3.Error:
+            logger.exception(f"缓存失效消息发布失败: {topic}/{key}")
+
+    def replay_retained(self) -> int:
+        """按发布顺序向本进程的订阅者回放保留消息，返回回放条数"""
+        rows = self._connect().execute("SELECT topic, key FROM retained_messages ORDER BY id").fetchall()
+        for topic, key in rows:
+            self._dispatch(topic, key)
+        return len(rows)
+
+    def clear_retained(self) -> None:
+        """清空保留消息（启动器在新部署启动时调用，使运行时状态回到配置默认值）"""
+        if self.enabled:
+            self._connect().execute("DELETE FROM retained_messages")
+
+    def poll(self) -> int:
+        """拉取并分发其他进程发布的新消息，返回处理条数"""
+        rows = self._connect().execute(
+            "SELECT id, topic, key, origin_pid FROM cache_invalidations WHERE id > ? ORDER BY id",
+            (self._last_id,),
+        ).fetchall()
+        pid = os.getpid()
+        for row_id, topic, key, origin_pid in rows:
+            self._last_id = row_id
+            if origin_pid != pid:
+                self._dispatch(topic, key)
+        return len(rows)
+
+    def prune(self) -> None:
+        """清理超过保留期的历史消息"""
+        self._connect().execute(
+            "DELETE FROM cache_invalidations WHERE created_at < ?",
+            (time.time() - self.retention_seconds,),
+        )
+
+    def _run(self) -> None:
+        last_prune = time.monotonic()
+        while not self._stop_event.wait(self.poll_interval):
+            try:
+                self.poll()
+                if time.monotonic() - last_prune > self.retention_seconds:
+                    self.prune()
+                    last_prune = time.monotonic()
+            except sqlite3.Error:
+                logger.exception("缓存失效消息轮询失败")
+
+    def start(self) -> None:
+        """启动后台轮询线程（应在 worker 进程 fork 之后调用）"""
+        if not self.enabled or (self._thread is not None and self._thread.is_alive()):
+            return
+        conn = self._connect()
+        # 先记下轮询起点再回放：回放期间发布的新消息会在轮询时再分发一次，不会遗漏
+        row = conn.execute("SELECT MAX(id) FROM cache_invalidations").fetchone()
+        self._last_id = row[0] or 0
+        try:
+            self.replay_retained()
+        except sqlite3.Error:
+            logger.exception("保留消息回放失败")
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="invalidation-bus", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.poll_interval * 2)
+            self._thread = None
+
+
+invalidation_bus = InvalidationBus(
+    settings.INVALIDATION_BUS_PATH,
+    poll_interval=settings.INVALIDATION_BUS_POLL_INTERVAL,
+    enabled=settings.INVALIDATION_BUS_ENABLED,
+)
+
+
+def publish_user_changed(user_id: int | None) -> None:
+    if user_id is not None:
+        invalidation_bus.publish("user", user_id)
+
+
+def publish_role_changed(role_id: int | None) -> None:
+    if role_id is not None:
+        invalidation_bus.publish("role", role_id)
@@ -0,0 +1,241 @@
+"""
+日志轮转、压缩与清理
+
+MultiProcessRotatingFileHandler 按大小和/或时间轮转日志文件，轮转检查由日志监听
+线程在每个批次前后执行，不在请求路径上。多个 worker 进程写同一目录时：
+    - 通过 <日志文件>.lock 文件锁保证同一时刻只有一个进程执行重命名；
+    - 其他进程发现路径对应的 inode 变化后自动重新打开新文件
+      （外部 logrotate 移动文件时同样适用）。
+
+LogMaintenance 后台线程定期压缩已轮转的文件（gzip）并按数量和天数清理，
+同样用目录级文件锁保证多进程下只有一个进程在执行。
+"""
+import contextlib
+import gzip
+import logging
+import os
+import re
+import shutil
+import threading
+import time
+from collections.abc import Iterator
+from datetime import datetime
+from io import TextIOWrapper
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # Windows 下没有 fcntl，只支持单进程写入
+    fcntl = None  # type: ignore[assignment]
+
+from app.core.config import settings
+
+# 轮转文件后缀: app.log.20261019-145500[-1][.gz]
+ROTATED_SUFFIX = re.compile(r"^(\d{8}-\d{6})(?:-(\d+))?(\.gz)?$")
+
+
+@contextlib.contextmanager
+def file_lock(path: str | Path, blocking: bool = True) -> Iterator[bool]:
+    """进程间文件锁，返回是否获得锁（非阻塞模式下可能为 False）"""
+    if fcntl is None:
+        yield True
+        return
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        flags = fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB
+        try:
+            fcntl.flock(fd, flags)
+        except BlockingIOError:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+    finally:
+        os.close(fd)
+
+
+class MultiProcessRotatingFileHandler(logging.FileHandler):
+    """
+    按大小/时间轮转的文件处理器（多进程安全）
+
+    max_bytes 为 0 时不按大小轮转；rotate_interval（秒）为 0 时不按时间轮转，
+    时间轮转按 UTC 时间对齐到 interval 的整数倍（86400 即每天零点）。
+    """
+
+    def __init__(
+        self,
+        filename: str | Path,
+        max_bytes: int = 0,
+        rotate_interval: int = 0,
+        encoding: str | None = None,
+        delay: bool = False,
+    ):
+        self.max_bytes = max_bytes
+        self.rotate_interval = rotate_interval
+        self._file_id: tuple[int, int] | None = None
+        self._bucket = 0
+        super().__init__(filename, encoding=encoding, delay=delay)
+
+    def _open(self) -> TextIOWrapper:
+        stream = super()._open()
+        stat = os.fstat(stream.fileno())
+        self._file_id = (stat.st_dev, stat.st_ino)
+        # 沿用已有文件时，按最后写入时间归属时间段，跨时间段的旧文件会被立即轮转
+        self._bucket = self._time_bucket(stat.st_mtime if stat.st_size else time.time())
+        return stream
+
+    def _time_bucket(self, timestamp: float) -> int:
+        return int(timestamp // self.rotate_interval) if self.rotate_interval else 0
+
+    def _needs_rotation(self, stat: os.stat_result) -> bool:
+        if self.max_bytes and stat.st_size >= self.max_bytes:
+            return True
+        return bool(
+            self.rotate_interval
+            and stat.st_size
+            and self._time_bucket(time.time()) != self._bucket
+        )
+
+    def _rotation_target(self) -> str:
+        base = f"{self.baseFilename}.{datetime.utcnow().strftime('%Y%m%d-%H%M%S')}"
+        target, index = base, 0
+        while os.path.exists(target) or os.path.exists(target + ".gz"):
+            index += 1
+            target = f"{base}-{index}"
+        return target
+
+    def _reopen(self) -> None:
+        if self.stream is not None:
+            self.stream.flush()
+            self.stream.close()
+        self.stream = self._open()
+
+    def maybe_rotate(self) -> None:
+        """检查是否需要轮转或重新打开文件，由日志监听线程调用"""
+        if self.stream is None:
+            return
+        self.acquire()
+        try:
+            try:
+                stat = os.stat(self.baseFilename)
+            except FileNotFoundError:
+                self._reopen()
+                return
+            if (stat.st_dev, stat.st_ino) != self._file_id:
+                # 已被其他进程或外部工具轮转
+                self._reopen()
+                return
+            if not self._needs_rotation(stat):
+                return
+
+            self.stream.flush()
+            with file_lock(self.baseFilename + ".lock"):
+                # 拿到锁后重新检查，其他进程可能刚刚完成轮转
+                try:
+                    stat = os.stat(self.baseFilename)
+                    if (stat.st_dev, stat.st_ino) == self._file_id and self._needs_rotation(stat):
+                        os.rename(self.baseFilename, self._rotation_target())
+                except FileNotFoundError:
+                    pass
+                self._reopen()
+        finally:
+            self.release()
+
+
+class LogMaintenance:
+    """后台压缩已轮转的日志文件，并按保留数量和天数清理"""
+
+    def __init__(
+        self,
+        log_dir: Path,
+        base_names: list[str],
+        compress: bool = True,
+        backup_count: int = 14,
+        retention_days: int = 30,
+        interval: float = 60.0,
+        grace_seconds: float = 30.0,
+    ):
+        self.log_dir = log_dir
+        self.base_names = base_names
+        self.compress = compress
+        self.backup_count = backup_count
+        self.retention_days = retention_days
+        self.interval = interval
+        # 轮转后其他进程可能还会短暂写入旧文件，超过宽限期未修改才压缩
+        self.grace_seconds = grace_seconds
+        self._stop_event = threading.Event()
+        self._thread: threading.Thread | None = None
+        self.logger = logging.getLogger("logging")
+
+    def _rotated_files(self, base_name: str) -> list[Path]:
+        prefix = base_name + "."
+        rotated: list[tuple[tuple[str, int], Path]] = []
+        for path in self.log_dir.glob(prefix + "*"):
+            match = ROTATED_SUFFIX.match(path.name[len(prefix):])
+            if match:
+                rotated.append(((match.group(1), int(match.group(2) or 0)), path))
+        # 按轮转时间和同一秒内的序号排序，最旧的在前
+        return [path for _, path in sorted(rotated)]
+
+    @staticmethod
+    def _compress_file(path: Path) -> None:
+        target = path.with_name(path.name + ".gz")
+        tmp = path.with_name(path.name + ".gz.tmp")
+        with open(path, "rb") as src, gzip.open(tmp, "wb") as dst:
+            shutil.copyfileobj(src, dst, 1024 * 1024)
+        stat = path.stat()
+        os.utime(tmp, (stat.st_atime, stat.st_mtime))
+        os.replace(tmp, target)
+        path.unlink()
+
+    def run_once(self) -> None:
+        with file_lock(self.log_dir / ".maintenance.lock", blocking=False) as acquired:
+            if not acquired:
+                return
+            now = time.time()
+            for base_name in self.base_names:
+                if self.compress:
+                    for path in self._rotated_files(base_name):
+                        if path.suffix != ".gz" and now - path.stat().st_mtime > self.grace_seconds:
+                            self._compress_file(path)
+
+                rotated = self._rotated_files(base_name)
+                expired = set(rotated[:-self.backup_count] if self.backup_count else [])
+                if self.retention_days:
+                    cutoff = now - self.retention_days * 86400
+                    expired.update(path for path in rotated if path.stat().st_mtime < cutoff)
+                for path in expired:
+                    path.unlink(missing_ok=True)
+
+    def _run(self) -> None:
+        while not self._stop_event.wait(self.interval):
+            try:
+                self.run_once()
+            except Exception:
+                self.logger.exception("日志压缩/清理失败")
+
+    def start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="log-maintenance", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5.0)
+            self._thread = None
+
+
+def create_log_maintenance(log_dir: Path, base_names: list[str]) -> LogMaintenance:
+    return LogMaintenance(
+        log_dir,
+        base_names,
+        compress=settings.LOG_COMPRESS,
+        backup_count=settings.LOG_BACKUP_COUNT,
+        retention_days=settings.LOG_RETENTION_DAYS,
+        interval=settings.LOG_MAINTENANCE_INTERVAL,
+    )
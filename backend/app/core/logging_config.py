@@ -1,53 +1,651 @@
+import atexit
+import collections
 import json
 import logging
+import math
+import os
+import queue
+import random
 import sys
-from datetime import datetime
+import threading
+import time
+from dataclasses import dataclass, field, replace
+from datetime import datetime, timezone
+from json.encoder import encode_basestring
+from logging.handlers import QueueHandler
 from pathlib import Path
+from typing import Any
+
+from app.core.config import settings
+from app.core.log_rotation import (
+    LogMaintenance,
+    MultiProcessRotatingFileHandler,
+    create_log_maintenance,
+)
+
+try:
+    import orjson
+except ImportError:  # orjson 为可选加速依赖（pip install app[speedups]）
+    orjson = None  # type: ignore[assignment]
+
+_encode_fallback = json.JSONEncoder(ensure_ascii=False).encode
+_INFINITY = float("inf")
+
+
+def _encode_value(value: Any) -> str:
+    """编码单个 JSON 值，标量走快速路径，其余回退到标准库编码器"""
+    if value is None:
+        return "null"
+    cls = type(value)
+    if cls is str:
+        # encode_basestring 为 C 加速实现，输出与 json.dumps(ensure_ascii=False) 一致
+        return encode_basestring(value)
+    if cls is int:
+        return int.__repr__(value)
+    if cls is float and value == value and -_INFINITY < value < _INFINITY:
+        return float.__repr__(value)
+    if cls is bool:
+        return "true" if value else "false"
+    return _encode_fallback(value)
+
+
+class TimestampCache:
+    """
+    按秒缓存 ISO 时间前缀，只在秒变化时调用 datetime 格式化
+
+    输出与 datetime.utcfromtimestamp(created).isoformat() 逐字节一致。
+    """
+
+    def __init__(self) -> None:
+        self._cached: tuple[int, str] = (-1, "")
+
+    def format(self, created: float) -> str:
+        frac, whole = math.modf(created)
+        second = int(whole)
+        microsecond = round(frac * 1e6)
+        if microsecond >= 1000000:
+            second += 1
+            microsecond -= 1000000
+
+        cached_second, prefix = self._cached
+        if cached_second != second:
+            prefix = datetime.fromtimestamp(second, timezone.utc).replace(tzinfo=None).isoformat()
+            self._cached = (second, prefix)
+
+        if microsecond:
+            return f"{prefix}.{microsecond:06d}"
+        return prefix
 
 
 class JSONFormatter(logging.Formatter):
-    """JSON格式的日志格式化器"""
+    """
+    JSON格式的日志格式化器
 
-    def format(self, record: logging.LogRecord) -> str:
-        log_entry = {
-            "timestamp": datetime.utcnow().isoformat(),
+    时间取自 record.created 并按秒缓存；键名和分隔符预先拼好，只对动态值做
+    编码，输出与逐条 json.dumps(ensure_ascii=False) 的结果逐字节一致。
+    include_location=False 时不输出 module/function/line；compact=True 且安装了
+    orjson 时整条记录交给 orjson 编码（紧凑分隔符，不保证逐字节兼容）。
+    """
+
+    BASE_KEYS = frozenset({"timestamp", "level", "logger", "message", "module", "function", "line", "exception"})
+
+    def __init__(self, include_location: bool = True, compact: bool = False):
+        super().__init__()
+        self.include_location = include_location
+        self.compact = compact and orjson is not None
+        self._timestamps = TimestampCache()
+        self._level_fields: dict[str, str] = {}
+
+    def _level_field(self, levelname: str) -> str:
+        field = self._level_fields.get(levelname)
+        if field is None:
+            field = self._level_fields[levelname] = f'", "level": {encode_basestring(levelname)}, "logger": '
+        return field
+
+    def _build_entry(self, record: logging.LogRecord, timestamp: str) -> dict[str, Any]:
+        log_entry: dict[str, Any] = {
+            "timestamp": timestamp,
             "level": record.levelname,
             "logger": record.name,
             "message": record.getMessage(),
-            "module": record.module,
-            "function": record.funcName,
-            "line": record.lineno,
         }
+        if self.include_location:
+            log_entry["module"] = record.module
+            log_entry["function"] = record.funcName
+            log_entry["line"] = record.lineno
 
         # 添加额外字段
-        if hasattr(record, 'extra_fields') and record.extra_fields:
-            log_entry.update(record.extra_fields)
+        extra_fields = getattr(record, 'extra_fields', None)
+        if extra_fields:
+            log_entry.update(extra_fields)
 
         # 添加异常信息
         if record.exc_info:
             log_entry["exception"] = self.formatException(record.exc_info)
+        return log_entry
 
-        return json.dumps(log_entry, ensure_ascii=False)
+    def format(self, record: logging.LogRecord) -> str:
+        timestamp = self._timestamps.format(record.created)
+        if self.compact:
+            return orjson.dumps(self._build_entry(record, timestamp), default=str).decode()
+
+        extra_fields = getattr(record, 'extra_fields', None)
+        # 额外字段覆盖基础字段或键不是字符串时，走通用路径以保持原有语义
+        if extra_fields and (
+            not self.BASE_KEYS.isdisjoint(extra_fields)
+            or not all(type(key) is str for key in extra_fields)
+        ):
+            return _encode_fallback(self._build_entry(record, timestamp))
+
+        parts = [
+            '{"timestamp": "', timestamp,
+            self._level_field(record.levelname), encode_basestring(record.name),
+            ', "message": ', encode_basestring(record.getMessage()),
+        ]
+        if self.include_location:
+            parts += [
+                ', "module": ', _encode_value(record.module),
+                ', "function": ', _encode_value(record.funcName),
+                ', "line": ', _encode_value(record.lineno),
+            ]
+        if extra_fields:
+            for key, value in extra_fields.items():
+                parts += [', ', encode_basestring(key), ': ', _encode_value(value)]
+        if record.exc_info:
+            parts += [', "exception": ', encode_basestring(self.formatException(record.exc_info))]
+        parts.append('}')
+        return ''.join(parts)
 
 
 class RequestResponseFormatter(logging.Formatter):
-    """HTTP请求响应日志格式化器"""
+    """HTTP请求响应日志格式化器（与 JSONFormatter 相同的快速编码方式）"""
+
+    def __init__(self, compact: bool = False):
+        super().__init__()
+        self.compact = compact and orjson is not None
+        self._timestamps = TimestampCache()
+        self._level_fields: dict[str, str] = {}
+
+    def _level_field(self, levelname: str) -> str:
+        field = self._level_fields.get(levelname)
+        if field is None:
+            field = self._level_fields[levelname] = (
+                f'", "level": {encode_basestring(levelname)}, "type": "http_request", "client_ip": '
+            )
+        return field
 
     def format(self, record: logging.LogRecord) -> str:
+        timestamp = self._timestamps.format(record.created)
         # 从extra参数中获取字段
-        log_entry = {
-            "timestamp": datetime.utcnow().isoformat(),
-            "level": record.levelname,
-            "type": "http_request",
-            "client_ip": getattr(record, 'client_ip', 'unknown'),
-            "method": getattr(record, 'method', 'unknown'),
-            "path": getattr(record, 'path', 'unknown'),
-            "status_code": getattr(record, 'status_code', None),
-            "response_time": getattr(record, 'response_time', None),
-            "user_agent": getattr(record, 'user_agent', ''),
+        client_ip = getattr(record, 'client_ip', 'unknown')
+        method = getattr(record, 'method', 'unknown')
+        path = getattr(record, 'path', 'unknown')
+        status_code = getattr(record, 'status_code', None)
+        response_time = getattr(record, 'response_time', None)
+        user_agent = getattr(record, 'user_agent', '')
+
+        if self.compact:
+            return orjson.dumps({
+                "timestamp": timestamp,
+                "level": record.levelname,
+                "type": "http_request",
+                "client_ip": client_ip,
+                "method": method,
+                "path": path,
+                "status_code": status_code,
+                "response_time": response_time,
+                "user_agent": user_agent,
+            }, default=str).decode()
+
+        return ''.join((
+            '{"timestamp": "', timestamp,
+            self._level_field(record.levelname), _encode_value(client_ip),
+            ', "method": ', _encode_value(method),
+            ', "path": ', _encode_value(path),
+            ', "status_code": ', _encode_value(status_code),
+            ', "response_time": ', _encode_value(response_time),
+            ', "user_agent": ', _encode_value(user_agent),
+            '}',
+        ))
+
+
+class DeferredFlushMixin:
+    """emit 时只写入缓冲区，由日志监听线程在每个批次结束时统一 flush"""
+
+    deferred = True
+
+    def flush(self) -> None:
+        if not self.deferred:
+            super().flush()  # type: ignore[misc]
+
+    def flush_batch(self) -> None:
+        super().flush()  # type: ignore[misc]
+
+
+class BatchStreamHandler(DeferredFlushMixin, logging.StreamHandler):  # type: ignore[type-arg]
+    pass
+
+
+class BatchFileHandler(DeferredFlushMixin, MultiProcessRotatingFileHandler):
+    pass
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """
+    非阻塞队列处理器
+
+    记录只在调用线程中完成消息格式化，然后放入有界队列，由后台线程写入目标
+    处理器。队列满时普通记录直接丢弃并计数；ERROR 及以上级别的记录进入一个
+    有界的溢出缓冲区，由监听线程优先写入。任何情况下都不会阻塞调用方。
+    """
+
+    def __init__(
+        self,
+        log_queue: "queue.Queue[Any]",
+        targets: list[logging.Handler],
+        stats: "LogQueueStats",
+        overflow: "collections.deque[Any]",
+    ):
+        super().__init__(log_queue)
+        self.targets = targets
+        self.stats = stats
+        self.overflow = overflow
+
+    def prepare(self, record: logging.LogRecord) -> Any:
+        # 提前合并参数，避免可变参数在后台线程格式化时已被修改；
+        # exc_info 保留给目标处理器的格式化器使用
+        record.msg = record.getMessage()
+        record.args = None
+        return (self.targets, record)
+
+    def enqueue(self, record: Any) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            levelno = record[1].levelno
+            if levelno >= logging.ERROR and len(self.overflow) < (self.overflow.maxlen or 0):
+                self.overflow.append(record)
+            else:
+                self.stats.record_drop(levelno)
+
+
+class LogQueueStats:
+    """日志队列丢弃统计"""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.dropped: dict[str, int] = {}
+        self.total_dropped = 0
+        self._unreported = 0
+
+    def record_drop(self, levelno: int) -> None:
+        level = logging.getLevelName(levelno)
+        with self._lock:
+            self.dropped[level] = self.dropped.get(level, 0) + 1
+            self.total_dropped += 1
+            self._unreported += 1
+
+    def take_unreported(self) -> int:
+        with self._lock:
+            count, self._unreported = self._unreported, 0
+            return count
+
+    def snapshot(self) -> dict[str, Any]:
+        with self._lock:
+            return {"total_dropped": self.total_dropped, "dropped_by_level": dict(self.dropped)}
+
+
+_STOP = object()
+
+
+class BatchingQueueListener:
+    """
+    日志队列监听线程
+
+    从队列批量取出记录写入目标处理器，达到批量大小或刷新间隔时统一 flush；
+    如有丢弃的记录，会写入一条汇总警告。stop() 会写完队列中剩余的记录。
+    """
+
+    def __init__(
+        self,
+        log_queue: "queue.Queue[Any]",
+        handlers: list[logging.Handler],
+        stats: LogQueueStats,
+        overflow: "collections.deque[Any]",
+        batch_size: int = 256,
+        flush_interval: float = 0.5,
+    ):
+        self.queue = log_queue
+        self.overflow = overflow
+        self.handlers = handlers
+        self.stats = stats
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._thread: threading.Thread | None = None
+
+    def _handle(self, item: Any) -> None:
+        targets, record = item
+        for handler in targets:
+            if record.levelno >= handler.level:
+                handler.handle(record)
+
+    def _check_rotation(self) -> None:
+        for handler in self.handlers:
+            if isinstance(handler, MultiProcessRotatingFileHandler):
+                try:
+                    handler.maybe_rotate()
+                except Exception:
+                    # 与 Handler.handleError 一致：日志系统自身的错误不影响监听线程
+                    pass
+
+    def _flush(self) -> None:
+        while self.overflow:
+            self._handle(self.overflow.popleft())
+        dropped = self.stats.take_unreported()
+        if dropped:
+            record = logging.LogRecord(
+                "logging", logging.WARNING, __file__, 0,
+                f"日志队列已满，已丢弃 {dropped} 条日志记录", None, None,
+            )
+            for handler in self.handlers:
+                if record.levelno >= handler.level:
+                    handler.handle(record)
+        for handler in self.handlers:
+            try:
+                if isinstance(handler, DeferredFlushMixin):
+                    handler.flush_batch()
+                else:
+                    handler.flush()
+            except Exception:
+                # 与 Handler.handleError 一致：日志系统自身的错误不影响监听线程
+                pass
+        self._check_rotation()
+
+    def _run(self) -> None:
+        pending = 0
+        deadline = time.monotonic() + self.flush_interval
+        while True:
+            try:
+                item = self.queue.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                item = None
+            if item is _STOP:
+                break
+            if item is not None:
+                if pending == 0:
+                    # 批次开始前确认文件未被其他进程轮转，避免写入已移走的旧文件
+                    self._check_rotation()
+                self._handle(item)
+                pending += 1
+                # 尽量一次性取空队列中已有的记录
+                while pending < self.batch_size:
+                    try:
+                        item = self.queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if item is _STOP:
+                        self._drain()
+                        return
+                    self._handle(item)
+                    pending += 1
+            if pending >= self.batch_size or time.monotonic() >= deadline:
+                self._flush()
+                pending = 0
+                deadline = time.monotonic() + self.flush_interval
+        self._drain()
+
+    def _drain(self) -> None:
+        while True:
+            try:
+                item = self.queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not _STOP:
+                self._handle(item)
+        self._flush()
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name="log-listener", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        if self._thread is None:
+            return
+        self.queue.put(_STOP)
+        self._thread.join(timeout=timeout)
+        self._thread = None
+
+
+class LoggingPipeline:
+    """日志管道：持有队列、队列处理器和监听线程，支持 fork 后在子进程中重建"""
+
+    def __init__(self, root_targets: list[logging.Handler], request_targets: list[logging.Handler]):
+        self.root_targets = root_targets
+        self.request_targets = request_targets
+        self.handlers = root_targets + request_targets
+        self.stats = LogQueueStats()
+        self.overflow: collections.deque[Any] = collections.deque(maxlen=1000)
+        log_queue: queue.Queue[Any] = queue.Queue(maxsize=settings.LOG_QUEUE_SIZE)
+        self.queue = log_queue
+        self.root_queue_handler = NonBlockingQueueHandler(log_queue, root_targets, self.stats, self.overflow)
+        self.request_queue_handler = NonBlockingQueueHandler(log_queue, request_targets, self.stats, self.overflow)
+        self.listener: BatchingQueueListener | None = self._start_listener(log_queue)
+
+    def _start_listener(self, log_queue: "queue.Queue[Any]") -> BatchingQueueListener:
+        listener = BatchingQueueListener(
+            log_queue,
+            self.handlers,
+            self.stats,
+            self.overflow,
+            batch_size=settings.LOG_BATCH_SIZE,
+            flush_interval=settings.LOG_FLUSH_INTERVAL,
+        )
+        listener.start()
+        return listener
+
+    def restart_after_fork(self) -> None:
+        # 子进程中没有监听线程，父进程的队列状态也不可信，换用新队列重新启动
+        self.overflow.clear()
+        log_queue: queue.Queue[Any] = queue.Queue(maxsize=settings.LOG_QUEUE_SIZE)
+        self.queue = log_queue
+        self.root_queue_handler.queue = log_queue
+        self.request_queue_handler.queue = log_queue
+        self.listener = self._start_listener(log_queue)
+
+    def shutdown(self) -> None:
+        if self.listener is not None:
+            self.listener.stop()
+            self.listener = None
+
+        # 关闭后仍可能有日志（如服务器退出信息），改为同步直接写入目标处理器
+        for logger_name, queue_handler, targets in (
+            (None, self.root_queue_handler, self.root_targets),
+            ("http_request", self.request_queue_handler, self.request_targets),
+        ):
+            target_logger = logging.getLogger(logger_name)
+            if queue_handler in target_logger.handlers:
+                target_logger.removeHandler(queue_handler)
+                for handler in targets:
+                    if isinstance(handler, DeferredFlushMixin):
+                        handler.deferred = False
+                    target_logger.addHandler(handler)
+
+
+_pipeline: LoggingPipeline | None = None
+_maintenance: LogMaintenance | None = None
+
+
+def _restart_pipeline_after_fork() -> None:
+    if _pipeline is not None:
+        _pipeline.restart_after_fork()
+    if _maintenance is not None:
+        _maintenance.start()
+
+
+def shutdown_logging() -> None:
+    """停止日志监听线程并写完队列中剩余的记录"""
+    global _pipeline, _maintenance
+    if _maintenance is not None:
+        _maintenance.stop()
+        _maintenance = None
+    if _pipeline is not None:
+        _pipeline.shutdown()
+        _pipeline = None
+
+
+def get_logging_stats() -> dict[str, Any]:
+    """获取日志队列统计"""
+    if _pipeline is None:
+        return {"total_dropped": 0, "dropped_by_level": {}, "pending": 0}
+    stats = _pipeline.stats.snapshot()
+    stats["pending"] = _pipeline.queue.qsize()
+    return stats
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_restart_pipeline_after_fork)
+atexit.register(shutdown_logging)
+
+
+@dataclass(frozen=True)
+class SamplingConfig:
+    """请求日志采样配置（不可变，运行时整体替换）"""
+
+    sample_rate: float = 1.0
+    status_class_rates: dict[str, float] = field(default_factory=dict)
+    route_rates: dict[str, float] = field(default_factory=dict)
+    slow_threshold_ms: float = 1000.0
+    log_request_start: bool = True
+
+
+class RequestLogSampler:
+    """
+    请求日志采样器
+
+    成功请求按路由模板和状态码类别（2xx/3xx/4xx）采样，取两者中较低的采样率；
+    5xx、未处理异常和慢请求始终保留。被采样丢弃的记录按状态码类别计数。
+    每个请求只抽取一次随机数，开始记录与完成记录的采样结果保持一致：
+    开始时状态码未知，只按路由采样率判断，按采样率保留的完成记录，其开始记录一定也被保留。
+
+    configure() 可能在线程池或失效总线线程中调用，配置以不可变对象整体替换，
+    读取方每次只取一次引用，不会看到更新到一半的配置。
+    """
+
+    def __init__(
+        self,
+        sample_rate: float = 1.0,
+        status_class_rates: dict[str, float] | None = None,
+        route_rates: dict[str, float] | None = None,
+        slow_threshold_ms: float = 1000.0,
+        log_request_start: bool = True,
+    ):
+        self.config = SamplingConfig(
+            sample_rate=sample_rate,
+            status_class_rates=dict(status_class_rates or {}),
+            route_rates=dict(route_rates or {}),
+            slow_threshold_ms=slow_threshold_ms,
+            log_request_start=log_request_start,
+        )
+        self._configure_lock = threading.Lock()
+        # 计数只在事件循环线程中（请求中间件内）更新
+        self.kept = 0
+        self.sampled_out: dict[str, int] = {}
+
+    @staticmethod
+    def draw() -> float:
+        return random.random()
+
+    @property
+    def needs_route(self) -> bool:
+        """开始记录是否需要路由模板（配置了按路由采样率时）"""
+        config = self.config
+        return config.log_request_start and bool(config.route_rates)
+
+    def keep_start(self, draw: float, route: str | None = None) -> bool:
+        config = self.config
+        if not config.log_request_start:
+            return False
+        rate = config.route_rates.get(route, config.sample_rate) if route is not None else config.sample_rate
+        if draw < rate:
+            return True
+        self.sampled_out["start"] = self.sampled_out.get("start", 0) + 1
+        return False
+
+    def keep_completion(self, draw: float, route: str, status_code: int, response_time: float) -> bool:
+        config = self.config
+        if status_code >= 500 or response_time * 1000 >= config.slow_threshold_ms:
+            self.kept += 1
+            return True
+
+        status_class = f"{status_code // 100}xx"
+        rate = config.route_rates.get(route, config.sample_rate)
+        class_rate = config.status_class_rates.get(status_class)
+        if class_rate is not None and class_rate < rate:
+            rate = class_rate
+
+        if draw < rate:
+            self.kept += 1
+            return True
+        self.sampled_out[status_class] = self.sampled_out.get(status_class, 0) + 1
+        return False
+
+    def configure(self, **options: Any) -> None:
+        """运行时更新采样配置，未提供的选项保持不变"""
+        changes: dict[str, Any] = {
+            name: dict(value) if isinstance(value, dict) else value
+            for name, value in options.items()
+            if name in SamplingConfig.__dataclass_fields__ and value is not None
+        }
+        with self._configure_lock:
+            self.config = replace(self.config, **changes)
+
+    def snapshot(self) -> dict[str, Any]:
+        config = self.config
+        return {
+            "sample_rate": config.sample_rate,
+            "status_class_rates": dict(config.status_class_rates),
+            "route_rates": dict(config.route_rates),
+            "slow_threshold_ms": config.slow_threshold_ms,
+            "log_request_start": config.log_request_start,
+            "kept": self.kept,
+            "sampled_out": dict(self.sampled_out),
+            "total_sampled_out": sum(self.sampled_out.values()),
         }
 
-        return json.dumps(log_entry, ensure_ascii=False)
+
+request_log_sampler = RequestLogSampler(
+    sample_rate=settings.LOG_REQUEST_SAMPLE_RATE,
+    status_class_rates=settings.LOG_REQUEST_STATUS_SAMPLE_RATES,
+    route_rates=settings.LOG_REQUEST_ROUTE_SAMPLE_RATES,
+    slow_threshold_ms=settings.LOG_SLOW_REQUEST_MS,
+    log_request_start=settings.LOG_REQUEST_START,
+)
+
+
+def get_log_levels(names: list[str] | None = None) -> dict[str, str]:
+    """获取日志器级别，默认返回根日志器和已配置级别的日志器"""
+    if names is None:
+        names = sorted(
+            name for name, item in logging.root.manager.loggerDict.items()
+            if isinstance(item, logging.Logger) and item.level != logging.NOTSET
+        )
+        names.insert(0, "root")
+    return {
+        name: logging.getLevelName(logging.getLogger(None if name == "root" else name).getEffectiveLevel())
+        for name in names
+    }
+
+
+def set_log_levels(levels: dict[str, str]) -> None:
+    """运行时调整日志级别，级别名称无效时抛出 ValueError"""
+    resolved: dict[str, int] = {}
+    for name, level in levels.items():
+        value = logging.getLevelName(level.upper())
+        if not isinstance(value, int):
+            raise ValueError(f"无效的日志级别: {level}")
+        resolved[name] = value
+    for name, value in resolved.items():
+        logging.getLogger(None if name == "root" else name).setLevel(value)
 
 
 def setup_logging() -> logging.Logger:
@@ -56,16 +654,21 @@ def setup_logging() -> logging.Logger:
     log_dir = Path("logs")
     log_dir.mkdir(exist_ok=True)
 
+    # 不需要源码位置时，关闭 logging 在每条记录上的调用栈查找
+    if not settings.LOG_INCLUDE_LOCATION:
+        logging._srcfile = None
+
     # 配置根日志器
     root_logger = logging.getLogger()
     root_logger.setLevel(logging.INFO)
 
     # 清除现有的处理器
+    shutdown_logging()
     for handler in root_logger.handlers[:]:
         root_logger.removeHandler(handler)
 
     # 控制台处理器 - 用于开发环境
-    console_handler = logging.StreamHandler(sys.stdout)
+    console_handler = BatchStreamHandler(sys.stdout)
     console_handler.setLevel(logging.INFO)
     console_formatter = logging.Formatter(
         '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
@@ -73,40 +676,63 @@ def setup_logging() -> logging.Logger:
     console_handler.setFormatter(console_formatter)
 
     # 文件处理器 - JSON格式，用于生产环境
-    file_handler = logging.FileHandler(
+    file_handler = BatchFileHandler(
         log_dir / "app.log",
-        encoding='utf-8'
+        max_bytes=settings.LOG_MAX_BYTES,
+        rotate_interval=settings.LOG_ROTATE_INTERVAL,
+        encoding='utf-8',
+        delay=True,  # 首次写入时才打开文件
     )
     file_handler.setLevel(logging.INFO)
-    json_formatter = JSONFormatter()
+    json_formatter = JSONFormatter(
+        include_location=settings.LOG_INCLUDE_LOCATION,
+        compact=settings.LOG_JSON_COMPACT,
+    )
     file_handler.setFormatter(json_formatter)
 
     # 请求日志处理器
-    request_handler = logging.FileHandler(
+    request_handler = BatchFileHandler(
         log_dir / "requests.log",
-        encoding='utf-8'
+        max_bytes=settings.LOG_MAX_BYTES,
+        rotate_interval=settings.LOG_ROTATE_INTERVAL,
+        encoding='utf-8',
+        delay=True,  # 首次写入时才打开文件
     )
     request_handler.setLevel(logging.INFO)
-    request_formatter = RequestResponseFormatter()
+    request_formatter = RequestResponseFormatter(compact=settings.LOG_JSON_COMPACT)
     request_handler.setFormatter(request_formatter)
 
     # 错误日志处理器
-    error_handler = logging.FileHandler(
+    error_handler = BatchFileHandler(
         log_dir / "errors.log",
-        encoding='utf-8'
+        max_bytes=settings.LOG_MAX_BYTES,
+        rotate_interval=settings.LOG_ROTATE_INTERVAL,
+        encoding='utf-8',
+        delay=True,  # 首次写入时才打开文件
     )
     error_handler.setLevel(logging.ERROR)
     error_handler.setFormatter(json_formatter)
 
-    # 添加处理器
-    root_logger.addHandler(console_handler)
-    root_logger.addHandler(file_handler)
-    root_logger.addHandler(error_handler)
+    # 所有处理器都放到有界队列之后，由后台线程批量写入，请求路径上不做磁盘IO
+    global _pipeline, _maintenance
+    _pipeline = LoggingPipeline(
+        root_targets=[console_handler, file_handler, error_handler],
+        request_targets=[request_handler],
+    )
+    root_logger.addHandler(_pipeline.root_queue_handler)
+
+    # 已轮转文件的压缩和清理在独立后台线程中进行
+    _maintenance = create_log_maintenance(
+        log_dir, ["app.log", "requests.log", "errors.log", Path(settings.TRACING_EXPORT_PATH).name]
+    )
+    _maintenance.start()
 
     # 为http_request日志器添加专门的请求日志处理器
     http_request_logger = logging.getLogger("http_request")
     http_request_logger.setLevel(logging.INFO)
-    http_request_logger.addHandler(request_handler)
+    for handler in http_request_logger.handlers[:]:
+        http_request_logger.removeHandler(handler)
+    http_request_logger.addHandler(_pipeline.request_queue_handler)
     http_request_logger.propagate = False  # 防止重复记录
 
     # 设置特定模块的日志级别
@@ -0,0 +1,141 @@
+"""
+事件循环阻塞检测
+
+心跳任务按固定间隔 sleep，实际唤醒时间与预期时间之差即事件循环延迟，记录到
+``event_loop_lag_seconds`` 直方图。辅助线程检查心跳是否按时更新：超过阈值仍未
+更新时说明事件循环线程被同步代码阻塞，此时从辅助线程抓取事件循环线程的调用栈，
+输出一条包含阻塞位置（栈顶帧及最内层应用代码帧）的结构化警告，每次阻塞只报告一次。
+
+通过 LOOP_MONITOR_ENABLED 开启；未阻塞时辅助线程每个检查周期只读取一个时间戳。
+"""
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+from typing import Any
+
+from app.core.config import settings
+from app.core.metrics import registry
+
+logger = logging.getLogger("loop_monitor")
+
+event_loop_lag_seconds = registry.histogram(
+    "event_loop_lag_seconds", "事件循环调度延迟（秒）",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+)
+event_loop_blocked_total = registry.counter(
+    "event_loop_blocked_total", "检测到事件循环被阻塞超过阈值的次数"
+)
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class LoopMonitor:
+    """事件循环心跳 + 阻塞检测线程"""
+
+    def __init__(self, interval: float, threshold: float, max_stack_depth: int = 30) -> None:
+        self.interval = interval
+        self.threshold = threshold
+        self.max_stack_depth = max_stack_depth
+        self.blocked_count = 0
+        self.max_lag = 0.0
+        self._last_beat = 0.0
+        self._loop_thread_id: int | None = None
+        self._task: asyncio.Task[None] | None = None
+        self._thread: threading.Thread | None = None
+        self._stop = threading.Event()
+
+    def start(self) -> None:
+        """在事件循环线程中启动（需在 fork 之后调用）"""
+        if self._task is not None:
+            return
+        loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._last_beat = time.monotonic()
+        self._stop.clear()
+        self._task = loop.create_task(self._heartbeat())
+        self._thread = threading.Thread(target=self._watch, name="loop-monitor", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+
+    async def _heartbeat(self) -> None:
+        while True:
+            expected = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            lag = max(0.0, now - expected)
+            self._last_beat = now
+            event_loop_lag_seconds.observe(lag)
+            if lag > self.max_lag:
+                self.max_lag = lag
+
+    def _watch(self) -> None:
+        reported_beat = 0.0
+        check_interval = min(self.interval, self.threshold) / 2
+        while not self._stop.wait(check_interval):
+            last_beat = self._last_beat
+            stalled = time.monotonic() - last_beat - self.interval
+            if stalled < self.threshold or last_beat == reported_beat:
+                continue
+            # 同一次阻塞只报告一次，直到心跳恢复
+            reported_beat = last_beat
+            self._report(stalled)
+
+    def _report(self, stalled: float) -> None:
+        frame = sys._current_frames().get(self._loop_thread_id) if self._loop_thread_id else None
+        if frame is None:
+            return
+        stack = traceback.extract_stack(frame, limit=self.max_stack_depth)
+        offending = stack[-1]
+        app_frame = _innermost_app_frame(stack)
+        self.blocked_count += 1
+        event_loop_blocked_total.inc()
+        logger.warning(
+            f"事件循环被阻塞 {stalled * 1000:.0f}ms，阻塞位置: "
+            f"{offending.filename}:{offending.lineno} {offending.name}",
+            extra={
+                "extra_fields": {
+                    "event": "event_loop_blocked",
+                    "blocked_ms": round(stalled * 1000, 1),
+                    "threshold_ms": round(self.threshold * 1000, 1),
+                    "frame": _frame_dict(offending),
+                    "app_frame": _frame_dict(app_frame) if app_frame is not None else None,
+                    "stack": traceback.format_list(stack),
+                }
+            },
+        )
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "running": self._task is not None,
+            "interval_ms": self.interval * 1000,
+            "threshold_ms": self.threshold * 1000,
+            "blocked_count": self.blocked_count,
+            "max_lag_ms": round(self.max_lag * 1000, 3),
+        }
+
+
+def _innermost_app_frame(stack: traceback.StackSummary) -> traceback.FrameSummary | None:
+    """最内层的应用代码帧（阻塞发生在第三方库中时，用于定位调用方）"""
+    for frame in reversed(stack):
+        if frame.filename.startswith(APP_DIR):
+            return frame
+    return None
+
+
+def _frame_dict(frame: traceback.FrameSummary) -> dict[str, Any]:
+    return {"file": frame.filename, "line": frame.lineno, "function": frame.name, "code": frame.line}
+
+
+loop_monitor = LoopMonitor(settings.LOOP_MONITOR_INTERVAL, settings.LOOP_MONITOR_THRESHOLD)
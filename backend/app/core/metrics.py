@@ -0,0 +1,418 @@
+"""
+进程内指标注册表（Prometheus 文本格式）
+
+提供计数器、仪表盘和固定分桶直方图，写入路径只有一次字典查找和一次加锁累加。
+
+多 worker 部署时（启动器设置 METRICS_MULTIPROCESS_DIR），每个 worker 定期把自身
+快照原子写入 ``<目录>/<pid>.json``，抓取 /metrics 时先写入本进程的最新快照，再只从
+目录下的快照文件汇总: 计数器和直方图对所有进程（包括已退出的 worker）求和，仪表盘
+只统计存活进程。每个快照文件只会前进（按采集顺序写入，旧快照不会覆盖新快照），
+因此无论由哪个 worker 响应，先后两次抓取得到的计数器都不会减小。
+"""
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+from collections.abc import Callable, Iterable
+from pathlib import Path
+from typing import Any, TypeVar
+
+import anyio
+
+from app.core.config import settings
+
+logger = logging.getLogger("metrics")
+
+LabelValues = tuple[str, ...]
+MetricFunction = Callable[[], dict[LabelValues, float]]
+
+# 延迟分桶（秒），覆盖 1ms ~ 10s
+DEFAULT_BUCKETS: tuple[float, ...] = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+MetricT = TypeVar("MetricT", bound="_Metric")
+
+
+class _Metric:
+    type = ""
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Iterable[str] = (),
+        function: MetricFunction | None = None,
+    ) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._function = function
+        self._lock = threading.Lock()
+        self._values: dict[LabelValues, Any] = {}
+
+    def collect(self) -> dict[LabelValues, Any]:
+        if self._function is not None:
+            try:
+                return dict(self._function())
+            except Exception:
+                logger.exception(f"采集指标 {self.name} 失败")
+                return {}
+        with self._lock:
+            return {labels: _copy(value) for labels, value in self._values.items()}
+
+    def describe(self) -> dict[str, Any]:
+        return {"type": self.type, "help": self.documentation, "labelnames": list(self.labelnames)}
+
+
+def _copy(value: Any) -> Any:
+    return list(value) if isinstance(value, list) else value
+
+
+class Counter(_Metric):
+    """单调递增计数器"""
+
+    type = "counter"
+
+    def inc(self, amount: float = 1.0, labels: LabelValues = ()) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+
+class Gauge(_Metric):
+    """可增可减的瞬时值"""
+
+    type = "gauge"
+
+    def set(self, value: float, labels: LabelValues = ()) -> None:
+        with self._lock:
+            self._values[labels] = float(value)
+
+    def inc(self, amount: float = 1.0, labels: LabelValues = ()) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, labels: LabelValues = ()) -> None:
+        self.inc(-amount, labels)
+
+
+class Histogram(_Metric):
+    """
+    固定分桶直方图
+
+    每组标签保存 [各桶计数..., +Inf 桶计数, 总和]，桶计数为非累积值，渲染时再累加。
+    """
+
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Iterable[str] = (),
+        buckets: Iterable[float] = DEFAULT_BUCKETS,
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._width = len(self.buckets) + 2
+
+    def observe(self, value: float, labels: LabelValues = ()) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            data = self._values.get(labels)
+            if data is None:
+                data = self._values[labels] = [0] * self._width
+            data[index] += 1
+            data[-1] += value
+
+    def describe(self) -> dict[str, Any]:
+        description = super().describe()
+        description["buckets"] = list(self.buckets)
+        return description
+
+
+class MetricsRegistry:
+    """指标注册表"""
+
+    def __init__(self) -> None:
+        self._metrics: dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: MetricT) -> MetricT:
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"指标已注册: {metric.name}")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Iterable[str] = (),
+                function: MetricFunction | None = None) -> Counter:
+        return self.register(Counter(name, documentation, labelnames, function))
+
+    def gauge(self, name: str, documentation: str, labelnames: Iterable[str] = (),
+              function: MetricFunction | None = None) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames, function))
+
+    def histogram(self, name: str, documentation: str, labelnames: Iterable[str] = (),
+                  buckets: Iterable[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def snapshot(self) -> dict[str, Any]:
+        """可 JSON 序列化的当前进程快照"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        result: dict[str, Any] = {}
+        for metric in metrics:
+            entry = metric.describe()
+            entry["values"] = [[list(labels), value] for labels, value in metric.collect().items()]
+            result[metric.name] = entry
+        return result
+
+
+def merge_snapshots(snapshots: Iterable[tuple[dict[str, Any], bool]]) -> dict[str, Any]:
+    """
+    合并多个进程的快照
+
+    snapshots 为 (快照, 进程是否存活)；已退出进程的仪表盘数值被忽略。
+    """
+    merged: dict[str, Any] = {}
+    for snapshot, alive in snapshots:
+        for name, entry in snapshot.items():
+            kind = entry["type"]
+            if kind == "gauge" and not alive:
+                continue
+            target = merged.get(name)
+            if target is None:
+                target = merged[name] = {
+                    "type": kind,
+                    "help": entry["help"],
+                    "labelnames": entry["labelnames"],
+                    "buckets": entry.get("buckets"),
+                    "values": {},
+                }
+            elif target["type"] != kind or target["labelnames"] != entry["labelnames"]:
+                # 重新加载后指标定义可能变化，与已合并定义不一致的快照跳过
+                continue
+            values = target["values"]
+            for labels, value in entry["values"]:
+                key = tuple(labels)
+                if kind == "histogram":
+                    if entry.get("buckets") != target["buckets"]:
+                        continue
+                    current = values.get(key)
+                    if current is None:
+                        values[key] = list(value)
+                    else:
+                        for i, item in enumerate(value):
+                            current[i] += item
+                else:
+                    values[key] = values.get(key, 0.0) + value
+    return merged
+
+
+def _format_value(value: float) -> str:
+    if value != value:
+        return "NaN"
+    if value in (float("inf"), float("-inf")):
+        return "+Inf" if value > 0 else "-Inf"
+    if float(value).is_integer() and abs(value) < 1e15:
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Iterable[str], values: Iterable[str], extra: str = "") -> str:
+    parts = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values, strict=True)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def render_text(merged: dict[str, Any]) -> str:
+    """渲染为 Prometheus 文本格式（0.0.4）"""
+    lines: list[str] = []
+    for name in sorted(merged):
+        entry = merged[name]
+        kind = entry["type"]
+        labelnames = entry["labelnames"]
+        lines.append(f"# HELP {name} {_escape(entry['help'])}")
+        lines.append(f"# TYPE {name} {kind}")
+        for labels in sorted(entry["values"]):
+            value = entry["values"][labels]
+            if kind != "histogram":
+                lines.append(f"{name}{_format_labels(labelnames, labels)} {_format_value(value)}")
+                continue
+            cumulative = 0
+            bounds = [_format_value(b) for b in entry["buckets"]] + ["+Inf"]
+            for bound, count in zip(bounds, value[:-1], strict=True):
+                cumulative += count
+                le = f'le="{bound}"'
+                lines.append(f"{name}_bucket{_format_labels(labelnames, labels, le)} {_format_value(cumulative)}")
+            label_text = _format_labels(labelnames, labels)
+            lines.append(f"{name}_sum{label_text} {_format_value(value[-1])}")
+            lines.append(f"{name}_count{label_text} {_format_value(cumulative)}")
+    lines.append("")
+    return "\n".join(lines)
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class MultiProcessExporter:
+    """
+    多进程快照导出
+
+    directory 为空时退化为单进程模式：只渲染当前进程的指标，不写文件。
+    """
+
+    def __init__(self, registry: MetricsRegistry, directory: str | None, interval: float = 5.0) -> None:
+        self.registry = registry
+        self.directory = Path(directory) if directory else None
+        self.interval = interval
+        self._task: asyncio.Task[None] | None = None
+        # 快照按采集顺序编号，写入时丢弃比已写入快照更旧的（周期导出与抓取并发时）
+        self._sequence = 0
+        self._written_sequence = 0
+        self._write_lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.directory is not None
+
+    def _own_path(self) -> Path:
+        assert self.directory is not None
+        return self.directory / f"{os.getpid()}.json"
+
+    def take_snapshot(self) -> tuple[int, dict[str, Any]]:
+        """采集本进程快照（在事件循环线程中调用，线程池指标依赖当前事件循环）"""
+        self._sequence += 1
+        return self._sequence, self.registry.snapshot()
+
+    def write(self, snapshot: tuple[int, dict[str, Any]] | None = None) -> None:
+        if self.directory is None:
+            return
+        sequence, values = snapshot if snapshot is not None else self.take_snapshot()
+        path = self._own_path()
+        tmp_path = path.with_suffix(".tmp")
+        with self._write_lock:
+            if sequence <= self._written_sequence:
+                return
+            try:
+                tmp_path.write_text(json.dumps(values, separators=(",", ":")), encoding="utf-8")
+                os.replace(tmp_path, path)
+            except OSError:
+                logger.exception(f"写入指标快照失败: {path}")
+                return
+            self._written_sequence = sequence
+
+    def start(self) -> None:
+        """在事件循环中启动定期导出（需在 fork 之后调用）"""
+        if self.directory is None or self._task is not None:
+            return
+        self.directory.mkdir(parents=True, exist_ok=True)
+        # 同 pid 的旧文件来自已退出的进程（pid 复用），改名保留其累计值
+        path = self._own_path()
+        if path.exists():
+            os.replace(path, self.directory / f"archived-{os.getpid()}-{time.time_ns()}.json")
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            await anyio.to_thread.run_sync(self.write, self.take_snapshot())
+
+    def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        self.write()
+
+    def _read_all(self) -> list[tuple[dict[str, Any], bool]]:
+        assert self.directory is not None
+        result: list[tuple[dict[str, Any], bool]] = []
+        for path in self.directory.glob("*.json"):
+            stem = path.stem
+            alive = stem.isdigit() and _pid_alive(int(stem))
+            try:
+                result.append((json.loads(path.read_text(encoding="utf-8")), alive))
+            except (OSError, ValueError):
+                continue
+        return result
+
+    def _flush_and_read(self, snapshot: tuple[int, dict[str, Any]]) -> list[tuple[dict[str, Any], bool]]:
+        self.write(snapshot)
+        return self._read_all()
+
+    async def render(self) -> str:
+        if self.directory is None:
+            return render_text(merge_snapshots([(self.registry.snapshot(), True)]))
+        # 只从快照文件汇总：本进程也以刚写入的文件为准，与其他 worker 的数值来源一致
+        snapshots = await anyio.to_thread.run_sync(self._flush_and_read, self.take_snapshot())
+        return render_text(merge_snapshots(snapshots))
+
+
+def _threadpool_stats(field: str) -> MetricFunction:
+    def collect() -> dict[LabelValues, float]:
+        try:
+            statistics = anyio.to_thread.current_default_thread_limiter().statistics()
+        except RuntimeError:
+            # 不在事件循环线程中
+            return {}
+        return {(): float(getattr(statistics, field))}
+    return collect
+
+
+registry = MetricsRegistry()
+metrics_exporter = MultiProcessExporter(
+    registry, settings.METRICS_MULTIPROCESS_DIR, settings.METRICS_FLUSH_INTERVAL
+)
+
+# HTTP 请求（route 为路由模板，避免路径参数导致标签基数爆炸）
+http_requests_total = registry.counter(
+    "http_requests_total", "HTTP 请求总数", ("method", "route", "status")
+)
+http_request_duration_seconds = registry.histogram(
+    "http_request_duration_seconds", "HTTP 请求处理耗时（秒）", ("method", "route")
+)
+http_requests_in_progress = registry.gauge(
+    "http_requests_in_progress", "正在处理的 HTTP 请求数"
+)
+
+# 数据库
+db_query_duration_seconds = registry.histogram(
+    "db_query_duration_seconds", "SQL 语句执行耗时（秒）", ("operation",)
+)
+
+# 密码哈希（bcrypt，运行在线程池中）
+password_hash_duration_seconds = registry.histogram(
+    "password_hash_duration_seconds", "密码哈希/校验耗时（秒）", ("operation",),
+    buckets=(0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1.0, 2.0),
+)
+
+# 同步端点使用的 AnyIO 默认线程池
+registry.gauge(
+    "threadpool_tokens_borrowed", "线程池中正在执行的任务数",
+    function=_threadpool_stats("borrowed_tokens"),
+)
+registry.gauge(
+    "threadpool_tokens_total", "线程池容量", function=_threadpool_stats("total_tokens")
+)
+registry.gauge(
+    "threadpool_tasks_waiting", "等待线程池的任务数（队列深度）",
+    function=_threadpool_stats("tasks_waiting"),
+)
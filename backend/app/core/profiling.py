@@ -0,0 +1,462 @@
+"""
+性能剖析：按需单请求剖析 + 持续采样剖析
+
+按需单请求剖析
+
+管理员在请求上携带 ``X-Profile`` 头即可对这一个请求采样剖析:
+    X-Profile: 1          同时携带超级管理员的 Bearer 访问令牌
+    X-Profile: <令牌>      由 POST /api/v1/profiling/tokens 签发的剖析令牌（可用于登录等无需认证的接口）
+
+剖析期间由后台线程按固定间隔采样调用栈，只统计属于该请求的线程:
+事件循环线程（当前运行的任务是该请求的任务时）以及正在为该请求执行同步代码的线程池线程。
+结果以折叠栈格式（flamegraph.pl / speedscope 可直接读取）写入
+``logs/profiles/<request_id>.collapsed``。未携带该请求头的请求只多一次请求头比较。
+
+持续采样剖析
+后台线程以固定频率（默认 100Hz）采样所有非空闲线程的调用栈，按路由模板打标签，
+在内存中按分钟聚合为折叠栈（每分钟栈数量有上限），分钟结束后写入
+``logs/profiles/continuous/<分钟时间戳>-<pid>.collapsed``，管理员可下载最近 N 分钟
+所有 worker 的合并结果。采样间隔会根据实测采样耗时自动放大，使 CPU 占用不超过预算。
+"""
+import asyncio
+import contextvars
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from collections.abc import MutableMapping
+from pathlib import Path
+from types import CodeType, FrameType
+from typing import Any
+
+import anyio
+from sqlmodel import Session
+
+from app.core.config import settings
+from app.core.database import engine
+from app.core.security import verify_token
+from app.crud import get_user_by_username
+
+logger = logging.getLogger("profiling")
+
+PROFILE_HEADER = b"x-profile"
+PROFILE_FILE_SUFFIX = ".collapsed"
+
+profile_session_var: contextvars.ContextVar["RequestProfiler | None"] = contextvars.ContextVar(
+    "profile_session", default=None
+)
+
+# 当前请求的 ASGI scope，用于在线程池线程中取得路由模板
+request_scope_var: contextvars.ContextVar[MutableMapping[str, Any] | None] = contextvars.ContextVar(
+    "request_scope", default=None
+)
+
+_SHORT_PATH_PREFIXES = sorted(
+    {p for p in sys.path if p and os.path.isdir(p)} | {os.getcwd()}, key=len, reverse=True
+)
+_code_labels: dict[CodeType, str] = {}
+
+# 线程阻塞等待时的栈顶函数 (文件名, 函数名)，这类样本不计入持续剖析
+IDLE_LEAF_FUNCTIONS = frozenset({
+    ("threading.py", "wait"),
+    ("threading.py", "_wait_for_tstate_lock"),
+    ("queue.py", "get"),
+    ("selectors.py", "select"),
+})
+
+
+def get_profile_dir() -> Path:
+    return Path(settings.PROFILE_DIR)
+
+
+def _code_label(code: CodeType) -> str:
+    label = _code_labels.get(code)
+    if label is None:
+        filename = code.co_filename
+        for prefix in _SHORT_PATH_PREFIXES:
+            if filename.startswith(prefix + os.sep):
+                filename = filename[len(prefix) + 1:]
+                break
+        label = _code_labels[code] = f"{code.co_name} ({filename}:{code.co_firstlineno})"
+    return label
+
+
+def _collapse(root: str, frame: FrameType | None) -> str:
+    labels: list[str] = []
+    while frame is not None:
+        labels.append(_code_label(frame.f_code))
+        frame = frame.f_back
+    labels.append(root)
+    labels.reverse()
+    return ";".join(labels)
+
+
+def _read_collapsed(path: Path, stacks: Counter[str]) -> None:
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            stack, _, count = line.rstrip("\n").rpartition(" ")
+            if stack and count.isdigit():
+                stacks[stack] += int(count)
+
+
+def _write_collapsed(path: Path, stacks: Counter[str]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(".tmp")
+    lines = [f"{stack} {count}" for stack, count in stacks.most_common()]
+    tmp_path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    os.replace(tmp_path, path)
+
+
+def _thread_context(frame: FrameType | None) -> contextvars.Context | None:
+    """
+    返回线程池线程当前执行任务所在的 context
+
+    AnyIO 的 worker 线程在 ``run`` 方法中以 ``context.run(func)`` 执行任务，
+    该 context 复制自提交任务的请求，因此可以读取请求设置的上下文变量。
+    """
+    while frame is not None:
+        if frame.f_code.co_name == "run":
+            context = frame.f_locals.get("context")
+            if isinstance(context, contextvars.Context):
+                return context
+        frame = frame.f_back
+    return None
+
+
+class RequestProfiler:
+    """单个请求的采样剖析器，必须在该请求的任务中创建"""
+
+    def __init__(self, request_id: str, interval: float) -> None:
+        self.request_id = request_id
+        self.interval = interval
+        self.loop = asyncio.get_running_loop()
+        self.task = asyncio.current_task()
+        self.loop_thread_id = threading.get_ident()
+        self.stacks: Counter[str] = Counter()
+        self.samples = 0
+        self.started_at = 0.0
+        self.duration = 0.0
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        self.started_at = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name=f"profiler-{self.request_id[:8]}", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.duration = time.perf_counter() - self.started_at
+
+    def _run(self) -> None:
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            self.samples += 1
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                if thread_id == self.loop_thread_id:
+                    if asyncio.current_task(self.loop) is not self.task:
+                        continue
+                    root = "event-loop"
+                elif self._owns_thread(frame):
+                    root = "threadpool"
+                else:
+                    continue
+                self.stacks[_collapse(root, frame)] += 1
+
+    def _owns_thread(self, frame: FrameType | None) -> bool:
+        """判断线程池线程是否在为本请求执行代码"""
+        context = _thread_context(frame)
+        return context is not None and context.get(profile_session_var) is self
+
+    def write(self, directory: Path) -> Path:
+        path = directory / f"{self.request_id}{PROFILE_FILE_SUFFIX}"
+        _write_collapsed(path, self.stacks)
+        return path
+
+
+def _is_superuser_token(authorization: str) -> bool:
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return False
+    payload = verify_token(token)
+    if payload is None or payload.get("sub") is None:
+        return False
+    with Session(engine) as session:
+        user = get_user_by_username(session, username=str(payload["sub"]))
+        return user is not None and user.is_active and user.is_superuser
+
+
+async def authorize_profile(header_value: str, authorization: str) -> bool:
+    """校验剖析请求: ``1`` + 超级管理员访问令牌，或有效的剖析令牌"""
+    if header_value == "1":
+        if not authorization:
+            return False
+        return await anyio.to_thread.run_sync(_is_superuser_token, authorization)
+    return verify_token(header_value, expected_type="profile") is not None
+
+
+async def start_request_profile(request_id: str, header_value: str, authorization: str) -> RequestProfiler | None:
+    """校验通过时开始剖析当前请求，否则返回 None（请求照常处理）"""
+    if not settings.PROFILING_ENABLED:
+        return None
+    if not await authorize_profile(header_value, authorization):
+        logger.warning(f"拒绝未授权的剖析请求 [{request_id}]")
+        return None
+    profiler = RequestProfiler(request_id, settings.PROFILE_SAMPLE_INTERVAL)
+    profile_session_var.set(profiler)
+    profiler.start()
+    return profiler
+
+
+async def finish_request_profile(profiler: RequestProfiler) -> None:
+    profiler.stop()
+    profile_session_var.set(None)
+    try:
+        path = await anyio.to_thread.run_sync(profiler.write, get_profile_dir())
+    except OSError:
+        logger.exception(f"写入剖析结果失败 [{profiler.request_id}]")
+        return
+    logger.info(
+        f"请求剖析完成 [{profiler.request_id}]: {profiler.samples} 次采样，"
+        f"{profiler.duration * 1000:.1f}ms，写入 {path}"
+    )
+
+
+class ContinuousProfiler:
+    """
+    持续采样剖析器
+
+    每个样本的根节点为路由模板（非请求线程为 ``<background>``），其次是线程角色
+    （event-loop / threadpool / 线程名），之后是从外到内的调用栈。
+    """
+
+    BUCKET_SECONDS = 60
+    TRUNCATED_FRAME = "[truncated]"
+    BACKGROUND_ROUTE = "<background>"
+
+    def __init__(
+        self,
+        hz: float,
+        cpu_budget: float,
+        max_stacks: int,
+        retention_minutes: int,
+        directory: Path,
+    ) -> None:
+        self.base_interval = 1.0 / hz
+        self.interval = self.base_interval
+        self.cpu_budget = cpu_budget
+        self.max_stacks = max_stacks
+        self.retention_minutes = retention_minutes
+        self.directory = directory
+        self.samples = 0
+        self.truncated = 0
+        self.cpu_seconds = 0.0
+        self._started_at = 0.0
+        self._bucket_start = 0
+        self._bucket: Counter[str] = Counter()
+        self._lock = threading.Lock()
+        self._active_scopes: dict[asyncio.Task[Any], MutableMapping[str, Any]] = {}
+        self._stack_cache: dict[tuple[Any, ...], str] = {}
+        self._idle_codes: dict[CodeType, bool] = {}
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._loop_thread_id: int | None = None
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None
+
+    def start(self) -> None:
+        """在事件循环线程中启动（需在 fork 之后调用）"""
+        if self._thread is not None:
+            return
+        try:
+            self._loop = asyncio.get_running_loop()
+            self._loop_thread_id = threading.get_ident()
+        except RuntimeError:
+            self._loop = None
+        # 延迟导入：global_middleware 依赖本模块
+        from app.core.global_middleware import get_route_template
+
+        self._get_route_template = get_route_template
+        self._stop.clear()
+        self._started_at = time.monotonic()
+        self._bucket_start = self._current_bucket()
+        self._thread = threading.Thread(target=self._run, name="continuous-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+        self._flush_bucket()
+
+    def enter_request(self, scope: MutableMapping[str, Any]) -> asyncio.Task[Any] | None:
+        """登记当前请求，使事件循环线程和线程池线程的样本能标注路由"""
+        request_scope_var.set(scope)
+        task = asyncio.current_task()
+        if task is not None:
+            self._active_scopes[task] = scope
+        return task
+
+    def exit_request(self, task: asyncio.Task[Any]) -> None:
+        self._active_scopes.pop(task, None)
+
+    def _current_bucket(self) -> int:
+        return int(time.time()) // self.BUCKET_SECONDS * self.BUCKET_SECONDS
+
+    def _run(self) -> None:
+        own_id = threading.get_ident()
+        cost_average = 0.0
+        last_cpu = time.thread_time()
+        while not self._stop.wait(self.interval):
+            try:
+                self._sample(own_id)
+            except Exception:
+                logger.exception("持续剖析采样失败")
+            now_cpu = time.thread_time()
+            cost = now_cpu - last_cpu
+            last_cpu = now_cpu
+            self.cpu_seconds += cost
+            self.samples += 1
+            # 按平均采样耗时放大间隔，保证 CPU 占用不超过预算
+            cost_average = cost if self.samples == 1 else cost_average * 0.9 + cost * 0.1
+            self.interval = max(self.base_interval, cost_average / self.cpu_budget)
+            if self._current_bucket() != self._bucket_start:
+                self._flush_bucket()
+
+    def _scope_route(self, scope: MutableMapping[str, Any] | None) -> str:
+        if scope is None:
+            return self.BACKGROUND_ROUTE
+        return self._get_route_template(scope)
+
+    def _route_of(self, thread_id: int, frame: FrameType) -> tuple[str, str] | None:
+        """返回 (路由, 线程角色)，空闲线程返回 None"""
+        code = frame.f_code
+        idle = self._idle_codes.get(code)
+        if idle is None:
+            idle = self._idle_codes[code] = (
+                (os.path.basename(code.co_filename), code.co_name) in IDLE_LEAF_FUNCTIONS
+            )
+        if idle:
+            return None
+        if thread_id == self._loop_thread_id and self._loop is not None:
+            task = asyncio.current_task(self._loop)
+            scope = self._active_scopes.get(task) if task is not None else None
+            return self._scope_route(scope), "event-loop"
+        context = _thread_context(frame)
+        if context is not None:
+            return self._scope_route(context.get(request_scope_var)), "threadpool"
+        thread = threading._active.get(thread_id)  # type: ignore[attr-defined]
+        return self.BACKGROUND_ROUTE, thread.name if thread is not None else f"thread-{thread_id}"
+
+    def _stack_key(self, root: str, frame: FrameType | None) -> str:
+        """按 (根节点, 代码对象序列) 缓存折叠栈字符串，重复的栈无需重新拼接"""
+        codes: list[Any] = [root]
+        while frame is not None:
+            codes.append(frame.f_code)
+            frame = frame.f_back
+        key = tuple(codes)
+        stack = self._stack_cache.get(key)
+        if stack is None:
+            if len(self._stack_cache) >= self.max_stacks * 4:
+                self._stack_cache.clear()
+            labels = [_code_label(code) for code in reversed(codes[1:])]
+            stack = self._stack_cache[key] = ";".join([root, *labels])
+        return stack
+
+    def _sample(self, own_id: int) -> None:
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == own_id:
+                continue
+            tagged = self._route_of(thread_id, frame)
+            if tagged is None:
+                continue
+            route, role = tagged
+            stack = self._stack_key(f"{route};{role}", frame)
+            with self._lock:
+                if stack not in self._bucket and len(self._bucket) >= self.max_stacks:
+                    stack = f"{route};{role};{self.TRUNCATED_FRAME}"
+                    self.truncated += 1
+                self._bucket[stack] += 1
+
+    def _bucket_path(self, bucket_start: int, pid: int) -> Path:
+        return self.directory / f"{bucket_start}-{pid}{PROFILE_FILE_SUFFIX}"
+
+    def _flush_bucket(self) -> None:
+        with self._lock:
+            bucket, bucket_start = self._bucket, self._bucket_start
+            self._bucket = Counter()
+            self._bucket_start = self._current_bucket()
+        if bucket:
+            try:
+                _write_collapsed(self._bucket_path(bucket_start, os.getpid()), bucket)
+            except OSError:
+                logger.exception("写入持续剖析结果失败")
+        self._prune()
+
+    def _bucket_files(self) -> list[tuple[int, Path]]:
+        if not self.directory.is_dir():
+            return []
+        files = []
+        for path in self.directory.glob(f"*{PROFILE_FILE_SUFFIX}"):
+            bucket_start, _, _ = path.stem.partition("-")
+            if bucket_start.isdigit():
+                files.append((int(bucket_start), path))
+        return files
+
+    def _prune(self) -> None:
+        cutoff = time.time() - self.retention_minutes * 60
+        for bucket_start, path in self._bucket_files():
+            if bucket_start < cutoff:
+                try:
+                    path.unlink()
+                except OSError:
+                    pass
+
+    def export(self, minutes: int) -> str:
+        """合并最近 N 分钟所有 worker 的折叠栈（当前 worker 包含尚未结束的这一分钟）"""
+        since = self._current_bucket() - (minutes - 1) * self.BUCKET_SECONDS
+        stacks: Counter[str] = Counter()
+        for bucket_start, path in self._bucket_files():
+            if bucket_start >= since:
+                try:
+                    _read_collapsed(path, stacks)
+                except OSError:
+                    continue
+        with self._lock:
+            stacks.update(self._bucket)
+        return "".join(f"{stack} {count}\n" for stack, count in stacks.most_common())
+
+    def stats(self) -> dict[str, Any]:
+        elapsed = time.monotonic() - self._started_at if self.running else 0.0
+        with self._lock:
+            bucket_stacks = len(self._bucket)
+        return {
+            "running": self.running,
+            "samples": self.samples,
+            "interval_ms": round(self.interval * 1000, 3),
+            "cpu_seconds": round(self.cpu_seconds, 4),
+            "cpu_ratio": round(self.cpu_seconds / elapsed, 5) if elapsed else 0.0,
+            "cpu_budget": self.cpu_budget,
+            "bucket_stacks": bucket_stacks,
+            "truncated": self.truncated,
+        }
+
+
+continuous_profiler = ContinuousProfiler(
+    hz=settings.CONTINUOUS_PROFILE_HZ,
+    cpu_budget=settings.CONTINUOUS_PROFILE_CPU_BUDGET,
+    max_stacks=settings.CONTINUOUS_PROFILE_MAX_STACKS,
+    retention_minutes=settings.CONTINUOUS_PROFILE_RETENTION_MINUTES,
+    directory=get_profile_dir() / "continuous",
+)
@@ -0,0 +1,240 @@
+"""
+请求限流
+
+按路由配置三类令牌桶：客户端 IP、用户名、全局。令牌桶使用 GCRA（通用信元速率
+算法）实现，每个桶只需保存一个"理论到达时间"浮点数：
+    emission = period / limit            # 每个令牌的补充间隔
+    tat' = max(tat, now) + emission
+    tat' - now <= period 时放行并保存 tat'，否则拒绝，Retry-After = tat' - now - period
+等价于容量为 limit、每 period 秒补满的令牌桶。
+
+存储:
+    memory  进程内 LRU 字典（超过上限时淘汰最久未访问的桶）
+    sqlite  本地 SQLite 表，单条 UPSERT ... RETURNING 完成检查和扣减，多 worker 共享
+
+限流检查发生在认证接口查询数据库和 bcrypt 校验之前，被拒绝的请求返回 429 和 Retry-After。
+"""
+import logging
+import math
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any
+
+from app.core.config import settings
+from app.core.metrics import registry
+
+logger = logging.getLogger("rate_limit")
+
+rate_limit_rejections_total = registry.counter(
+    "rate_limit_rejections_total", "被限流拒绝的请求数", ("route", "scope")
+)
+
+SCOPE_IP = "ip"
+SCOPE_USERNAME = "username"
+SCOPE_GLOBAL = "global"
+SCOPES = (SCOPE_IP, SCOPE_USERNAME, SCOPE_GLOBAL)
+
+PERIOD_UNITS = {"s": 1, "second": 1, "m": 60, "minute": 60, "h": 3600, "hour": 3600}
+RATE_PATTERN = re.compile(r"^\s*(\d+)\s*/\s*(\d*\.?\d*)\s*([a-z]*)\s*$")
+
+
+class Rate:
+    """限流速率：period 秒内最多 limit 次（允许一次性突发 limit 次）"""
+
+    __slots__ = ("limit", "period", "emission")
+
+    def __init__(self, limit: int, period: float) -> None:
+        if limit <= 0 or period <= 0:
+            raise ValueError("limit 和 period 必须大于 0")
+        self.limit = limit
+        self.period = period
+        self.emission = period / limit
+
+    @classmethod
+    def parse(cls, value: str) -> "Rate":
+        """解析 "5/minute"、"100/s"、"20/60"（20 次 / 60 秒）"""
+        match = RATE_PATTERN.match(value.lower())
+        if not match:
+            raise ValueError(f"无效的限流配置: {value}")
+        limit, amount, unit = match.groups()
+        if unit and unit not in PERIOD_UNITS:
+            raise ValueError(f"无效的限流时间单位: {value}")
+        period = (float(amount) if amount else 1.0) * PERIOD_UNITS.get(unit, 1)
+        return cls(int(limit), period)
+
+    def __repr__(self) -> str:
+        return f"{self.limit}/{self.period:g}s"
+
+
+class MemoryRateLimitStore:
+    """进程内存储：键 -> 理论到达时间，按 LRU 淘汰"""
+
+    blocking = False
+
+    def __init__(self, max_keys: int) -> None:
+        self.max_keys = max_keys
+        self._buckets: OrderedDict[str, float] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def hit(self, key: str, rate: Rate, now: float) -> float:
+        """放行返回 0，拒绝返回需要等待的秒数"""
+        with self._lock:
+            tat = self._buckets.get(key, now)
+            new_tat = max(tat, now) + rate.emission
+            if new_tat - now > rate.period:
+                return new_tat - now - rate.period
+            self._buckets[key] = new_tat
+            self._buckets.move_to_end(key)
+            if len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+            return 0.0
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS rate_limits (
+    key TEXT PRIMARY KEY,
+    tat REAL NOT NULL
+) WITHOUT ROWID
+"""
+
+_HIT_SQL = """
+INSERT INTO rate_limits (key, tat) VALUES (:key, :now + :emission)
+ON CONFLICT (key) DO UPDATE SET tat = max(tat, :now) + :emission
+WHERE max(tat, :now) + :emission - :now <= :period
+RETURNING tat
+"""
+
+
+class SQLiteRateLimitStore:
+    """多 worker 共享存储（本地 SQLite，WAL 模式）"""
+
+    blocking = True
+
+    def __init__(self, path: str | Path, prune_every: int = 1000) -> None:
+        self.path = Path(path)
+        self.prune_every = prune_every
+        self._local = threading.local()
+        self._hits = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        # 每个线程持有独立连接；fork 后按 pid 重新建立
+        conn: sqlite3.Connection | None = getattr(self._local, "conn", None)
+        if conn is None or getattr(self._local, "pid", None) != os.getpid():
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(_SCHEMA)
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def hit(self, key: str, rate: Rate, now: float) -> float:
+        conn = self._connect()
+        row = conn.execute(
+            _HIT_SQL, {"key": key, "now": now, "emission": rate.emission, "period": rate.period}
+        ).fetchone()
+        self._hits += 1
+        if self._hits % self.prune_every == 0:
+            # 理论到达时间已过去的桶等价于满桶，可以删除
+            conn.execute("DELETE FROM rate_limits WHERE tat < ?", (now,))
+        if row is not None:
+            return 0.0
+        current = conn.execute("SELECT tat FROM rate_limits WHERE key = ?", (key,)).fetchone()
+        if current is None:
+            return 0.0
+        tat: float = max(current[0], now)
+        return tat + rate.emission - now - rate.period
+
+    def __len__(self) -> int:
+        return int(self._connect().execute("SELECT count(*) FROM rate_limits").fetchone()[0])
+
+
+class RateLimitExceeded(Exception):
+    def __init__(self, route: str, scope: str, retry_after: float) -> None:
+        super().__init__(f"{route} 超出 {scope} 限流")
+        self.route = route
+        self.scope = scope
+        self.retry_after = retry_after
+
+    @property
+    def retry_after_header(self) -> str:
+        return str(max(1, math.ceil(self.retry_after)))
+
+
+class RateLimiter:
+    """按路由模板配置的限流器"""
+
+    def __init__(
+        self,
+        rules: dict[str, dict[str, str]],
+        store: MemoryRateLimitStore | SQLiteRateLimitStore,
+        enabled: bool = True,
+    ) -> None:
+        self.enabled = enabled
+        self.store = store
+        self.rules: dict[str, dict[str, Rate]] = {}
+        for route, scopes in rules.items():
+            unknown = set(scopes) - set(SCOPES)
+            if unknown:
+                raise ValueError(f"路由 {route} 包含未知的限流维度: {sorted(unknown)}")
+            self.rules[route] = {scope: Rate.parse(value) for scope, value in scopes.items()}
+
+    @property
+    def blocking(self) -> bool:
+        return self.store.blocking
+
+    def has_rule(self, route: str, scope: str) -> bool:
+        return self.enabled and scope in self.rules.get(route, {})
+
+    def check(self, route: str, scope: str, identity: str = "") -> None:
+        """检查并扣减一个令牌，超出限制时抛出 RateLimitExceeded"""
+        if not self.enabled:
+            return
+        rate = self.rules.get(route, {}).get(scope)
+        if rate is None:
+            return
+        retry_after = self.store.hit(f"{route}|{scope}|{identity}", rate, time.time())
+        if retry_after > 0:
+            rate_limit_rejections_total.inc(1.0, (route, scope))
+            logger.warning(
+                f"请求被限流: {route} {scope}={identity or '*'}，{retry_after:.1f}s 后重试"
+            )
+            raise RateLimitExceeded(route, scope, retry_after)
+
+    def check_request(self, route: str, client_ip: str) -> None:
+        """请求级检查：先 IP 后全局，被 IP 限流的请求不消耗全局配额"""
+        self.check(route, SCOPE_IP, client_ip)
+        self.check(route, SCOPE_GLOBAL)
+
+
+def create_rate_limiter() -> RateLimiter:
+    store: MemoryRateLimitStore | SQLiteRateLimitStore
+    if settings.RATE_LIMIT_STORE == "sqlite":
+        store = SQLiteRateLimitStore(settings.RATE_LIMIT_SQLITE_PATH)
+    elif settings.RATE_LIMIT_STORE == "memory":
+        store = MemoryRateLimitStore(settings.RATE_LIMIT_MAX_KEYS)
+    else:
+        raise ValueError(f"无效的 RATE_LIMIT_STORE: {settings.RATE_LIMIT_STORE}")
+    return RateLimiter(settings.RATE_LIMIT_RULES, store, settings.RATE_LIMIT_ENABLED)
+
+
+rate_limiter = create_rate_limiter()
+
+
+def rate_limit_status(limiter: RateLimiter | None = None) -> dict[str, Any]:
+    limiter = limiter or rate_limiter
+    return {
+        "enabled": limiter.enabled,
+        "store": type(limiter.store).__name__,
+        "keys": len(limiter.store),
+        "rules": {route: {scope: repr(rate) for scope, rate in scopes.items()} for route, scopes in limiter.rules.items()},
+    }
@@ -0,0 +1,294 @@
+"""
+按标签失效的响应缓存
+
+管理后台反复发起相同的列表查询（用户列表、角色列表、角色成员、动态菜单），这里
+缓存这些 GET 端点序列化后的 JSON 响应体:
+    - 缓存键为 路由模板 + 规范化后的路径/查询参数 + 调用者的权限集合
+      （User.permission_key），权限相同的管理员共享同一份缓存
+    - 进程内 LRU，条目数有上限，每条带 TTL
+    - 每条缓存带标签（users、roles、role:{id}、user:{id}），写操作通过缓存失效
+      总线发布 user/role 变更，本进程和其他 worker 按标签删除相关条目
+
+RESPONSE_CACHE_ROUTES 按路由配置 TTL、标签和缓存键的调用者维度（vary）；应用启动前
+由 bind_response_cache 包装对应端点。只缓存正常返回的结果，抛出异常（403、404 等）
+的请求不写入缓存。
+
+未命中时通过 single-flight 合并相同键的并发请求，只执行一次端点；ttl 为 0 的路由
+（如按用户区分的 /users/me）只合并、不缓存。
+"""
+import functools
+import inspect
+import logging
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Hashable, Iterable
+from typing import Any
+
+from fastapi import FastAPI, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, Response
+from fastapi.routing import APIRoute, serialize_response
+from starlette.routing import request_response
+
+from app.core.config import settings
+from app.core.executors import RenderedJSONResponse
+from app.core.invalidation import invalidation_bus
+from app.core.metrics import registry
+from app.core.single_flight import SingleFlight, SingleFlightTimeout, single_flight
+from app.models import User
+
+logger = logging.getLogger("response_cache")
+
+response_cache_requests_total = registry.counter(
+    "response_cache_requests_total", "响应缓存查询次数", ("route", "result")
+)
+
+CACHE_HEADER = "X-Cache"
+
+VARY_PERMISSIONS = "permissions"
+VARY_USER = "user"
+
+# 失效总线主题 -> 需要删除的标签
+TOPIC_TAGS: dict[str, Callable[[str], tuple[str, ...]]] = {
+    "user": lambda key: ("users", f"user:{key}"),
+    # 用户列表中包含角色名称，角色变更同样使用户列表失效
+    "role": lambda key: ("roles", f"role:{key}", "users"),
+}
+
+
+class _Entry:
+    __slots__ = ("body", "expires_at", "tags")
+
+    def __init__(self, body: bytes, expires_at: float, tags: tuple[str, ...]) -> None:
+        self.body = body
+        self.expires_at = expires_at
+        self.tags = tags
+
+
+class ResponseCache:
+    """带 TTL 和标签索引的 LRU 缓存（线程安全）"""
+
+    def __init__(self, max_entries: int, enabled: bool = True) -> None:
+        self.max_entries = max_entries
+        self.enabled = enabled
+        self._entries: OrderedDict[Hashable, _Entry] = OrderedDict()
+        self._tags: dict[str, set[Hashable]] = {}
+        self._lock = threading.Lock()
+        # 每次失效递增；计算期间发生过失效的结果不写入缓存，避免写回旧数据
+        self.epoch = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, key: Hashable) -> bytes | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            if entry.expires_at <= time.monotonic():
+                self._remove(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry.body
+
+    def set(self, key: Hashable, body: bytes, ttl: float, tags: Iterable[str], epoch: int) -> bool:
+        """写入缓存；epoch 为开始计算时的 self.epoch，之后发生过失效则放弃写入"""
+        tags = tuple(tags)
+        with self._lock:
+            if epoch != self.epoch:
+                return False
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = _Entry(body, time.monotonic() + ttl, tags)
+            for tag in tags:
+                self._tags.setdefault(tag, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+            return True
+
+    def _remove(self, key: Hashable) -> None:
+        entry = self._entries.pop(key)
+        for tag in entry.tags:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+    def invalidate_tags(self, tags: Iterable[str]) -> int:
+        """删除带有任一标签的条目，返回删除条数"""
+        removed = 0
+        with self._lock:
+            self.epoch += 1
+            for tag in tags:
+                for key in list(self._tags.get(tag, ())):
+                    self._remove(key)
+                    removed += 1
+            self.invalidations += removed
+        return removed
+
+    def clear(self) -> None:
+        with self._lock:
+            self.epoch += 1
+            self._entries.clear()
+            self._tags.clear()
+
+    def stats(self) -> dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
+
+
+response_cache = ResponseCache(settings.RESPONSE_CACHE_MAX_ENTRIES, settings.RESPONSE_CACHE_ENABLED)
+
+
+def _on_invalidation(topic: str, key: str) -> None:
+    tags = TOPIC_TAGS.get(topic)
+    if tags is not None:
+        response_cache.invalidate_tags(tags(key))
+
+
+invalidation_bus.subscribe(_on_invalidation)
+
+
+def _identity_key(kwargs: dict[str, Any], vary: str) -> str:
+    """调用者标识：默认为权限集合（跨用户共享），vary=user 时为用户ID"""
+    for value in kwargs.values():
+        if isinstance(value, User):
+            return f"user:{value.id}" if vary == VARY_USER else value.permission_key()
+    return ""
+
+
+async def _render(route: APIRoute, raw: Any) -> bytes:
+    """按 FastAPI 的方式校验并序列化端点返回值（response_model、JSONResponse）"""
+    content = await serialize_response(
+        field=route.response_field,
+        response_content=raw,
+        include=route.response_model_include,
+        exclude=route.response_model_exclude,
+        by_alias=route.response_model_by_alias,
+        exclude_unset=route.response_model_exclude_unset,
+        exclude_defaults=route.response_model_exclude_defaults,
+        exclude_none=route.response_model_exclude_none,
+    )
+    return bytes(JSONResponse(content).body)
+
+
+def _wrap_endpoint(
+    route: APIRoute,
+    endpoint: Callable[..., Any],
+    ttl: float,
+    tags: list[str],
+    vary: str,
+    cache: ResponseCache,
+    flights: SingleFlight,
+) -> Callable[..., Any]:
+    template = route.path_format
+    params = tuple(
+        param.name for param in (*route.dependant.path_params, *route.dependant.query_params)
+    )
+    is_coroutine = inspect.iscoroutinefunction(endpoint)
+    caching = cache.enabled and ttl > 0
+    labels_hit, labels_miss = (template, "hit"), (template, "miss")
+    miss_headers = {CACHE_HEADER: "MISS"} if caching else None
+
+    def key_of(kwargs: dict[str, Any]) -> tuple[Any, ...]:
+        # 参数已由 FastAPI 解析为类型化的值，?skip=0 与省略 skip 得到相同的键
+        return (template, tuple(kwargs.get(name) for name in params), _identity_key(kwargs, vary))
+
+    async def compute(key: tuple[Any, ...], kwargs: dict[str, Any], epoch: int) -> bytes | Response:
+        if is_coroutine:
+            raw = await endpoint(**kwargs)
+        else:
+            raw = await run_in_threadpool(endpoint, **kwargs)
+        if isinstance(raw, RenderedJSONResponse):
+            # 绑定了执行器的端点已在执行器线程中完成校验和序列化
+            body = bytes(raw.body)
+        elif isinstance(raw, Response):
+            return raw
+        else:
+            body = await _render(route, raw)
+        if caching:
+            cache.set(key, body, ttl, [tag.format(**kwargs) for tag in tags], epoch)
+        return body
+
+    @functools.wraps(endpoint)
+    async def cached_endpoint(**kwargs: Any) -> Any:
+        key = key_of(kwargs)
+        if caching:
+            body = cache.get(key)
+            if body is not None:
+                response_cache_requests_total.inc(1.0, labels_hit)
+                return Response(body, media_type="application/json", headers={CACHE_HEADER: "HIT"})
+            response_cache_requests_total.inc(1.0, labels_miss)
+        epoch = cache.epoch
+        try:
+            # 相同键的并发未命中请求只计算一次；键中包含失效代数，
+            # 写操作之后的请求不会加入写之前开始的计算
+            result = await flights.do((key, epoch), lambda: compute(key, kwargs, epoch), template)
+        except SingleFlightTimeout:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="服务繁忙，请稍后再试",
+                headers={"Retry-After": "1"},
+            )
+        if isinstance(result, Response):
+            return result
+        return Response(result, media_type="application/json", headers=miss_headers)
+
+    return cached_endpoint
+
+
+def bind_response_cache(
+    app: FastAPI,
+    routes: dict[str, dict[str, Any]] | None = None,
+    cache: ResponseCache | None = None,
+) -> list[str]:
+    """
+    按 RESPONSE_CACHE_ROUTES（"GET 路由模板" -> {"ttl": 秒, "tags": [...], "vary": ...}）包装端点
+
+    需在 bind_route_executors 之后调用，使缓存命中直接在事件循环中返回，不占用执行器线程。
+    """
+    cache = cache or response_cache
+    config = settings.RESPONSE_CACHE_ROUTES if routes is None else routes
+    if not (cache.enabled or single_flight.enabled):
+        return []
+    bound: list[str] = []
+    for route in app.routes:
+        if not isinstance(route, APIRoute) or route.dependant.call is None:
+            continue
+        key = f"GET {route.path_format}"
+        if "GET" not in route.methods or key not in config:
+            continue
+        options = config[key]
+        wrapper = _wrap_endpoint(
+            route,
+            route.dependant.call,
+            float(options.get("ttl", settings.RESPONSE_CACHE_DEFAULT_TTL)),
+            list(options.get("tags", ())),
+            options.get("vary", VARY_PERMISSIONS),
+            cache,
+            single_flight,
+        )
+        route.endpoint = wrapper
+        route.dependant.call = wrapper
+        route.app = request_response(route.get_route_handler())
+        bound.append(key)
+    missing = set(config) - set(bound)
+    if missing:
+        logger.warning(f"响应缓存配置中的路由不存在: {sorted(missing)}")
+    return bound
@@ -0,0 +1,37 @@
+"""
+按路由模板查找配置值
+
+键为 "方法 路由模板" 或 "路由模板"，以 * 结尾表示前缀匹配（fnmatch 语法）。
+精确匹配优先（带方法的优先），其次按配置顺序取第一个匹配的前缀模式。
+路由数量有限，解析结果按 (方法, 路由模板) 常驻缓存。
+"""
+from fnmatch import fnmatchcase
+from typing import Generic, TypeVar
+
+T = TypeVar("T")
+
+
+class RouteTable(Generic[T]):
+    def __init__(self, mapping: dict[str, T], default: T) -> None:
+        self.default = default
+        self._exact = {key: value for key, value in mapping.items() if not key.endswith("*")}
+        self._patterns = [(key, value) for key, value in mapping.items() if key.endswith("*")]
+        self._resolved: dict[tuple[str, str], T] = {}
+
+    def lookup(self, method: str, route: str) -> T:
+        key = (method, route)
+        try:
+            return self._resolved[key]
+        except KeyError:
+            value = self._resolved[key] = self._resolve(method, route)
+            return value
+
+    def _resolve(self, method: str, route: str) -> T:
+        qualified = f"{method} {route}"
+        for candidate in (qualified, route):
+            if candidate in self._exact:
+                return self._exact[candidate]
+        for pattern, value in self._patterns:
+            if fnmatchcase(qualified, pattern) or fnmatchcase(route, pattern):
+                return value
+        return self.default
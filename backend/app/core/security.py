@@ -1,13 +1,25 @@
 import re
+import time
 from datetime import datetime, timedelta
-from typing import Any
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any
 
 import jwt
-from passlib.context import CryptContext
 
 from app.core.config import settings
+from app.core.metrics import password_hash_duration_seconds
+from app.core.tracing import trace_span
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+if TYPE_CHECKING:
+    from passlib.context import CryptContext  # type: ignore[import-untyped]
+
+
+@lru_cache(maxsize=1)
+def get_pwd_context() -> "CryptContext":
+    """首次使用时才加载 passlib 及 bcrypt 后端"""
+    from passlib.context import CryptContext
+
+    return CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 
 def create_access_token(subject: str | Any, expires_delta: timedelta | None = None) -> str:
@@ -29,6 +41,14 @@ def create_refresh_token(subject: str | Any) -> str:
     return encoded_jwt
 
 
+def create_profile_token(subject: str | Any) -> str:
+    """签发短期剖析令牌，携带在 X-Profile 请求头中"""
+    expire = datetime.utcnow() + timedelta(minutes=settings.PROFILE_TOKEN_EXPIRE_MINUTES)
+    to_encode = {"exp": expire, "sub": str(subject), "type": "profile"}
+    encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+    return encoded_jwt
+
+
 def verify_token(token: str, expected_type: str = "access") -> dict[str, Any] | None:
     try:
         payload: dict[str, Any] = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
@@ -40,11 +60,23 @@ def verify_token(token: str, expected_type: str = "access") -> dict[str, Any] |
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+    start_time = time.perf_counter()
+    try:
+        with trace_span("password.verify"):
+            verified: bool = get_pwd_context().verify(plain_password, hashed_password)
+            return verified
+    finally:
+        password_hash_duration_seconds.observe(time.perf_counter() - start_time, ("verify",))
 
 
 def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
+    start_time = time.perf_counter()
+    try:
+        with trace_span("password.hash"):
+            hashed: str = get_pwd_context().hash(password)
+            return hashed
+    finally:
+        password_hash_duration_seconds.observe(time.perf_counter() - start_time, ("hash",))
 
 
 def validate_password_strength(password: str) -> tuple[bool, list[str]]:
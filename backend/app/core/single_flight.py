@@ -0,0 +1,98 @@
+"""
+相同并发请求合并（single-flight）
+
+同一时刻到达的相同请求（相同路由、参数和权限集合）只执行一次：第一个请求
+（leader）执行计算，其余请求等待同一个 Future 并共享结果或异常。
+
+    - 等待超过超时时间的请求返回 SingleFlightTimeout，leader 不受影响
+    - leader 被取消（客户端断开）时，等待者各自重新执行，而不是一起失败
+    - 只在事件循环线程中使用，不需要加锁
+"""
+import asyncio
+from collections.abc import Awaitable, Callable, Hashable
+from typing import Any, TypeVar
+
+from app.core.config import settings
+from app.core.metrics import registry
+
+T = TypeVar("T")
+
+single_flight_requests_total = registry.counter(
+    "single_flight_requests_total",
+    "请求合并结果：leader 执行计算，coalesced 共享结果，timeout 等待超时",
+    ("route", "result"),
+)
+
+
+class SingleFlightTimeout(Exception):
+    pass
+
+
+class _LeaderCancelled(Exception):
+    pass
+
+
+class SingleFlight:
+    def __init__(self, timeout: float, enabled: bool = True) -> None:
+        self.timeout = timeout
+        self.enabled = enabled
+        self._calls: dict[Hashable, asyncio.Future[Any]] = {}
+        self.leaders = 0
+        self.coalesced = 0
+        self.timeouts = 0
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[T]], route: str = "") -> T:
+        if not self.enabled:
+            return await func()
+        future = self._calls.get(key)
+        if future is not None:
+            return await self._wait(future, func, route)
+
+        future = asyncio.get_running_loop().create_future()
+        self._calls[key] = future
+        self.leaders += 1
+        single_flight_requests_total.inc(1.0, (route, "leader"))
+        try:
+            result = await func()
+        except asyncio.CancelledError:
+            self._fail(future, _LeaderCancelled())
+            raise
+        except BaseException as e:
+            self._fail(future, e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            del self._calls[key]
+
+    @staticmethod
+    def _fail(future: asyncio.Future[Any], error: BaseException) -> None:
+        future.set_exception(error)
+        # 标记异常已读取，没有等待者时不会输出 "exception was never retrieved"
+        future.exception()
+
+    async def _wait(self, future: asyncio.Future[Any], func: Callable[[], Awaitable[T]], route: str) -> T:
+        self.coalesced += 1
+        single_flight_requests_total.inc(1.0, (route, "coalesced"))
+        try:
+            # shield：单个等待者超时或被取消时不影响共享的 Future
+            return await asyncio.wait_for(asyncio.shield(future), self.timeout)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            single_flight_requests_total.inc(1.0, (route, "timeout"))
+            raise SingleFlightTimeout(f"等待相同请求的结果超时（{self.timeout}s）")
+        except _LeaderCancelled:
+            return await func()
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "in_flight": len(self._calls),
+            "leaders": self.leaders,
+            "coalesced": self.coalesced,
+            "timeouts": self.timeouts,
+        }
+
+
+single_flight = SingleFlight(settings.SINGLE_FLIGHT_TIMEOUT, settings.SINGLE_FLIGHT_ENABLED)
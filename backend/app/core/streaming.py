@@ -0,0 +1,210 @@
+"""
+列表响应的分块序列化
+
+大页面不再先把所有行读入列表、再整体编码为一个 JSON 字节串，而是按批从数据库
+读取（yield_per），逐批编码后作为 chunked 响应发送，峰值内存只与批大小有关。
+编码方式与 JSONResponse 相同（jsonable_encoder + 紧凑 json.dumps），客户端收到的
+内容与非流式响应逐字节一致。
+
+响应体在发送时才生成，此时端点的 yield 依赖（get_session）已经退出，因此查询
+在独立的 Session 中执行；每次发送都重新执行查询，同一个响应对象可以安全地交给
+多个 single-flight 等待者。分页总数与行在同一条语句中统计（窗口函数），二者来自
+同一个快照。
+
+响应体仍属于请求的一部分:
+    - 端点绑定了执行器时，响应体在同一执行器的一个线程中生成（不占用默认线程池）
+    - limit_concurrency 通过 collect_streams 得知请求返回了流式响应，把并发名额的
+      释放推迟到响应体发送完成，延迟样本也包含发送时间
+"""
+import json
+from collections.abc import AsyncIterator, Callable, Iterable, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any
+
+import anyio
+import anyio.from_thread
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import Response, StreamingResponse
+from pydantic import BaseModel
+from sqlmodel import Session, func
+from starlette.types import Receive, Scope, Send
+
+from app.core.config import settings
+from app.core.database import engine
+from app.core.executors import WorkloadExecutor, current_executor
+from app.core.metrics import registry
+
+streamed_responses_total = registry.counter(
+    "list_streamed_responses_total", "分块序列化的列表响应数", ("route",)
+)
+
+
+def should_stream(rows: int) -> bool:
+    """页面行数超过阈值时使用分块序列化"""
+    return rows > settings.LIST_STREAM_THRESHOLD
+
+
+def encode_json(value: Any) -> bytes:
+    """与 JSONResponse.render 相同的编码"""
+    # 结果与先 jsonable_encoder 再编码相同，但不逐层递归检查：模型直接导出为 JSON 兼容的
+    # 字典，其余值只有 json 无法处理的部分（日期时间等）才交给 jsonable_encoder
+    if isinstance(value, BaseModel):
+        value = value.model_dump(mode="json")
+    return json.dumps(
+        value,
+        default=jsonable_encoder,
+        ensure_ascii=False,
+        allow_nan=False,
+        indent=None,
+        separators=(",", ":"),
+    ).encode("utf-8")
+
+
+def iter_json_array(items: Iterable[Any], batch_size: int) -> Iterator[bytes]:
+    """把 items 编码为 JSON 数组，每 batch_size 项输出一个块"""
+    chunk = [b"["]
+    count = 0
+    for item in items:
+        if count:
+            chunk.append(b",")
+        chunk.append(encode_json(item))
+        count += 1
+        if count % batch_size == 0:
+            yield b"".join(chunk)
+            chunk = []
+    chunk.append(b"]")
+    yield b"".join(chunk)
+
+
+def iter_query(statement: Any, serialize: Callable[[Any], Any], batch_size: int) -> Iterator[Any]:
+    """在独立的 Session 中按批读取查询结果并逐行转换"""
+    with Session(engine) as session:
+        for row in session.exec(statement.execution_options(yield_per=batch_size)):
+            yield serialize(row)
+
+
+def iter_json_page(
+    statement: Any,
+    count_statement: Any,
+    serialize: Callable[[Any], Any],
+    batch_size: int,
+    **fields: Any,
+) -> Iterator[bytes]:
+    """
+    {"data": [...], "total": 总数, **fields} 格式的分页响应（与列表接口的字段顺序一致）
+
+    总数由 count(*) over () 随每一行返回，与行属于同一条语句的同一个快照，并且与
+    count_statement 统计的是相同的（连接后、去重前的）行；页面为空时才执行 count_statement。
+    """
+    total = None
+    with Session(engine) as session:
+        def items() -> Iterator[Any]:
+            nonlocal total
+            paged = statement.add_columns(func.count().over()).execution_options(yield_per=batch_size)
+            for row, row_total in session.execute(paged):
+                total = row_total
+                yield serialize(row)
+
+        yield b'{"data":'
+        yield from iter_json_array(items(), batch_size)
+        if total is None:
+            total = session.exec(count_statement).one()
+    yield encode_json({"total": total, **fields}).replace(b"{", b",", 1)
+
+
+# 当前请求中创建的流式响应，由 collect_streams 设置
+_request_streams: ContextVar[list["StreamingJSONResponse"] | None] = ContextVar("request_streams", default=None)
+
+
+@contextmanager
+def collect_streams() -> Iterator[list["StreamingJSONResponse"]]:
+    """收集上下文中（当前请求的端点）创建的流式响应，用于把资源释放推迟到响应体发送完成"""
+    streams: list[StreamingJSONResponse] = []
+    token = _request_streams.set(streams)
+    try:
+        yield streams
+    finally:
+        _request_streams.reset(token)
+
+
+class StreamingJSONResponse(Response):
+    """
+    分块发送的 JSON 响应
+
+    chunks 是生成响应体的工厂函数，每次发送时调用一次。同步迭代器在创建响应的端点
+    所绑定的执行器中执行（未绑定时在默认线程池中执行），不阻塞事件循环；on_complete
+    注册的回调在发送结束后调用。
+    """
+
+    media_type = "application/json"
+
+    def __init__(
+        self,
+        chunks: Callable[[], Iterator[bytes]],
+        route: str = "",
+        status_code: int = 200,
+        headers: dict[str, str] | None = None,
+    ) -> None:
+        self.chunks = chunks
+        self.route = route
+        self.status_code = status_code
+        self.background = None
+        self.init_headers(headers)
+        self.executor = current_executor.get()
+        self._on_complete: list[Callable[[bool], None]] = []
+        streams = _request_streams.get()
+        if streams is not None:
+            streams.append(self)
+
+    def on_complete(self, callback: Callable[[bool], None]) -> None:
+        """注册发送结束后的回调（参数为是否失败），多个等待者共享响应时只在第一次发送后调用"""
+        self._on_complete.append(callback)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        streamed_responses_total.inc(1.0, (self.route,))
+        failed = True
+        try:
+            if self.executor is None:
+                await self._respond(self.chunks(), scope, receive, send)
+            else:
+                await self._respond_from_executor(self.executor, scope, receive, send)
+            failed = False
+        finally:
+            callbacks, self._on_complete = self._on_complete, []
+            for callback in callbacks:
+                callback(failed)
+
+    async def _respond(
+        self, body: Iterator[bytes] | AsyncIterator[bytes], scope: Scope, receive: Receive, send: Send
+    ) -> None:
+        response = StreamingResponse(body, status_code=self.status_code)
+        response.raw_headers = list(self.raw_headers)
+        await response(scope, receive, send)
+
+    async def _respond_from_executor(
+        self, executor: WorkloadExecutor, scope: Scope, receive: Receive, send: Send
+    ) -> None:
+        # 响应体在执行器的一个线程中生成，通过容量为 1 的内存通道逐块交给事件循环发送
+        send_stream, receive_stream = anyio.create_memory_object_stream[bytes](1)
+
+        def produce() -> None:
+            with send_stream:
+                try:
+                    for chunk in self.chunks():
+                        anyio.from_thread.run(send_stream.send, chunk)
+                except anyio.BrokenResourceError:
+                    # 发送已结束（客户端断开），不再读取剩余的行
+                    pass
+
+        async def body() -> AsyncIterator[bytes]:
+            async for chunk in receive_stream:
+                yield chunk
+
+        async def run_producer() -> None:
+            await executor.run(produce, admitted=True)
+
+        async with anyio.create_task_group() as task_group:
+            task_group.start_soon(run_producer)
+            with receive_stream:
+                await self._respond(body(), scope, receive, send)
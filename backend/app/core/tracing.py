@@ -0,0 +1,352 @@
+"""
+轻量级进程内链路追踪
+
+基于 contextvars 的最小追踪 API，无需部署 collector:
+    - RequestContextMiddleware 为每个请求创建根 span（server），优先沿用请求头
+      ``traceparent``（W3C Trace Context）中的 trace id，否则使用请求ID
+    - traced 装饰器为依赖项（如 get_current_user）创建 span
+    - 数据库引擎事件为每条 SQL 创建 span（client）
+    - 密码哈希/校验创建 span
+
+span 结束后放入有界队列，由后台线程批量写入 ``logs/traces.otlp.jsonl``，每行一个
+OTLP/JSON ExportTraceServiceRequest，可直接被 OpenTelemetry Collector 的 otlpjsonfile
+receiver 或 Jaeger 等工具导入。当前上下文中没有被采样的 span 时，所有埋点都只做一次
+上下文变量读取。
+"""
+import contextvars
+import functools
+import inspect
+import json
+import logging
+import os
+import queue
+import random
+import re
+import threading
+import time
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, TypeVar
+
+from app.core.config import settings
+from app.core.log_rotation import MultiProcessRotatingFileHandler
+
+logger = logging.getLogger("tracing")
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+# OTLP SpanKind / StatusCode
+SPAN_KIND_INTERNAL = 1
+SPAN_KIND_SERVER = 2
+SPAN_KIND_CLIENT = 3
+STATUS_CODE_OK = 1
+STATUS_CODE_ERROR = 2
+
+TRACEPARENT_HEADER = b"traceparent"
+TRACEPARENT_PATTERN = re.compile(r"^[0-9a-f]{2}-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+
+
+class Span:
+    """一个已采样的 span；未采样时埋点直接得到 None，不创建对象"""
+
+    __slots__ = (
+        "trace_id", "span_id", "parent_span_id", "name", "kind",
+        "start_time_ns", "end_time_ns", "attributes", "status_code", "status_message",
+    )
+
+    def __init__(
+        self,
+        trace_id: str,
+        name: str,
+        parent_span_id: str | None = None,
+        kind: int = SPAN_KIND_INTERNAL,
+        attributes: dict[str, Any] | None = None,
+    ) -> None:
+        self.trace_id = trace_id
+        self.span_id = f"{random.getrandbits(64):016x}"
+        self.parent_span_id = parent_span_id
+        self.name = name
+        self.kind = kind
+        self.start_time_ns = time.time_ns()
+        self.end_time_ns = 0
+        self.attributes = attributes if attributes is not None else {}
+        self.status_code = 0
+        self.status_message = ""
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def set_error(self, error: BaseException) -> None:
+        self.status_code = STATUS_CODE_ERROR
+        self.status_message = f"{type(error).__name__}: {error}"
+
+    def to_otlp(self) -> dict[str, Any]:
+        span: dict[str, Any] = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": self.kind,
+            "startTimeUnixNano": str(self.start_time_ns),
+            "endTimeUnixNano": str(self.end_time_ns),
+            "attributes": [_otlp_attribute(key, value) for key, value in self.attributes.items()],
+        }
+        if self.parent_span_id:
+            span["parentSpanId"] = self.parent_span_id
+        if self.status_code:
+            span["status"] = {"code": self.status_code}
+            if self.status_message:
+                span["status"]["message"] = self.status_message
+        return span
+
+
+def _otlp_attribute(key: str, value: Any) -> dict[str, Any]:
+    typed: dict[str, Any]
+    if isinstance(value, bool):
+        typed = {"boolValue": value}
+    elif isinstance(value, int):
+        typed = {"intValue": str(value)}
+    elif isinstance(value, float):
+        typed = {"doubleValue": value}
+    else:
+        typed = {"stringValue": str(value)}
+    return {"key": key, "value": typed}
+
+
+current_span_var: contextvars.ContextVar[Span | None] = contextvars.ContextVar("current_span", default=None)
+
+
+class BatchSpanExporter:
+    """有界队列 + 后台线程批量写入 OTLP/JSON 文件（队列满时丢弃并计数）"""
+
+    def __init__(
+        self,
+        path: str | Path,
+        queue_size: int,
+        batch_size: int,
+        flush_interval: float,
+        max_bytes: int = 0,
+        rotate_interval: int = 0,
+    ) -> None:
+        self.path = Path(path)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_bytes = max_bytes
+        self.rotate_interval = rotate_interval
+        self.exported = 0
+        self.dropped = 0
+        self._queue: queue.Queue[Span | None] = queue.Queue(maxsize=queue_size)
+        self._handler: MultiProcessRotatingFileHandler | None = None
+        self._thread: threading.Thread | None = None
+        self._resource = {
+            "attributes": [
+                _otlp_attribute("service.name", settings.PROJECT_NAME),
+                _otlp_attribute("service.version", settings.PROJECT_VERSION),
+            ]
+        }
+
+    def submit(self, span: Span) -> None:
+        try:
+            self._queue.put_nowait(span)
+        except queue.Full:
+            self.dropped += 1
+
+    def start(self) -> None:
+        """启动后台写入线程（需在 fork 之后调用）"""
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="trace-exporter", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        if self._thread is None:
+            return
+        self._queue.put(None)
+        self._thread.join(timeout)
+        self._thread = None
+        if self._handler is not None:
+            self._handler.close()
+            self._handler = None
+
+    def _run(self) -> None:
+        while True:
+            batch: list[Span] = []
+            stopping = False
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    span = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                if span is None:
+                    stopping = True
+                    break
+                batch.append(span)
+            if stopping:
+                # 停止时写完队列中剩余的 span
+                while True:
+                    try:
+                        span = self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if span is not None:
+                        batch.append(span)
+            if batch:
+                try:
+                    self._write(batch)
+                except Exception:
+                    logger.exception(f"写入追踪数据失败，丢弃 {len(batch)} 个 span")
+                    self.dropped += len(batch)
+            if stopping:
+                return
+
+    def _write(self, batch: list[Span]) -> None:
+        request = {
+            "resourceSpans": [{
+                "resource": {
+                    "attributes": [*self._resource["attributes"], _otlp_attribute("process.pid", os.getpid())]
+                },
+                "scopeSpans": [{
+                    "scope": {"name": __name__},
+                    "spans": [span.to_otlp() for span in batch],
+                }],
+            }]
+        }
+        line = json.dumps(request, ensure_ascii=False, separators=(",", ":")) + "\n"
+        if self._handler is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._handler = MultiProcessRotatingFileHandler(
+                self.path,
+                max_bytes=self.max_bytes,
+                rotate_interval=self.rotate_interval,
+                encoding="utf-8",
+            )
+        handler = self._handler
+        handler.maybe_rotate()
+        handler.acquire()
+        try:
+            assert handler.stream is not None
+            handler.stream.write(line)
+            handler.stream.flush()
+        finally:
+            handler.release()
+        self.exported += len(batch)
+
+    def stats(self) -> dict[str, int]:
+        return {"exported": self.exported, "dropped": self.dropped, "pending": self._queue.qsize()}
+
+
+span_exporter = BatchSpanExporter(
+    settings.TRACING_EXPORT_PATH,
+    queue_size=settings.TRACING_QUEUE_SIZE,
+    batch_size=settings.TRACING_BATCH_SIZE,
+    flush_interval=settings.TRACING_FLUSH_INTERVAL,
+    max_bytes=settings.LOG_MAX_BYTES,
+    rotate_interval=settings.LOG_ROTATE_INTERVAL,
+)
+
+
+def start_span(
+    name: str,
+    kind: int = SPAN_KIND_INTERNAL,
+    attributes: dict[str, Any] | None = None,
+) -> Span | None:
+    """在当前 span 下创建子 span（不修改上下文），当前请求未被采样时返回 None"""
+    parent = current_span_var.get()
+    if parent is None:
+        return None
+    return Span(parent.trace_id, name, parent.span_id, kind, attributes)
+
+
+def end_span(span: Span, error: BaseException | None = None) -> None:
+    if error is not None:
+        span.set_error(error)
+    span.end_time_ns = time.time_ns()
+    span_exporter.submit(span)
+
+
+@contextmanager
+def trace_span(
+    name: str,
+    kind: int = SPAN_KIND_INTERNAL,
+    attributes: dict[str, Any] | None = None,
+) -> Iterator[Span | None]:
+    """创建子 span 并设为当前 span，退出时结束"""
+    span = start_span(name, kind, attributes)
+    if span is None:
+        yield None
+        return
+    token = current_span_var.set(span)
+    try:
+        yield span
+    except BaseException as e:
+        end_span(span, e)
+        raise
+    else:
+        end_span(span)
+    finally:
+        current_span_var.reset(token)
+
+
+def traced(name: str) -> Callable[[F], F]:
+    """
+    为函数创建 span 的装饰器，支持同步和异步函数
+
+    保留原函数签名（functools.wraps），可直接用于 FastAPI 依赖项。
+    """
+    def decorator(func: F) -> F:
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
+                with trace_span(name):
+                    return await func(*args, **kwargs)
+            return async_wrapper  # type: ignore[return-value]
+
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            with trace_span(name):
+                return func(*args, **kwargs)
+        return wrapper  # type: ignore[return-value]
+    return decorator
+
+
+def start_request_span(traceparent: str | None, request_id: str, method: str, path: str) -> Span | None:
+    """
+    创建请求根 span
+
+    携带有效 traceparent 时沿用其 trace id 并遵循上游的采样标记；否则以请求ID
+    （去掉连字符即为 32 位十六进制）作为 trace id，按 TRACING_SAMPLE_RATE 采样。
+    """
+    if not settings.TRACING_ENABLED:
+        return None
+    parent_span_id = None
+    match = TRACEPARENT_PATTERN.match(traceparent) if traceparent else None
+    if match:
+        trace_id, parent_span_id, flags = match.groups()
+        if not int(flags, 16) & 0x01:
+            return None
+    else:
+        if random.random() >= settings.TRACING_SAMPLE_RATE:
+            return None
+        trace_id = request_id.replace("-", "")
+    span = Span(
+        trace_id,
+        f"{method} {path}",
+        parent_span_id,
+        SPAN_KIND_SERVER,
+        {"http.request.method": method, "url.path": path, "request.id": request_id},
+    )
+    current_span_var.set(span)
+    return span
+
+
+def finish_request_span(span: Span, route: str, status_code: int, error: BaseException | None = None) -> None:
+    span.name = f"{span.attributes['http.request.method']} {route}"
+    span.attributes["http.route"] = route
+    span.attributes["http.response.status_code"] = status_code
+    if error is None and status_code >= 500:
+        span.status_code = STATUS_CODE_ERROR
+    end_span(span, error)
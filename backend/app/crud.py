@@ -1,18 +1,27 @@
 
-from sqlmodel import Session, select
+from sqlalchemy import bindparam
+from sqlmodel import Session, col, select
 
-from app.core.security import get_password_hash, verify_password, validate_password_strength
-from app.models import User, UserCreate, UserUpdate
+from app.core.security import (
+    get_password_hash,
+    validate_password_strength,
+    verify_password,
+)
+from app.models import Role, User, UserCreate, UserUpdate
+
+# 热点查询语句：模块加载时构建一次，通过绑定参数复用 SQLAlchemy 编译缓存
+USER_BY_USERNAME = select(User).where(User.username == bindparam("username"))
+USER_BY_EMAIL = select(User).where(User.email == bindparam("email"))
+ROLE_BY_NAME = select(Role).where(Role.name == bindparam("name"))
+ROLES_BY_IDS = select(Role).where(col(Role.id).in_(bindparam("role_ids", expanding=True)))
 
 
 def get_user_by_username(session: Session, username: str) -> User | None:
-    statement = select(User).where(User.username == username)
-    return session.exec(statement).first()
+    return session.exec(USER_BY_USERNAME, params={"username": username}).first()
 
 
 def get_user_by_email(session: Session, email: str) -> User | None:
-    statement = select(User).where(User.email == email)
-    return session.exec(statement).first()
+    return session.exec(USER_BY_EMAIL, params={"email": email}).first()
 
 
 def get_user(session: Session, user_id: int) -> User | None:
@@ -66,3 +75,13 @@ def update_user(session: Session, user_id: int, user_update: UserUpdate) -> User
 def get_users(session: Session, skip: int = 0, limit: int = 100) -> list[User]:
     statement = select(User).offset(skip).limit(limit)
     return list(session.exec(statement).all())
+
+
+def get_role_by_name(session: Session, name: str) -> Role | None:
+    return session.exec(ROLE_BY_NAME, params={"name": name}).first()
+
+
+def get_roles_by_ids(session: Session, role_ids: list[int]) -> list[Role]:
+    if not role_ids:
+        return []
+    return list(session.exec(ROLES_BY_IDS, params={"role_ids": list(role_ids)}).all())
@@ -0,0 +1,290 @@
+"""
+测试数据生成工具（直接写数据库）
+
+绕过 HTTP 接口，通过 engine 批量写入用户、角色和 user_role_links，用于生成百万级
+数据集复现线上问题:
+    - 所有用户使用同一个密码，哈希只预先计算一小组（不同盐值）后循环复用
+    - 用户名、邮箱、中文姓名和创建时间由随机种子决定，相同种子和起始状态生成相同数据
+    - 每个用户按权重抽取一个主角色（none 表示没有角色），再按比例追加一个其他角色
+    - 用户ID由生成器分配（从现有最大ID之后开始），关联表无需回查即可写入
+    - SQLite 在生成期间临时关闭同步写盘，每批一个事务
+
+用法（在 backend 目录下）:
+    python -m app.data_generator --users 1000000 --create-tables
+    python -m app.data_generator --users 50000 --role-weights user=80,admin=2,auditor=8,none=10
+    python -m app.data_generator --users 10000 --seed 7 --password Bench#Pass2024 --hash-pool 8
+"""
+import argparse
+import logging
+import random
+import sys
+import time
+from bisect import bisect
+from collections.abc import Callable, Iterator
+from datetime import datetime, timedelta
+from itertools import accumulate
+from typing import Any, cast
+
+from sqlalchemy import Table, func, insert, inspect, select
+from sqlalchemy.engine import Connection
+from sqlmodel import SQLModel, col
+
+from app.core.database import create_db_and_tables, engine
+from app.core.security import get_password_hash
+from app.models import NO_PERMISSION_KEY, Role, User, UserRoleLink
+
+DEFAULT_PASSWORD = "Test@123456"
+DEFAULT_ROLE_WEIGHTS = "user=85,admin=1,auditor=6,operator=3,none=5"
+DEFAULT_UNTIL = "2025-01-01"
+
+# 常见姓氏和名字用字（汉字, 拼音），用于生成姓名和用户名
+SURNAMES = (
+    ("王", "wang"), ("李", "li"), ("张", "zhang"), ("刘", "liu"), ("陈", "chen"),
+    ("杨", "yang"), ("黄", "huang"), ("赵", "zhao"), ("吴", "wu"), ("周", "zhou"),
+    ("徐", "xu"), ("孙", "sun"), ("马", "ma"), ("朱", "zhu"), ("胡", "hu"),
+    ("郭", "guo"), ("何", "he"), ("高", "gao"), ("林", "lin"), ("罗", "luo"),
+    ("郑", "zheng"), ("梁", "liang"), ("谢", "xie"), ("宋", "song"), ("唐", "tang"),
+    ("许", "xu"), ("韩", "han"), ("冯", "feng"), ("邓", "deng"), ("曹", "cao"),
+    ("欧阳", "ouyang"), ("司马", "sima"),
+)
+GIVEN_NAMES = (
+    ("伟", "wei"), ("芳", "fang"), ("娜", "na"), ("敏", "min"), ("静", "jing"),
+    ("丽", "li"), ("强", "qiang"), ("磊", "lei"), ("军", "jun"), ("洋", "yang"),
+    ("勇", "yong"), ("艳", "yan"), ("杰", "jie"), ("涛", "tao"), ("明", "ming"),
+    ("超", "chao"), ("秀", "xiu"), ("霞", "xia"), ("平", "ping"), ("刚", "gang"),
+    ("桂", "gui"), ("英", "ying"), ("华", "hua"), ("建", "jian"), ("文", "wen"),
+    ("婷", "ting"), ("宇", "yu"), ("浩", "hao"), ("欣", "xin"), ("怡", "yi"),
+    ("子", "zi"), ("晨", "chen"), ("思", "si"), ("雨", "yu"), ("嘉", "jia"),
+    ("博", "bo"), ("梓", "zi"), ("轩", "xuan"), ("佳", "jia"), ("琳", "lin"),
+)
+EMAIL_DOMAINS = ("example.com", "example.cn", "mail.example.com", "corp.example.org")
+
+logger = logging.getLogger("data_generator")
+
+
+def parse_role_weights(spec: str) -> dict[str, float]:
+    """解析 "user=85,admin=1,none=5" 格式的角色权重"""
+    weights: dict[str, float] = {}
+    for part in spec.split(","):
+        name, sep, value = part.strip().partition("=")
+        if not sep or not name:
+            raise ValueError(f"角色权重格式应为 名称=权重: {part!r}")
+        weights[name] = float(value)
+    if not weights or sum(weights.values()) <= 0:
+        raise ValueError("角色权重之和必须大于 0")
+    return weights
+
+
+def build_hash_pool(password: str, size: int) -> list[str]:
+    """同一密码的一组哈希（盐值不同），生成的用户循环复用"""
+    return [get_password_hash(password) for _ in range(max(1, size))]
+
+
+def _ensure_roles(conn: Connection, names: list[str], now: datetime) -> dict[str, int]:
+    query = select(col(Role.name), col(Role.id)).where(col(Role.name).in_(names))
+    existing: dict[str, int] = {row.name: row.id for row in conn.execute(query)}
+    missing = [name for name in names if name not in existing]
+    if missing:
+        conn.execute(insert(Role), [
+            {"name": name, "description": f"生成的测试角色: {name}", "is_active": True,
+             "created_at": now, "updated_at": now}
+            for name in missing
+        ])
+        existing = {row.name: row.id for row in conn.execute(query)}
+    return existing
+
+
+USER_COLUMNS = (
+    "id", "username", "email", "full_name", "is_active", "is_superuser",
+    "hashed_password", "created_at", "updated_at",
+)
+LINK_COLUMNS = ("user_id", "role_id")
+
+
+def _table(model: type[SQLModel]) -> Table:
+    return cast(Table, inspect(model, raiseerr=True).local_table)
+
+
+def _insert_sql(conn: Connection, table: Table, columns: tuple[str, ...]) -> str:
+    """驱动层批量插入语句（绕过 SQLAlchemy 逐行参数处理，是生成速度的关键）"""
+    placeholder = "?" if conn.dialect.paramstyle == "qmark" else "%s"
+    return (
+        f"INSERT INTO {table.name} ({', '.join(columns)}) "
+        f"VALUES ({', '.join([placeholder] * len(columns))})"
+    )
+
+
+def _generate_rows(
+    rng: random.Random,
+    first_id: int,
+    count: int,
+    hashes: list[str],
+    role_plan: tuple[list[int | None], list[float]],
+    extra_role_ids: list[int],
+    extra_role_ratio: float,
+    until: datetime,
+    days: int,
+    process_datetime: Callable[[datetime], Any],
+) -> tuple[list[tuple[Any, ...]], list[tuple[int, int]]]:
+    users: list[tuple[Any, ...]] = []
+    links: list[tuple[int, int]] = []
+    primary_ids, cum_weights = role_plan
+    total_weight = cum_weights[-1]
+    random_ = rng.random
+    span_seconds = days * 86400
+    surnames, given_names = len(SURNAMES), len(GIVEN_NAMES)
+    for user_id in range(first_id, first_id + count):
+        surname, surname_pinyin = SURNAMES[int(random_() * surnames)]
+        given, given_pinyin = GIVEN_NAMES[int(random_() * given_names)]
+        # 约三分之二的名字是两个字
+        if random_() < 0.67:
+            second, second_pinyin = GIVEN_NAMES[int(random_() * given_names)]
+            given += second
+            given_pinyin += second_pinyin
+        username = f"{given_pinyin}{surname_pinyin}{user_id}"
+        created_at = process_datetime(until - timedelta(seconds=int(random_() * span_seconds)))
+        users.append((
+            user_id,
+            username,
+            f"{username}@{EMAIL_DOMAINS[user_id % len(EMAIL_DOMAINS)]}",
+            surname + given,
+            random_() >= 0.03,
+            False,
+            hashes[user_id % len(hashes)],
+            created_at,
+            created_at,
+        ))
+        primary = primary_ids[bisect(cum_weights, random_() * total_weight)]
+        if primary is None:
+            continue
+        links.append((user_id, primary))
+        if extra_role_ids and random_() < extra_role_ratio:
+            extra = extra_role_ids[int(random_() * len(extra_role_ids))]
+            if extra != primary:
+                links.append((user_id, extra))
+    return users, links
+
+
+def _batches(total: int, size: int) -> Iterator[int]:
+    while total > 0:
+        yield min(size, total)
+        total -= size
+
+
+def generate(
+    users: int,
+    role_weights: dict[str, float],
+    *,
+    extra_role_ratio: float = 0.1,
+    password: str = DEFAULT_PASSWORD,
+    hash_pool: int = 4,
+    seed: int = 42,
+    batch_size: int = 50000,
+    until: datetime | None = None,
+    days: int = 365,
+) -> dict[str, Any]:
+    """批量生成用户和角色关联，返回生成统计"""
+    start = time.perf_counter()
+    rng = random.Random(seed)
+    until = until or datetime.fromisoformat(DEFAULT_UNTIL)
+    hashes = build_hash_pool(password, hash_pool)
+
+    stats: dict[str, Any] = {"users": 0, "user_role_links": 0}
+    with engine.connect() as conn:
+        sqlite = conn.dialect.name == "sqlite"
+        if sqlite:
+            previous_synchronous = conn.exec_driver_sql("PRAGMA synchronous").scalar()
+            conn.exec_driver_sql("PRAGMA synchronous=OFF")
+            # 用户名/邮箱唯一索引是随机顺序插入，较大的页缓存能避免反复换页（仅当前连接，约 256MB）
+            previous_cache_size = conn.exec_driver_sql("PRAGMA cache_size").scalar()
+            conn.exec_driver_sql("PRAGMA cache_size=-262144")
+            conn.commit()
+        try:
+            with conn.begin():
+                role_ids = _ensure_roles(
+                    conn, [name for name in role_weights if name != NO_PERMISSION_KEY], until
+                )
+                next_id = (conn.execute(select(func.max(User.id))).scalar() or 0) + 1
+            role_plan = (
+                [role_ids.get(name) for name in role_weights],
+                list(accumulate(role_weights.values())),
+            )
+            # 与 ORM 写入一致的日期时间编码（SQLite 存为字符串）
+            created_at_type = _table(User).c.created_at.type.dialect_impl(conn.dialect)
+            process_datetime = created_at_type.bind_processor(conn.dialect) or (lambda value: value)
+            user_sql = _insert_sql(conn, _table(User), USER_COLUMNS)
+            link_sql = _insert_sql(conn, _table(UserRoleLink), LINK_COLUMNS)
+            stats["first_user_id"] = next_id
+            for count in _batches(users, batch_size):
+                user_rows, link_rows = _generate_rows(
+                    rng, next_id, count, hashes, role_plan, list(role_ids.values()),
+                    extra_role_ratio, until, days, process_datetime,
+                )
+                with conn.begin():
+                    conn.exec_driver_sql(user_sql, user_rows)
+                    if link_rows:
+                        conn.exec_driver_sql(link_sql, link_rows)
+                next_id += count
+                stats["users"] += count
+                stats["user_role_links"] += len(link_rows)
+                logger.info(f"已写入 {stats['users']}/{users} 个用户")
+        finally:
+            if sqlite:
+                conn.rollback()
+                conn.exec_driver_sql(f"PRAGMA synchronous={previous_synchronous}")
+                conn.exec_driver_sql(f"PRAGMA cache_size={previous_cache_size}")
+                conn.commit()
+    stats["roles"] = role_ids
+    stats["seconds"] = round(time.perf_counter() - start, 2)
+    return stats
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="直接写数据库的测试数据生成工具")
+    parser.add_argument("--users", type=int, default=100000, help="生成的用户数量")
+    parser.add_argument("--role-weights", default=DEFAULT_ROLE_WEIGHTS,
+                        help="主角色权重，none 表示没有角色；不存在的角色会自动创建")
+    parser.add_argument("--extra-role-ratio", type=float, default=0.1, help="额外分配一个角色的用户比例")
+    parser.add_argument("--password", default=DEFAULT_PASSWORD, help="所有生成用户的登录密码")
+    parser.add_argument("--hash-pool", type=int, default=4, help="预先计算的密码哈希数量")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--batch-size", type=int, default=50000, help="每个事务写入的用户数")
+    parser.add_argument("--until", default=DEFAULT_UNTIL, help="创建时间的上限（ISO 日期）")
+    parser.add_argument("--days", type=int, default=365, help="创建时间分布的天数")
+    parser.add_argument("--create-tables", action="store_true", help="先创建缺失的数据表")
+    args = parser.parse_args()
+
+    try:
+        role_weights = parse_role_weights(args.role_weights)
+        until = datetime.fromisoformat(args.until)
+    except ValueError as e:
+        parser.error(str(e))
+
+    # 批量写入时逐条输出 SQL 日志会拖慢生成速度
+    engine.echo = False
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    if args.create_tables:
+        create_db_and_tables()
+
+    stats = generate(
+        args.users,
+        role_weights,
+        extra_role_ratio=args.extra_role_ratio,
+        password=args.password,
+        hash_pool=args.hash_pool,
+        seed=args.seed,
+        batch_size=args.batch_size,
+        until=until,
+        days=args.days,
+    )
+    rate = stats["users"] / stats["seconds"] if stats["seconds"] else 0.0
+    print(
+        f"生成完成: {stats['users']} 个用户（ID 从 {stats['first_user_id']} 开始），"
+        f"{stats['user_role_links']} 条角色关联，角色 {stats['roles']}，"
+        f"耗时 {stats['seconds']}s（{rate:.0f} 用户/秒）",
+        file=sys.stderr,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,297 @@
+"""
+生产环境多 worker 启动器
+
+主进程先导入应用（预加载），再 fork 出 N 个 uvicorn worker 共享同一个监听
+socket，worker 之间通过写时复制共享预加载的模块内存。
+
+信号:
+    SIGTERM / SIGINT  优雅停止所有 worker
+    SIGHUP            重新加载代码和配置：先在子进程中校验新代码可以导入，再由主进程
+                      exec 自身（pid 和监听 socket 不变，旧 worker 仍是其子进程），
+                      新的主进程预加载新代码后逐个启动新 worker 再停止对应的旧 worker
+    SIGTTIN / SIGTTOU 增加 / 减少一个 worker
+
+用法（在 backend 目录下）:
+    python -m app.launcher --host 0.0.0.0 --port 8000 --workers 4
+"""
+import argparse
+import gc
+import logging
+import os
+import shutil
+import signal
+import socket
+import subprocess
+import sys
+import time
+from types import FrameType
+
+logger = logging.getLogger("launcher")
+
+# 重新加载时通过环境变量交给 exec 后的主进程：监听 socket 的文件描述符和待替换的旧 worker
+LISTEN_FD_ENV = "LAUNCHER_LISTEN_FD"
+OLD_WORKERS_ENV = "LAUNCHER_OLD_WORKERS"
+
+
+class Launcher:
+    """预 fork 的 worker 进程管理器"""
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        workers: int,
+        graceful_timeout: float = 30.0,
+        reload_delay: float = 1.0,
+        metrics_dir: str | None = None,
+    ):
+        self.host = host
+        self.port = port
+        self.num_workers = workers
+        self.graceful_timeout = graceful_timeout
+        self.reload_delay = reload_delay
+        self.metrics_dir = metrics_dir
+        self.workers: dict[int, float] = {}  # pid -> 启动时间
+        self.sock: socket.socket | None = None
+        self._signals: list[int] = []
+        self._stopping = False
+
+    def _bind(self) -> socket.socket:
+        family = socket.AF_INET6 if ":" in self.host else socket.AF_INET
+        sock = socket.socket(family, socket.SOCK_STREAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind((self.host, self.port))
+        sock.listen(2048)
+        sock.set_inheritable(True)
+        return sock
+
+    def _spawn_worker(self) -> int:
+        pid = os.fork()
+        if pid:
+            self.workers[pid] = time.monotonic()
+            logger.info(f"启动 worker {pid}")
+            return pid
+
+        # 子进程：恢复默认信号处理，交由 uvicorn 接管 SIGTERM/SIGINT
+        for sig in (signal.SIGHUP, signal.SIGTTIN, signal.SIGTTOU, signal.SIGCHLD):
+            signal.signal(sig, signal.SIG_DFL)
+        exit_code = 0
+        try:
+            self._run_worker()
+        except Exception:
+            logger.exception("worker 异常退出")
+            exit_code = 1
+        finally:
+            os._exit(exit_code)
+
+    def _run_worker(self) -> None:
+        import uvicorn
+
+        from app.core.database import engine
+        from app.main import app
+
+        # fork 之后不能复用父进程的数据库连接
+        engine.dispose(close=False)
+
+        config = uvicorn.Config(
+            app,
+            log_config=None,
+            access_log=False,
+            timeout_graceful_shutdown=int(self.graceful_timeout),
+        )
+        server = uvicorn.Server(config)
+        assert self.sock is not None
+        server.run(sockets=[self.sock])
+
+    def _stop_worker(self, pid: int, sig: int = signal.SIGTERM) -> None:
+        try:
+            os.kill(pid, sig)
+        except ProcessLookupError:
+            self.workers.pop(pid, None)
+
+    def _wait_worker(self, pid: int, timeout: float) -> None:
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            try:
+                done, _ = os.waitpid(pid, os.WNOHANG)
+            except ChildProcessError:
+                break
+            if done:
+                break
+            time.sleep(0.05)
+        else:
+            logger.warning(f"worker {pid} 未在 {timeout}s 内退出，强制终止")
+            self._stop_worker(pid, signal.SIGKILL)
+            try:
+                os.waitpid(pid, 0)
+            except ChildProcessError:
+                pass
+        self.workers.pop(pid, None)
+
+    def _replace_workers(self, old_pids: list[int]) -> None:
+        """逐个用新 worker 替换旧 worker，保证任意时刻至少有 N 个 worker 在服务"""
+        logger.info(f"开始滚动替换 {len(old_pids)} 个旧 worker")
+        for old_pid in old_pids:
+            self._spawn_worker()
+            time.sleep(self.reload_delay)
+            self._stop_worker(old_pid)
+            self._wait_worker(old_pid, self.graceful_timeout)
+        logger.info("滚动替换完成")
+
+    def reload(self) -> None:
+        """
+        重新加载代码和配置
+
+        fork 出的 worker 只会得到主进程已预加载的旧代码，因此由主进程 exec 自身：
+        exec 不改变 pid，旧 worker 仍是新主进程的子进程，监听 socket 也原样继承，
+        新主进程预加载后再滚动替换旧 worker。新代码无法导入时保持当前进程继续服务。
+        """
+        check = subprocess.run(
+            [sys.executable, "-c", "import app.main"], capture_output=True, text=True
+        )
+        if check.returncode != 0:
+            logger.error(f"新代码导入失败，取消重新加载:\n{check.stderr[-2000:]}")
+            return
+
+        assert self.sock is not None
+        os.environ[LISTEN_FD_ENV] = str(self.sock.fileno())
+        os.environ[OLD_WORKERS_ENV] = ",".join(str(pid) for pid in self.workers)
+        logger.info("重新执行主进程以加载新代码和配置")
+
+        from app.core.logging_config import shutdown_logging
+
+        # exec 会直接替换进程映像，先把日志队列中的记录写完
+        shutdown_logging()
+        os.execv(sys.executable, [sys.executable, "-m", "app.launcher", *self._reload_args()])
+
+    def _reload_args(self) -> list[str]:
+        """原命令行参数，worker 数量替换为当前值（可能已通过 SIGTTIN/SIGTTOU 调整）"""
+        args: list[str] = []
+        skip = False
+        for arg in sys.argv[1:]:
+            if skip:
+                skip = False
+            elif arg == "--workers":
+                skip = True
+            elif not arg.startswith("--workers="):
+                args.append(arg)
+        return [*args, "--workers", str(self.num_workers)]
+
+    def _reap_workers(self) -> None:
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            if pid in self.workers:
+                self.workers.pop(pid)
+                if not self._stopping:
+                    logger.warning(f"worker {pid} 意外退出 (status={status})，重新启动")
+
+    def _handle_signal(self, signum: int, frame: FrameType | None) -> None:
+        self._signals.append(signum)
+
+    def _process_signals(self) -> None:
+        while self._signals:
+            signum = self._signals.pop(0)
+            if signum in (signal.SIGTERM, signal.SIGINT):
+                self._stopping = True
+            elif signum == signal.SIGHUP:
+                self.reload()
+            elif signum == signal.SIGTTIN:
+                self.num_workers += 1
+            elif signum == signal.SIGTTOU and self.num_workers > 1:
+                self.num_workers -= 1
+
+    def _adjust_workers(self) -> None:
+        while len(self.workers) < self.num_workers:
+            self._spawn_worker()
+        while len(self.workers) > self.num_workers:
+            oldest = min(self.workers, key=self.workers.__getitem__)
+            self._stop_worker(oldest)
+            self._wait_worker(oldest, self.graceful_timeout)
+
+    def shutdown(self) -> None:
+        logger.info("正在停止所有 worker")
+        for pid in list(self.workers):
+            self._stop_worker(pid)
+        for pid in list(self.workers):
+            self._wait_worker(pid, self.graceful_timeout)
+        if self.sock is not None:
+            self.sock.close()
+
+    def _prepare_metrics_dir(self) -> None:
+        """清空上一次运行遗留的指标快照，并通过环境变量告知 worker（需在导入应用前完成）"""
+        if not self.metrics_dir:
+            return
+        shutil.rmtree(self.metrics_dir, ignore_errors=True)
+        os.makedirs(self.metrics_dir, exist_ok=True)
+        os.environ["METRICS_MULTIPROCESS_DIR"] = os.path.abspath(self.metrics_dir)
+
+    def run(self) -> None:
+        # 预加载期间收到的信号也只记录下来，由主循环处理
+        for sig in (signal.SIGTERM, signal.SIGINT, signal.SIGHUP, signal.SIGTTIN, signal.SIGTTOU):
+            signal.signal(sig, self._handle_signal)
+
+        # 由 reload() exec 而来时沿用原监听 socket，并保留旧 worker 的指标快照和运行时状态
+        inherited_fd = os.environ.pop(LISTEN_FD_ENV, None)
+        old_workers = [int(pid) for pid in os.environ.pop(OLD_WORKERS_ENV, "").split(",") if pid]
+        if inherited_fd is None:
+            self._prepare_metrics_dir()
+
+        # 预加载应用：在 fork 之前完成全部模块导入
+        from app.core.invalidation import invalidation_bus
+        from app.main import app  # noqa: F401
+
+        if inherited_fd is None:
+            # 新部署：上一次运行时调整的日志级别等不再回放
+            invalidation_bus.clear_retained()
+
+        # 冻结预加载对象，避免 GC 扫描触发写时复制
+        gc.collect()
+        gc.freeze()
+
+        self.sock = socket.socket(fileno=int(inherited_fd)) if inherited_fd is not None else self._bind()
+
+        logger.info(f"主进程 {os.getpid()} 监听 {self.host}:{self.port}，worker 数量 {self.num_workers}")
+        try:
+            if old_workers:
+                self._replace_workers(old_workers)
+            while not self._stopping:
+                self._process_signals()
+                self._reap_workers()
+                if self._stopping:
+                    break
+                self._adjust_workers()
+                time.sleep(0.2)
+        finally:
+            self.shutdown()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Tadmin 生产环境多 worker 启动器")
+    parser.add_argument("--host", default="0.0.0.0", help="监听地址")
+    parser.add_argument("--port", type=int, default=8000, help="监听端口")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="worker 进程数量")
+    parser.add_argument("--graceful-timeout", type=float, default=30.0, help="worker 优雅退出超时（秒）")
+    parser.add_argument("--reload-delay", type=float, default=1.0, help="重新加载时新 worker 的预热时间（秒）")
+    parser.add_argument("--metrics-dir", default="./.cache/metrics", help="worker 指标快照目录，启动时清空")
+    args = parser.parse_args()
+
+    if not hasattr(os, "fork"):
+        sys.exit("多 worker 启动器仅支持类 Unix 系统")
+
+    Launcher(
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        graceful_timeout=args.graceful_timeout,
+        reload_delay=args.reload_delay,
+        metrics_dir=args.metrics_dir,
+    ).run()
+
+
+if __name__ == "__main__":
+    main()
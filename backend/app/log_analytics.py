@@ -0,0 +1,375 @@
+"""
+requests.log 离线分析工具
+
+逐块扫描 JSON 行格式的请求日志（普通文件使用 mmap 按换行对齐切分为多个区间，
+.gz 文件流式解压），用一个预编译正则在整块数据上提取字段，不逐行 json 解析，
+也不把整个文件读入内存。延迟分布使用可合并的对数分桶直方图（相对误差约 1%），
+因此多个文件/区间可以在进程池中并行统计后再合并。
+
+输出每个 (method, path) 的请求数、5xx/4xx 比例、p50/p95/p99/最大延迟，以及按任意
+时间窗口统计的吞吐量时间序列。
+
+用法（在 backend 目录下）:
+    python -m app.log_analytics logs/                       # 目录：requests.log 及其轮转文件
+    python -m app.log_analytics logs/requests.log --rotated --window 300 --normalize-ids
+    python -m app.log_analytics logs/requests.log.20250101-000000.gz --json
+"""
+import argparse
+import calendar
+import gzip
+import json
+import math
+import mmap
+import os
+import re
+import sys
+import time
+from collections.abc import Iterator
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+
+from app.core.log_rotation import ROTATED_SUFFIX
+
+DEFAULT_LOG_NAME = "requests.log"
+
+# 只匹配带状态码和耗时的记录（"HTTP请求开始" 中二者为 null，自动跳过）；
+# 兼容默认格式和 orjson 紧凑格式（冒号、逗号后无空格）
+RECORD_PATTERN = re.compile(
+    rb'\{"timestamp":\s*"(\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2})[^"]*",\s*'
+    rb'"level":\s*"[^"]*",\s*"type":\s*"http_request",\s*'
+    rb'"client_ip":\s*"(?:[^"\\\n]|\\.)*",\s*'
+    rb'"method":\s*"([^"\n]*)",\s*'
+    rb'"path":\s*"((?:[^"\\\n]|\\.)*)",\s*'
+    rb'"status_code":\s*(\d+),\s*'
+    rb'"response_time":\s*([0-9.eE+-]+)'
+)
+ID_SEGMENT = re.compile(r"/(?:\d+|[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12})(?=/|$)")
+
+# 对数分桶：桶 i 覆盖 [MIN_LATENCY * GROWTH**i, MIN_LATENCY * GROWTH**(i+1))
+MIN_LATENCY = 1e-6
+GROWTH = 1.02
+LOG_GROWTH = math.log(GROWTH)
+
+STREAM_CHUNK_SIZE = 64 * 1024 * 1024
+
+# 每个 (method, path) 的统计: [请求数, 5xx 数, 4xx 数, 总耗时, 最大耗时, {桶: 数量}, 最小耗时]
+KeyStats = list[Any]
+
+
+class LogAggregate:
+    """可合并的统计结果"""
+
+    def __init__(self, window: int, normalize_ids: bool) -> None:
+        self.window = window
+        self.normalize_ids = normalize_ids
+        self.by_key: dict[tuple[str, str], KeyStats] = {}
+        self.windows: dict[int, list[int]] = {}  # 窗口起点 -> [请求数, 5xx 数]
+        self.records = 0
+        self.first_ts: int | None = None
+        self.last_ts: int | None = None
+        self._epoch_cache: dict[bytes, int] = {}
+        self._path_cache: dict[bytes, str] = {}
+
+    def _epoch(self, timestamp: bytes) -> int:
+        epoch = self._epoch_cache.get(timestamp)
+        if epoch is None:
+            epoch = calendar.timegm(time.strptime(timestamp.decode(), "%Y-%m-%dT%H:%M:%S"))
+            if len(self._epoch_cache) > 100000:
+                self._epoch_cache.clear()
+            self._epoch_cache[timestamp] = epoch
+        return epoch
+
+    def _path(self, raw: bytes) -> str:
+        path = self._path_cache.get(raw)
+        if path is None:
+            path = json.loads(b'"' + raw + b'"') if b"\\" in raw else raw.decode("utf-8", "replace")
+            if self.normalize_ids:
+                path = ID_SEGMENT.sub("/{id}", path)
+            if len(self._path_cache) > 100000:
+                self._path_cache.clear()
+            self._path_cache[raw] = path
+        return path
+
+    def scan(self, data: Any, start: int = 0, end: int | None = None) -> None:
+        """扫描一段缓冲区（bytes 或 mmap），start/end 必须落在行边界上"""
+        by_key = self.by_key
+        windows = self.windows
+        window = self.window
+        first_ts, last_ts = self.first_ts, self.last_ts
+        count = 0
+        finditer = RECORD_PATTERN.finditer(data, start) if end is None else RECORD_PATTERN.finditer(data, start, end)
+        for match in finditer:
+            timestamp, method, raw_path, status_raw, time_raw = match.groups()
+            try:
+                latency = float(time_raw)
+            except ValueError:
+                continue
+            status = int(status_raw)
+            key = (method.decode("ascii", "replace"), self._path(raw_path))
+            stats = by_key.get(key)
+            if stats is None:
+                stats = by_key[key] = [0, 0, 0, 0.0, 0.0, {}, latency]
+            stats[0] += 1
+            if status >= 500:
+                stats[1] += 1
+            elif status >= 400:
+                stats[2] += 1
+            stats[3] += latency
+            if latency > stats[4]:
+                stats[4] = latency
+            if latency < stats[6]:
+                stats[6] = latency
+            bucket = int(math.log(latency / MIN_LATENCY) / LOG_GROWTH) if latency > MIN_LATENCY else 0
+            buckets = stats[5]
+            buckets[bucket] = buckets.get(bucket, 0) + 1
+
+            epoch = self._epoch(timestamp)
+            if first_ts is None or epoch < first_ts:
+                first_ts = epoch
+            if last_ts is None or epoch > last_ts:
+                last_ts = epoch
+            window_start = epoch - epoch % window
+            counts = windows.get(window_start)
+            if counts is None:
+                counts = windows[window_start] = [0, 0]
+            counts[0] += 1
+            if status >= 500:
+                counts[1] += 1
+            count += 1
+        self.records += count
+        self.first_ts, self.last_ts = first_ts, last_ts
+
+    def merge(self, other: "LogAggregate") -> None:
+        for key, stats in other.by_key.items():
+            target = self.by_key.get(key)
+            if target is None:
+                self.by_key[key] = stats
+                continue
+            target[0] += stats[0]
+            target[1] += stats[1]
+            target[2] += stats[2]
+            target[3] += stats[3]
+            target[4] = max(target[4], stats[4])
+            target[6] = min(target[6], stats[6])
+            buckets = target[5]
+            for bucket, count in stats[5].items():
+                buckets[bucket] = buckets.get(bucket, 0) + count
+        for window_start, counts in other.windows.items():
+            target_counts = self.windows.setdefault(window_start, [0, 0])
+            target_counts[0] += counts[0]
+            target_counts[1] += counts[1]
+        self.records += other.records
+        for ts in (other.first_ts, other.last_ts):
+            if ts is not None:
+                self.first_ts = ts if self.first_ts is None else min(self.first_ts, ts)
+                self.last_ts = ts if self.last_ts is None else max(self.last_ts, ts)
+
+    def __getstate__(self) -> dict[str, Any]:
+        # 缓存不需要跨进程传递
+        state = self.__dict__.copy()
+        state["_epoch_cache"] = {}
+        state["_path_cache"] = {}
+        return state
+
+
+def percentile(buckets: dict[int, int], total: int, q: float, lowest: float, highest: float) -> float:
+    """从对数分桶直方图估算分位数（取桶的几何中点，并限制在实际观测到的最小/最大值之间）"""
+    if total == 0:
+        return 0.0
+    rank = q * total
+    seen = 0
+    estimate = MIN_LATENCY * GROWTH ** (max(buckets) + 0.5)
+    for bucket in sorted(buckets):
+        seen += buckets[bucket]
+        if seen >= rank:
+            estimate = MIN_LATENCY * GROWTH ** (bucket + 0.5)
+            break
+    return float(min(max(estimate, lowest), highest))
+
+
+def _aligned(mm: mmap.mmap, offset: int) -> int:
+    """把偏移量推进到下一行的行首"""
+    if offset <= 0:
+        return 0
+    newline = mm.find(b"\n", offset - 1)
+    return len(mm) if newline == -1 else newline + 1
+
+
+def _scan_range(path: str, start: int, end: int, window: int, normalize_ids: bool) -> LogAggregate:
+    aggregate = LogAggregate(window, normalize_ids)
+    with open(path, "rb") as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            start, end = _aligned(mm, start), _aligned(mm, end)
+            if start < end:
+                aggregate.scan(mm, start, end)
+    return aggregate
+
+
+def _scan_stream(path: str, window: int, normalize_ids: bool) -> LogAggregate:
+    aggregate = LogAggregate(window, normalize_ids)
+    opener = gzip.open if path.endswith(".gz") else open
+    remainder = b""
+    with opener(path, "rb") as f:
+        while True:
+            chunk = f.read(STREAM_CHUNK_SIZE)
+            if not chunk:
+                break
+            data = remainder + chunk
+            cut = data.rfind(b"\n") + 1
+            aggregate.scan(data, 0, cut)
+            remainder = data[cut:]
+    if remainder:
+        aggregate.scan(remainder)
+    return aggregate
+
+
+def plan_tasks(files: list[Path], chunk_size: int) -> Iterator[tuple[str, int, int]]:
+    """把文件拆分为任务：普通文件按字节区间切分（end=-1 表示流式读取整个文件）"""
+    for path in files:
+        size = path.stat().st_size
+        if path.suffix == ".gz" or size == 0:
+            yield str(path), 0, -1
+            continue
+        for start in range(0, size, chunk_size):
+            yield str(path), start, min(start + chunk_size, size)
+
+
+def _run_task(task: tuple[str, int, int], window: int, normalize_ids: bool) -> LogAggregate:
+    path, start, end = task
+    if end == -1:
+        return _scan_stream(path, window, normalize_ids)
+    return _scan_range(path, start, end, window, normalize_ids)
+
+
+def expand_inputs(inputs: list[str], include_rotated: bool) -> list[Path]:
+    """展开输入：目录取其中的 requests.log 及轮转文件；文件可选附带其轮转文件"""
+    files: list[Path] = []
+    for item in inputs:
+        path = Path(item)
+        if path.is_dir():
+            base, directory, rotated = DEFAULT_LOG_NAME, path, True
+        else:
+            base, directory, rotated = path.name, path.parent, include_rotated
+            if path.is_file():
+                files.append(path)
+        if rotated:
+            prefix = base + "."
+            for candidate in sorted(directory.glob(prefix + "*")):
+                if ROTATED_SUFFIX.match(candidate.name[len(prefix):]):
+                    files.append(candidate)
+            if path.is_dir() and (directory / base).is_file():
+                files.append(directory / base)
+    # 去重并保持顺序
+    return list(dict.fromkeys(files))
+
+
+def analyze(files: list[Path], window: int, normalize_ids: bool, workers: int, chunk_size: int) -> LogAggregate:
+    tasks = list(plan_tasks(files, chunk_size))
+    result = LogAggregate(window, normalize_ids)
+    if workers <= 1 or len(tasks) <= 1:
+        for task in tasks:
+            result.merge(_run_task(task, window, normalize_ids))
+        return result
+    with ProcessPoolExecutor(max_workers=min(workers, len(tasks))) as pool:
+        futures = [pool.submit(_run_task, task, window, normalize_ids) for task in tasks]
+        for future in futures:
+            result.merge(future.result())
+    return result
+
+
+def _utc_iso(epoch: int) -> str:
+    """UTC 秒级时间戳转为不带时区后缀的 ISO 时间，与日志中的 timestamp 格式一致"""
+    return datetime.fromtimestamp(epoch, timezone.utc).replace(tzinfo=None).isoformat()
+
+
+def build_report(aggregate: LogAggregate, top: int) -> dict[str, Any]:
+    endpoints = []
+    for (method, path), stats in sorted(aggregate.by_key.items(), key=lambda item: -item[1][0])[:top]:
+        count, server_errors, client_errors, total_time, max_time, buckets, min_time = stats
+        endpoints.append({
+            "method": method,
+            "path": path,
+            "count": count,
+            "error_rate": round(server_errors / count, 6),
+            "client_error_rate": round(client_errors / count, 6),
+            "mean_ms": round(total_time / count * 1000, 3),
+            "p50_ms": round(percentile(buckets, count, 0.50, min_time, max_time) * 1000, 3),
+            "p95_ms": round(percentile(buckets, count, 0.95, min_time, max_time) * 1000, 3),
+            "p99_ms": round(percentile(buckets, count, 0.99, min_time, max_time) * 1000, 3),
+            "max_ms": round(max_time * 1000, 3),
+        })
+    throughput = [
+        {
+            "window_start": _utc_iso(start),
+            "requests": counts[0],
+            "requests_per_second": round(counts[0] / aggregate.window, 3),
+            "error_rate": round(counts[1] / counts[0], 6) if counts[0] else 0.0,
+        }
+        for start, counts in sorted(aggregate.windows.items())
+    ]
+    total_errors = sum(stats[1] for stats in aggregate.by_key.values())
+    return {
+        "records": aggregate.records,
+        "endpoints_total": len(aggregate.by_key),
+        "first_timestamp": _utc_iso(aggregate.first_ts) if aggregate.first_ts is not None else None,
+        "last_timestamp": _utc_iso(aggregate.last_ts) if aggregate.last_ts is not None else None,
+        "error_rate": round(total_errors / aggregate.records, 6) if aggregate.records else 0.0,
+        "window_seconds": aggregate.window,
+        "endpoints": endpoints,
+        "throughput": throughput,
+    }
+
+
+def print_report(report: dict[str, Any], files: list[Path], elapsed: float) -> None:
+    print(f"文件: {len(files)}  记录: {report['records']}  接口: {report['endpoints_total']}  "
+          f"耗时: {elapsed:.2f}s")
+    print(f"时间范围: {report['first_timestamp']} ~ {report['last_timestamp']}  "
+          f"5xx 比例: {report['error_rate'] * 100:.2f}%")
+    print()
+    print(f"{'METHOD':<7} {'PATH':<45} {'COUNT':>9} {'5XX%':>7} {'4XX%':>7} "
+          f"{'P50ms':>9} {'P95ms':>9} {'P99ms':>9} {'MAXms':>9}")
+    for row in report["endpoints"]:
+        print(f"{row['method']:<7} {row['path'][:45]:<45} {row['count']:>9} "
+              f"{row['error_rate'] * 100:>7.2f} {row['client_error_rate'] * 100:>7.2f} "
+              f"{row['p50_ms']:>9.2f} {row['p95_ms']:>9.2f} {row['p99_ms']:>9.2f} {row['max_ms']:>9.2f}")
+    print()
+    print(f"吞吐量（窗口 {report['window_seconds']}s）:")
+    for row in report["throughput"]:
+        print(f"  {row['window_start']}  {row['requests']:>9} 请求  "
+              f"{row['requests_per_second']:>9.2f} req/s  5xx {row['error_rate'] * 100:.2f}%")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="requests.log 离线分析")
+    parser.add_argument("inputs", nargs="+", help="日志文件或目录（目录下自动包含轮转和 .gz 文件）")
+    parser.add_argument("--rotated", action="store_true", help="对文件输入同时分析其轮转文件")
+    parser.add_argument("--window", type=int, default=60, help="吞吐量统计窗口（秒）")
+    parser.add_argument("--normalize-ids", action="store_true", help="把路径中的数字/UUID 段归并为 {id}")
+    parser.add_argument("--top", type=int, default=50, help="按请求数输出前 N 个接口")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="并行进程数")
+    parser.add_argument("--chunk-size-mb", type=int, default=256, help="普通文件切分区间大小（MB）")
+    parser.add_argument("--json", action="store_true", help="以 JSON 输出")
+    args = parser.parse_args()
+
+    if args.window <= 0:
+        parser.error("--window 必须大于 0")
+    files = expand_inputs(args.inputs, args.rotated)
+    if not files:
+        sys.exit("未找到日志文件")
+
+    start = time.perf_counter()
+    aggregate = analyze(files, args.window, args.normalize_ids, args.workers, args.chunk_size_mb * 1024 * 1024)
+    report = build_report(aggregate, args.top)
+    elapsed = time.perf_counter() - start
+
+    if args.json:
+        report["files"] = [str(path) for path in files]
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+    else:
+        print_report(report, files, elapsed)
+
+
+if __name__ == "__main__":
+    main()
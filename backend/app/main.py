@@ -1,21 +1,37 @@
-from fastapi import FastAPI, HTTPException
+from typing import Any
+
+from fastapi import Depends, FastAPI, HTTPException, Response
 from fastapi.middleware.cors import CORSMiddleware
 
-from app.api import auth, routes, users, roles
+from app.api import audit, auth, logs, profiling, roles, routes, users
+from app.api.deps import (
+    enforce_rate_limit,
+    limit_concurrency,
+    require_monitoring_access,
+)
+from app.core.concurrency import concurrency_limiter
 from app.core.config import settings
-from app.core.database import create_db_and_tables
+from app.core.database import get_statement_cache_stats, init_database
 from app.core.exceptions import TAdminException
-from app.core.global_middleware import (
-    GlobalExceptionHandler,
-    RequestLoggingMiddleware,
-    SecurityHeadersMiddleware,
-)
-from app.core.logging_config import setup_logging
+from app.core.executors import bind_route_executors, executor_stats
+from app.core.global_middleware import GlobalExceptionHandler, RequestContextMiddleware
+from app.core.invalidation import invalidation_bus
+from app.core.logging_config import get_logging_stats, setup_logging, shutdown_logging
+from app.core.loop_monitor import loop_monitor
+from app.core.metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE
+from app.core.metrics import metrics_exporter
+from app.core.profiling import continuous_profiler
+from app.core.response_cache import bind_response_cache, response_cache
+from app.core.single_flight import single_flight
+from app.core.tracing import span_exporter
+from app.services.audit import audit_writer
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
     version=settings.PROJECT_VERSION,
-    openapi_url="/api/v1/openapi.json"
+    openapi_url="/api/v1/openapi.json",
+    # 按路由配置的 IP / 全局限流（RATE_LIMIT_RULES），然后是按路由类别的自适应并发限制
+    dependencies=[Depends(enforce_rate_limit), Depends(limit_concurrency)],
 )
 
 # 配置日志系统
@@ -24,9 +40,8 @@ setup_logging()
 # 设置应用状态
 app.state.DEBUG = True  # 开发环境设为True
 
-# 配置全局中间件
-app.add_middleware(SecurityHeadersMiddleware)  # 安全头中间件
-app.add_middleware(RequestLoggingMiddleware)   # 请求日志中间件（带请求ID）
+# 配置全局中间件：请求ID、计时、安全头和访问日志（纯 ASGI，单层）
+app.add_middleware(RequestContextMiddleware)
 
 # 配置CORS
 app.add_middleware(
@@ -47,11 +62,34 @@ app.include_router(auth.router, prefix="/api/v1/auth", tags=["认证"])
 app.include_router(users.router, prefix="/api/v1/users", tags=["用户"])
 app.include_router(roles.router, prefix="/api/v1/roles", tags=["角色"])
 app.include_router(routes.router, prefix="/api/v1", tags=["路由"])
+app.include_router(audit.router, prefix="/api/v1/audit", tags=["审计"])
+app.include_router(logs.router, prefix="/api/v1/logging", tags=["日志"])
+app.include_router(profiling.router, prefix="/api/v1/profiling", tags=["性能剖析"])
 
 
 @app.on_event("startup")
 def on_startup() -> None:
-    create_db_and_tables()
+    init_database()
+    invalidation_bus.start()
+    audit_writer.start()
+    metrics_exporter.start()
+    if settings.TRACING_ENABLED:
+        span_exporter.start()
+    if settings.LOOP_MONITOR_ENABLED:
+        loop_monitor.start()
+    if settings.CONTINUOUS_PROFILING_ENABLED:
+        continuous_profiler.start()
+
+
+@app.on_event("shutdown")
+def on_shutdown() -> None:
+    loop_monitor.stop()
+    continuous_profiler.stop()
+    metrics_exporter.stop()
+    span_exporter.stop()
+    audit_writer.stop()
+    invalidation_bus.stop()
+    shutdown_logging()
 
 
 @app.get("/")
@@ -64,6 +102,48 @@ def health_check() -> dict[str, str]:
     return {"status": "healthy"}
 
 
+@app.get("/health/statement-cache", dependencies=[Depends(require_monitoring_access)])
+def statement_cache_stats() -> dict[str, Any]:
+    """SQL编译缓存命中率，用于确认热点查询复用了编译结果"""
+    return get_statement_cache_stats()
+
+
+@app.get("/health/logging", dependencies=[Depends(require_monitoring_access)])
+def logging_stats() -> dict[str, Any]:
+    """日志队列统计，用于确认过载时丢弃的日志数量"""
+    return get_logging_stats()
+
+
+@app.get("/health/event-loop", dependencies=[Depends(require_monitoring_access)])
+def event_loop_stats() -> dict[str, Any]:
+    """事件循环阻塞检测统计"""
+    return loop_monitor.stats()
+
+
+@app.get("/health/concurrency", dependencies=[Depends(require_monitoring_access)])
+def concurrency_stats() -> dict[str, Any]:
+    """各路由类别的自适应并发上限、在途请求数和拒绝数"""
+    return concurrency_limiter.stats()
+
+
+@app.get("/health/executors", dependencies=[Depends(require_monitoring_access)])
+def executors_stats() -> dict[str, Any]:
+    """各工作负载执行器的线程占用、排队和拒绝数"""
+    return executor_stats()
+
+
+@app.get("/health/response-cache", dependencies=[Depends(require_monitoring_access)])
+def response_cache_stats() -> dict[str, Any]:
+    """响应缓存命中率、条目数和失效统计，以及并发请求合并统计"""
+    return {**response_cache.stats(), "single_flight": single_flight.stats()}
+
+
+@app.get("/metrics", include_in_schema=False, dependencies=[Depends(require_monitoring_access)])
+async def metrics() -> Response:
+    """Prometheus 指标（多 worker 时汇总所有 worker 的快照）"""
+    return Response(content=await metrics_exporter.render(), media_type=METRICS_CONTENT_TYPE)
+
+
 @app.get("/test/error")
 def test_error() -> None:
     """测试异常处理端点"""
@@ -84,3 +164,9 @@ def test_general() -> None:
     """测试通用异常"""
     # 模拟未处理的异常
     raise ValueError("这是一个测试的通用异常")
+
+
+# 所有路由注册完成后，按 ROUTE_EXECUTORS 把同步端点绑定到各自的执行器，
+# 再包装 RESPONSE_CACHE_ROUTES 中的端点（缓存命中不占用执行器线程）
+bind_route_executors(app)
+bind_response_cache(app)
@@ -1,7 +1,9 @@
 from datetime import datetime
-from typing import List
+from typing import Any, cast
 
-from sqlmodel import Field, SQLModel, Relationship
+from sqlalchemy import JSON, Column
+from sqlalchemy.orm import QueryableAttribute
+from sqlmodel import Field, Relationship, SQLModel
 
 from app.core.security import get_password_hash, validate_password_strength
 
@@ -28,7 +30,7 @@ class Role(RoleBase, table=True):
     updated_at: datetime = Field(default_factory=datetime.utcnow)
 
     # 与用户的关联关系
-    users: List["User"] = Relationship(back_populates="roles", link_model=UserRoleLink)
+    users: list["User"] = Relationship(back_populates="roles", link_model=UserRoleLink)
 
 
 class UserBase(SQLModel):
@@ -48,7 +50,7 @@ class User(UserBase, table=True):
     updated_at: datetime = Field(default_factory=datetime.utcnow)
 
     # 与角色的关联关系
-    roles: List[Role] = Relationship(back_populates="users", link_model=UserRoleLink)
+    roles: list[Role] = Relationship(back_populates="users", link_model=UserRoleLink)
 
     def to_read(self) -> "UserRead":
         return UserRead(
@@ -69,24 +71,42 @@ class User(UserBase, table=True):
 
     def has_permission(self, permission: str) -> bool:
         """检查用户是否拥有指定权限（基于角色的简化权限检查）"""
-        # 简化权限模型：超级管理员拥有所有权限
+        permissions = permissions_for_key(self.permission_key())
+        return permissions is None or permission in permissions
+
+    def permission_key(self) -> str:
+        """权限集合标识：has_permission 结果相同的用户返回相同的值（用于共享缓存）"""
+        # 简化权限模型：超级管理员拥有所有权限，其余按角色优先级取第一个匹配的角色
         if self.is_superuser:
-            return True
+            return SUPERUSER_PERMISSION_KEY
+        for role_name in ROLE_PERMISSIONS:
+            if self.has_role(role_name):
+                return role_name
+        return NO_PERMISSION_KEY
+
+
+# User.roles 的 ORM 属性形式（sqlmodel 把关系字段标注为 list[Role]），用于 join 和 selectinload
+USER_ROLES = cast(QueryableAttribute[Any], User.roles)
+
 
-        # 管理员权限
-        if self.has_role("admin"):
-            admin_permissions = [
-                "user:read", "user:create", "user:update", "user:delete",
-                "role:read", "role:create", "role:update", "role:assign"
-            ]
-            return permission in admin_permissions
+# 角色 -> 权限（按优先级排列，同时拥有多个角色时使用第一个）
+ROLE_PERMISSIONS: dict[str, frozenset[str]] = {
+    "admin": frozenset({
+        "user:read", "user:create", "user:update", "user:delete",
+        "role:read", "role:create", "role:update", "role:assign",
+    }),
+    "user": frozenset({"profile:read", "profile:update"}),
+}
+SUPERUSER_PERMISSION_KEY = "superuser"
+NO_PERMISSION_KEY = "none"
+PERMISSION_KEYS = (SUPERUSER_PERMISSION_KEY, *ROLE_PERMISSIONS, NO_PERMISSION_KEY)
 
-        # 普通用户权限
-        if self.has_role("user"):
-            user_permissions = ["profile:read", "profile:update"]
-            return permission in user_permissions
 
-        return False
+def permissions_for_key(key: str) -> frozenset[str] | None:
+    """权限集合标识对应的权限，None 表示拥有所有权限"""
+    if key == SUPERUSER_PERMISSION_KEY:
+        return None
+    return ROLE_PERMISSIONS.get(key, frozenset())
 
 
 class UserCreate(SQLModel):
@@ -112,7 +132,7 @@ class UserRead(UserBase):
     id: int
     created_at: datetime
     updated_at: datetime
-    role_names: List[str] = []
+    role_names: list[str] = []
 
 
 class UserUpdate(SQLModel):
@@ -121,7 +141,7 @@ class UserUpdate(SQLModel):
     full_name: str | None = None
     password: str | None = None
     is_active: bool | None = None
-    role_ids: List[int] | None = None  # 用于分配角色
+    role_ids: list[int] | None = None  # 用于分配角色
 
 
 # Role 相关的 DTOs
@@ -144,7 +164,30 @@ class RoleUpdate(SQLModel):
 # 用户角色分配 DTO
 class UserRoleAssign(SQLModel):
     user_id: int
-    role_ids: List[int]
+    role_ids: list[int]
+
+
+# 审计日志
+class AuditEventBase(SQLModel):
+    action: str = Field(index=True)  # 例如 user.delete、role.assign、auth.login
+    actor_id: int | None = Field(default=None, index=True)
+    actor_username: str | None = None
+    target_type: str | None = Field(default=None, index=True)
+    target_id: str | None = Field(default=None, index=True)
+    details: dict[str, Any] | None = Field(default=None, sa_column=Column(JSON))
+    request_id: str | None = None
+    client_ip: str | None = None
+    created_at: datetime = Field(default_factory=datetime.utcnow, index=True)
+
+
+class AuditEvent(AuditEventBase, table=True):
+    __tablename__ = "audit_events"
+
+    id: int | None = Field(default=None, primary_key=True)
+
+
+class AuditEventRead(AuditEventBase):
+    id: int
 
 
 class Token(SQLModel):
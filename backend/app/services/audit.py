@@ -0,0 +1,187 @@
+"""
+异步批量审计日志
+
+路由中调用 record() 只是把事件放入进程内有界队列，不会在请求路径上执行
+INSERT。后台写入线程按批次（达到批量大小或刷新间隔）用多行 INSERT 落库，
+应用关闭时会把队列中剩余的事件全部写入。
+
+队列满时的背压策略：
+    drop   直接丢弃新事件并计数（默认，请求永不阻塞）
+    block  最多阻塞 AUDIT_BLOCK_TIMEOUT 秒等待队列空位，超时后丢弃并计数
+"""
+import logging
+import queue
+import threading
+import time
+from datetime import datetime
+from typing import Any
+
+from sqlalchemy import insert
+
+from app.core.config import settings
+from app.core.database import engine
+from app.core.global_middleware import client_ip_var, request_id_var
+from app.models import AuditEvent, User
+
+logger = logging.getLogger("audit")
+
+_STOP = object()
+
+
+class AuditLogWriter:
+    """审计事件的有界队列与后台批量写入线程"""
+
+    def __init__(
+        self,
+        max_queue_size: int = 10000,
+        batch_size: int = 200,
+        flush_interval: float = 1.0,
+        overflow_policy: str = "drop",
+        block_timeout: float = 0.05,
+    ):
+        if overflow_policy not in ("drop", "block"):
+            raise ValueError(f"未知的审计队列溢出策略: {overflow_policy}")
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.overflow_policy = overflow_policy
+        self.block_timeout = block_timeout
+        self._queue: queue.Queue[Any] = queue.Queue(maxsize=max_queue_size)
+        self._thread: threading.Thread | None = None
+        self._stop_event = threading.Event()
+        self._lock = threading.Lock()
+        self.enqueued = 0
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+
+    def record(
+        self,
+        action: str,
+        actor: User | None = None,
+        target_type: str | None = None,
+        target_id: Any = None,
+        details: dict[str, Any] | None = None,
+    ) -> bool:
+        """记录一条审计事件，返回是否成功入队"""
+        event = {
+            "action": action,
+            "actor_id": actor.id if actor else None,
+            "actor_username": actor.username if actor else None,
+            "target_type": target_type,
+            "target_id": str(target_id) if target_id is not None else None,
+            "details": details,
+            "request_id": request_id_var.get(),
+            "client_ip": client_ip_var.get(),
+            "created_at": datetime.utcnow(),
+        }
+        try:
+            if self.overflow_policy == "block":
+                self._queue.put(event, timeout=self.block_timeout)
+            else:
+                self._queue.put_nowait(event)
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+            return False
+        with self._lock:
+            self.enqueued += 1
+        return True
+
+    def _write_batch(self, batch: list[dict[str, Any]]) -> None:
+        try:
+            with engine.begin() as connection:
+                connection.execute(insert(AuditEvent).values(batch))
+        except Exception:
+            logger.exception(f"审计日志批量写入失败，丢失 {len(batch)} 条事件")
+            with self._lock:
+                self.failed += len(batch)
+            return
+        with self._lock:
+            self.written += len(batch)
+
+    def _run(self) -> None:
+        batch: list[dict[str, Any]] = []
+        deadline = time.monotonic() + self.flush_interval
+        stopping = False
+        while not stopping:
+            timeout = max(0.0, deadline - time.monotonic())
+            try:
+                item = self._queue.get(timeout=timeout)
+                if item is _STOP:
+                    stopping = True
+                else:
+                    batch.append(item)
+            except queue.Empty:
+                pass
+            if self._stop_event.is_set():
+                stopping = True
+
+            if batch and (stopping or len(batch) >= self.batch_size or time.monotonic() >= deadline):
+                self._write_batch(batch)
+                batch = []
+            if time.monotonic() >= deadline:
+                deadline = time.monotonic() + self.flush_interval
+
+        # 关闭时写入队列中剩余的事件
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not _STOP:
+                batch.append(item)
+            if len(batch) >= self.batch_size:
+                self._write_batch(batch)
+                batch = []
+        if batch:
+            self._write_batch(batch)
+
+    def start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """停止写入线程并刷新剩余事件"""
+        if self._thread is None:
+            return
+        self._stop_event.set()
+        # 停止标记只用于唤醒空队列上等待的线程；队列已满时线程不会阻塞在 get 上，
+        # 下一次取出事件后就会看到停止事件，关闭流程不必等待队列空位
+        try:
+            self._queue.put_nowait(_STOP)
+        except queue.Full:
+            pass
+        self._thread.join(timeout=timeout)
+        self._thread = None
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                "enqueued": self.enqueued,
+                "written": self.written,
+                "dropped": self.dropped,
+                "failed": self.failed,
+                "pending": self._queue.qsize(),
+            }
+
+
+audit_writer = AuditLogWriter(
+    max_queue_size=settings.AUDIT_QUEUE_SIZE,
+    batch_size=settings.AUDIT_BATCH_SIZE,
+    flush_interval=settings.AUDIT_FLUSH_INTERVAL,
+    overflow_policy=settings.AUDIT_OVERFLOW_POLICY,
+    block_timeout=settings.AUDIT_BLOCK_TIMEOUT,
+)
+
+
+def record_audit_event(
+    action: str,
+    actor: User | None = None,
+    target_type: str | None = None,
+    target_id: Any = None,
+    details: dict[str, Any] | None = None,
+) -> None:
+    audit_writer.record(action, actor, target_type, target_id, details)
@@ -0,0 +1,130 @@
+"""
+动态菜单（前端异步路由）
+
+菜单定义保存在 JSON 文件中（默认 app/menus.json，可通过 MENU_CONFIG_PATH 指定），
+每个菜单项可以声明访问所需的权限:
+    {"path": "/users", "name": "Users", "permission": "user:read", "meta": {...}}
+    {"path": "/system", "name": "System", "superuser": true, "children": [...]}
+没有声明权限的菜单项对所有登录用户可见；带 children 的菜单项至少有一个可见子项时才保留。
+
+加载时按权限集合（User.permission_key，见 models.ROLE_PERMISSIONS）把过滤后的菜单
+预先序列化为响应字节并计算 ETag，请求路径上只做一次字典查找。菜单文件修改（按
+MENU_RELOAD_INTERVAL 检查修改时间）时重新编译。编译结果只取决于菜单文件和固定的
+ROLE_PERMISSIONS；用户角色变更只改变其 permission_key，不需要重新编译。
+"""
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any
+
+from app.core.config import settings
+from app.models import PERMISSION_KEYS, SUPERUSER_PERMISSION_KEY, permissions_for_key
+
+logger = logging.getLogger("menus")
+
+DEFAULT_MENU_PATH = Path(__file__).resolve().parent.parent / "menus.json"
+
+# 仅用于过滤，不返回给前端的字段
+ACCESS_FIELDS = ("permission", "superuser")
+
+
+class CompiledMenu:
+    __slots__ = ("body", "etag")
+
+    def __init__(self, body: bytes) -> None:
+        self.body = body
+        self.etag = f'"{hashlib.sha1(body).hexdigest()[:20]}"'
+
+
+def _visible(item: dict[str, Any], permission_key: str, permissions: frozenset[str] | None) -> bool:
+    if item.get("superuser") and permission_key != SUPERUSER_PERMISSION_KEY:
+        return False
+    permission = item.get("permission")
+    return permission is None or permissions is None or permission in permissions
+
+
+def filter_menu(
+    items: list[dict[str, Any]],
+    permission_key: str,
+) -> list[dict[str, Any]]:
+    """按权限集合过滤菜单树，去掉访问控制字段"""
+    permissions = permissions_for_key(permission_key)
+    result = []
+    for item in items:
+        if not _visible(item, permission_key, permissions):
+            continue
+        visible = {key: value for key, value in item.items() if key not in ACCESS_FIELDS}
+        if "children" in item:
+            children = filter_menu(item["children"], permission_key)
+            if not children:
+                continue
+            visible["children"] = children
+        result.append(visible)
+    return result
+
+
+def compile_menus(items: list[dict[str, Any]]) -> dict[str, CompiledMenu]:
+    """为每个权限集合生成响应字节（与 JSONResponse 的编码方式一致）"""
+    compiled = {}
+    for permission_key in PERMISSION_KEYS:
+        content = {"success": True, "data": filter_menu(items, permission_key)}
+        body = json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+        compiled[permission_key] = CompiledMenu(body)
+    return compiled
+
+
+class MenuRegistry:
+    """菜单定义的加载、预编译和变更检测"""
+
+    def __init__(self, path: str | Path, reload_interval: float = 5.0) -> None:
+        self.path = Path(path)
+        self.reload_interval = reload_interval
+        self.builds = 0
+        self._compiled: dict[str, CompiledMenu] = {}
+        self._mtime: float | None = None
+        self._next_check = 0.0
+        self._lock = threading.Lock()
+
+    def load(self) -> None:
+        """读取菜单文件并重新编译；文件无效时保留上一次的编译结果"""
+        with self._lock:
+            try:
+                mtime = os.stat(self.path).st_mtime
+                items = json.loads(self.path.read_text(encoding="utf-8"))
+                if not isinstance(items, list):
+                    raise ValueError("菜单定义必须是数组")
+                compiled = compile_menus(items)
+            except (OSError, ValueError) as e:
+                logger.error(f"加载菜单定义失败: {self.path}: {e}")
+                if not self._compiled:
+                    raise
+                return
+            self._compiled = compiled
+            self._mtime = mtime
+            self.builds += 1
+        logger.info(f"菜单已编译: {self.path.name}，{len(compiled)} 个权限集合")
+
+    def get(self, permission_key: str) -> CompiledMenu:
+        now = time.monotonic()
+        if now >= self._next_check:
+            self._next_check = now + self.reload_interval
+            self._reload_if_changed()
+        return self._compiled[permission_key]
+
+    def _reload_if_changed(self) -> None:
+        try:
+            mtime = os.stat(self.path).st_mtime
+        except OSError:
+            return
+        if mtime != self._mtime:
+            self.load()
+
+
+menu_registry = MenuRegistry(
+    settings.MENU_CONFIG_PATH or DEFAULT_MENU_PATH, settings.MENU_RELOAD_INTERVAL
+)
+menu_registry.load()
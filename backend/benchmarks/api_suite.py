@@ -0,0 +1,306 @@
+"""
+API 热点路径基准测试套件
+
+通过 httpx.ASGITransport 在进程内驱动完整应用（无网络），先用 app.data_generator
+向临时 SQLite 数据库批量写入指定数量的用户、角色和用户-角色关联，再依次运行各场景：
+每个场景由固定数量的并发协程（闭环）发送指定数量的请求，统计吞吐量和延迟分位数。
+
+场景:
+    login            POST /api/v1/auth/login（bcrypt 校验）
+    refresh_token    POST /api/v1/auth/refresh-token
+    users_me         GET  /api/v1/users/me
+    users_search     GET  /api/v1/users/?search=...
+    users_by_role    GET  /api/v1/users/?role_name=...
+    role_assign      POST /api/v1/roles/assign（写操作，同时使相关响应缓存失效）
+    async_routes     GET  /api/v1/get-async-routes
+
+结果写入 JSON；指定 --baseline 时与基线比较，任一场景的吞吐量下降或 p50 延迟上升
+超过 --threshold 即以非零状态码退出，可直接用于 CI 回归检查。测试期间关闭限流和
+自适应并发限制（它们会把超出配额的请求直接拒绝），其余配置与默认配置一致。
+
+用法（在 backend 目录下）:
+    python -m benchmarks.api_suite --users 10000 --roles 20 --output /tmp/api.json
+    python -m benchmarks.api_suite --baseline benchmarks/api_baseline.json --threshold 0.25
+    python -m benchmarks.api_suite --current /tmp/api.json --baseline benchmarks/api_baseline.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+from collections.abc import Callable
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+
+import httpx
+
+BENCH_PASSWORD = "Bench#Pass2024"
+ADMIN_PASSWORD = "admin123"
+
+# 场景名 -> 相对请求数（bcrypt 登录单次耗时是其他场景的上百倍）
+SCENARIO_WEIGHTS: dict[str, float] = {
+    "login": 0.05,
+    "refresh_token": 1.0,
+    "users_me": 1.0,
+    "users_search": 1.0,
+    "users_by_role": 1.0,
+    "role_assign": 0.5,
+    "async_routes": 1.0,
+}
+
+# 与基线比较的指标：名称 -> 数值越大越好
+COMPARED_METRICS: dict[str, bool] = {"rps": True, "p50_ms": False}
+
+
+def _seed(users: int, roles: int, seed: int) -> list[str]:
+    """创建管理员后用数据生成工具批量写入用户和角色关联，返回部分用户名用于登录场景"""
+    from sqlalchemy import insert, select
+    from sqlmodel import col
+
+    from app.core.database import create_db_and_tables, engine
+    from app.core.security import get_password_hash
+    from app.data_generator import generate
+    from app.models import User
+
+    create_db_and_tables()
+    now = datetime.utcnow()
+    with engine.begin() as conn:
+        conn.execute(insert(User), [{
+            "username": "admin", "email": "admin@example.com", "full_name": "系统管理员",
+            "is_active": True, "is_superuser": True,
+            "hashed_password": get_password_hash(ADMIN_PASSWORD),
+            "created_at": now, "updated_at": now,
+        }])
+    # 生成的用户ID从 2 开始（1 为管理员），角色为 role0..role{n-1}
+    generate(
+        users,
+        {f"role{i}": 1.0 for i in range(roles)},
+        extra_role_ratio=0.5,
+        password=BENCH_PASSWORD,
+        hash_pool=1,
+        seed=seed,
+    )
+    with engine.connect() as conn:
+        return list(conn.execute(
+            select(col(User.username)).where(col(User.id) > 1, col(User.is_active)).order_by(col(User.id)).limit(1000)
+        ).scalars())
+
+
+def _percentile(sorted_values: list[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(q * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+async def _run_scenario(
+    make_request: Callable[[int], Any],
+    requests: int,
+    concurrency: int,
+    warmup: int,
+) -> dict[str, float]:
+    for i in range(warmup):
+        await make_request(i)
+
+    latencies: list[float] = []
+    errors = 0
+    next_index = 0
+
+    async def worker() -> None:
+        nonlocal next_index, errors
+        while next_index < requests:
+            index = next_index
+            next_index += 1
+            start = time.perf_counter()
+            response = await make_request(index)
+            latencies.append(time.perf_counter() - start)
+            if response.status_code >= 400:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        "requests": requests,
+        "errors": errors,
+        "rps": round(requests / elapsed, 1),
+        "mean_ms": round(statistics.fmean(latencies) * 1000, 3),
+        "p50_ms": round(_percentile(latencies, 0.50) * 1000, 3),
+        "p90_ms": round(_percentile(latencies, 0.90) * 1000, 3),
+        "p99_ms": round(_percentile(latencies, 0.99) * 1000, 3),
+        "max_ms": round(latencies[-1] * 1000, 3),
+    }
+
+
+async def _run_suite(args: argparse.Namespace, usernames: list[str]) -> dict[str, Any]:
+    from app.data_generator import SURNAMES
+    from app.main import app
+
+    # 搜索词：姓氏的汉字或拼音（匹配 full_name 或 username/email）
+    search_terms = [term for pair in SURNAMES for term in pair]
+
+    rng = random.Random(args.seed)
+    # 未处理的异常按 500 计入错误数，而不是中断整个测试
+    transport = httpx.ASGITransport(app=app, raise_app_exceptions=False, client=("127.0.0.1", 50000))
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            response = await client.post(
+                "/api/v1/auth/sessions", json={"username": "admin", "password": ADMIN_PASSWORD}
+            )
+            response.raise_for_status()
+            tokens = response.json()["data"]
+            headers = {"Authorization": f"Bearer {tokens['accessToken']}"}
+
+            def login(_: int) -> Any:
+                return client.post(
+                    "/api/v1/auth/login", data={"username": rng.choice(usernames), "password": BENCH_PASSWORD}
+                )
+
+            def refresh_token(_: int) -> Any:
+                return client.post(
+                    "/api/v1/auth/refresh-token", json={"refresh_token": tokens["refreshToken"]}
+                )
+
+            def users_me(_: int) -> Any:
+                return client.get("/api/v1/users/me", headers=headers)
+
+            def users_search(_: int) -> Any:
+                params: dict[str, str | int] = {"search": rng.choice(search_terms), "limit": 20}
+                return client.get("/api/v1/users/", params=params, headers=headers)
+
+            def users_by_role(_: int) -> Any:
+                role = f"role{rng.randrange(args.roles)}"
+                return client.get("/api/v1/users/", params={"role_name": role, "limit": 20}, headers=headers)
+
+            def role_assign(i: int) -> Any:
+                # 按顺序轮换用户：同一用户的并发角色分配会在删除旧关联时冲突
+                payload = {
+                    "user_id": i % args.users + 2,
+                    "role_ids": [rng.randrange(args.roles) + 1],
+                }
+                return client.post("/api/v1/roles/assign", json=payload, headers=headers)
+
+            def async_routes(_: int) -> Any:
+                return client.get("/api/v1/get-async-routes", headers=headers)
+
+            scenarios: dict[str, Callable[[int], Any]] = {
+                "login": login,
+                "refresh_token": refresh_token,
+                "users_me": users_me,
+                "users_search": users_search,
+                "users_by_role": users_by_role,
+                "role_assign": role_assign,
+                "async_routes": async_routes,
+            }
+            selected = args.scenarios or list(scenarios)
+            results: dict[str, dict[str, float]] = {}
+            for name in selected:
+                requests = max(args.concurrency, int(args.requests * SCENARIO_WEIGHTS[name]))
+                results[name] = await _run_scenario(scenarios[name], requests, args.concurrency, args.warmup)
+                print(
+                    f"{name:<16}{results[name]['rps']:>10.1f}{results[name]['p50_ms']:>10.2f}"
+                    f"{results[name]['p90_ms']:>10.2f}{results[name]['p99_ms']:>10.2f}"
+                    f"{results[name]['errors']:>8}",
+                    file=sys.stderr,
+                )
+    return results
+
+
+def compare(current: dict[str, Any], baseline: dict[str, Any], threshold: float) -> list[str]:
+    """返回超出阈值的回归项描述，列表为空表示没有回归"""
+    regressions = []
+    for name, base in baseline["scenarios"].items():
+        result = current["scenarios"].get(name)
+        if result is None:
+            continue
+        for metric, higher_is_better in COMPARED_METRICS.items():
+            old, new = base[metric], result[metric]
+            if old <= 0:
+                continue
+            change = (new - old) / old
+            regressed = change < -threshold if higher_is_better else change > threshold
+            if regressed:
+                regressions.append(f"{name}.{metric}: {old} -> {new} ({change:+.1%})")
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="API 热点路径基准测试套件")
+    parser.add_argument("--users", type=int, default=2000, help="预置用户数量")
+    parser.add_argument("--roles", type=int, default=10, help="预置角色数量")
+    parser.add_argument("--requests", type=int, default=1000, help="每个场景的基准请求数（按场景权重缩放）")
+    parser.add_argument("--concurrency", type=int, default=10, help="并发协程数")
+    parser.add_argument("--warmup", type=int, default=5, help="每个场景的预热请求数")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--scenarios", nargs="*", choices=list(SCENARIO_WEIGHTS), help="只运行指定场景")
+    parser.add_argument("--output", help="结果 JSON 输出路径（默认输出到标准输出）")
+    parser.add_argument("--baseline", help="与指定的基线 JSON 比较")
+    parser.add_argument("--threshold", type=float, default=0.2, help="允许的回归比例")
+    parser.add_argument("--current", help="不运行测试，直接用已有结果与基线比较")
+    args = parser.parse_args()
+    # 运行前会切换到临时工作目录，先把文件参数解析为绝对路径
+    for name in ("output", "baseline", "current"):
+        if getattr(args, name):
+            setattr(args, name, str(Path(getattr(args, name)).resolve()))
+
+    if args.current:
+        current = json.loads(Path(args.current).read_text(encoding="utf-8"))
+    else:
+        # 必须在导入应用模块之前设置：临时数据库和工作目录，关闭限流和并发限制
+        workdir = tempfile.mkdtemp(prefix="tadmin-bench-")
+        os.chdir(workdir)
+        os.environ["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{workdir}/bench.db"
+        os.environ["DB_AUTO_CREATE_TABLES"] = "true"
+        os.environ["INVALIDATION_BUS_PATH"] = f"{workdir}/invalidation_bus.db"
+        os.environ["RATE_LIMIT_ENABLED"] = "false"
+        os.environ["CONCURRENCY_LIMIT_ENABLED"] = "false"
+
+        import logging
+
+        logging.disable(logging.INFO)
+        seed_start = time.perf_counter()
+        usernames = _seed(args.users, args.roles, args.seed)
+        print(f"数据准备完成: {args.users} 个用户，{args.roles} 个角色，"
+              f"{time.perf_counter() - seed_start:.1f}s", file=sys.stderr)
+        print(f"{'场景':<16}{'请求/秒':>10}{'p50':>10}{'p90':>10}{'p99':>10}{'错误':>8}", file=sys.stderr)
+        import fastapi
+
+        current = {
+            "meta": {
+                "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+                "python": platform.python_version(),
+                "fastapi": fastapi.__version__,
+                "platform": platform.platform(),
+                "users": args.users,
+                "roles": args.roles,
+                "concurrency": args.concurrency,
+                "requests": args.requests,
+            },
+            "scenarios": asyncio.run(_run_suite(args, usernames)),
+        }
+        text = json.dumps(current, ensure_ascii=False, indent=2)
+        if args.output:
+            Path(args.output).write_text(text + "\n", encoding="utf-8")
+        else:
+            print(text)
+
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text(encoding="utf-8"))
+        regressions = compare(current, baseline, args.threshold)
+        if regressions:
+            print(f"性能回归（阈值 {args.threshold:.0%}）:", file=sys.stderr)
+            for line in regressions:
+                print(f"  {line}", file=sys.stderr)
+            sys.exit(1)
+        print(f"与基线相比没有超过 {args.threshold:.0%} 的回归", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""
+持续采样剖析开销测试
+
+以原始 ASGI 调用驱动带 RequestContextMiddleware 的应用（同步端点在线程池中执行
+CPU 密集代码，异步端点在事件循环中执行），分别在关闭和开启持续剖析的情况下运行
+相同时长，统计采样线程自身消耗的 CPU 占比以及吞吐量变化。采样线程 CPU 占比
+超出预算（默认 2%）时以非零状态码退出，可直接用于 CI 回归检查。
+
+用法（在 backend 目录下）:
+    python -m benchmarks.continuous_profiler --duration 5 --hz 100 --budget 0.02
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+
+from fastapi import FastAPI
+from starlette.types import ASGIApp, Message
+
+
+def _build_app() -> FastAPI:
+    from app.core.global_middleware import RequestContextMiddleware
+
+    app = FastAPI()
+    app.state.DEBUG = True
+
+    @app.get("/sync/{item_id}")
+    def sync_work(item_id: int) -> dict[str, int]:
+        total = 0
+        for i in range(20000):
+            total += i * item_id
+        return {"total": total}
+
+    @app.get("/async")
+    async def async_work() -> dict[str, int]:
+        return {"total": sum(range(2000))}
+
+    app.add_middleware(RequestContextMiddleware)
+    return app
+
+
+async def _call(app: ASGIApp, path: str) -> int:
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": b"",
+        "root_path": "",
+        "headers": [(b"host", b"testserver"), (b"user-agent", b"bench")],
+        "client": ("127.0.0.1", 50000),
+        "server": ("testserver", 80),
+    }
+    status = 0
+
+    async def receive() -> Message:
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message: Message) -> None:
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+
+    await app(scope, receive, send)
+    return status
+
+
+async def _run(app: ASGIApp, duration: float, concurrency: int, profile: bool) -> dict[str, float]:
+    from app.core.profiling import continuous_profiler
+
+    assert await _call(app, "/async") == 200
+    if profile:
+        continuous_profiler.start()
+    completed = 0
+    deadline = time.perf_counter() + duration
+
+    async def worker(index: int) -> None:
+        nonlocal completed
+        while time.perf_counter() < deadline:
+            path = f"/sync/{index}" if completed % 2 else "/async"
+            assert await _call(app, path) == 200
+            completed += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker(i) for i in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    stats = continuous_profiler.stats()
+    if profile:
+        continuous_profiler.stop()
+    return {
+        "requests_per_second": completed / elapsed,
+        "cpu_ratio": stats["cpu_ratio"],
+        "samples": stats["samples"],
+        "effective_hz": stats["samples"] / elapsed,
+        "interval_ms": stats["interval_ms"],
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="持续采样剖析开销测试")
+    parser.add_argument("--duration", type=float, default=5.0, help="每轮运行时长（秒）")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--hz", type=float, default=100.0, help="采样频率")
+    parser.add_argument("--budget", type=float, default=0.02, help="采样线程 CPU 占比上限")
+    args = parser.parse_args()
+
+    # 必须在导入应用模块之前设置，剖析结果写入临时目录
+    workdir = tempfile.mkdtemp(prefix="tadmin-profiler-")
+    os.environ["PROFILE_DIR"] = workdir
+    os.environ["CONTINUOUS_PROFILE_HZ"] = str(args.hz)
+    os.environ["CONTINUOUS_PROFILE_CPU_BUDGET"] = str(args.budget)
+
+    import logging
+
+    logging.disable(logging.INFO)
+    app = _build_app()
+
+    baseline = asyncio.run(_run(app, args.duration, args.concurrency, profile=False))
+    profiled = asyncio.run(_run(app, args.duration, args.concurrency, profile=True))
+    slowdown = 1 - profiled["requests_per_second"] / baseline["requests_per_second"]
+
+    result = {
+        "hz": args.hz,
+        "budget": args.budget,
+        "baseline_rps": round(baseline["requests_per_second"], 1),
+        "profiled_rps": round(profiled["requests_per_second"], 1),
+        "throughput_change": round(-slowdown, 4),
+        "sampler_cpu_ratio": profiled["cpu_ratio"],
+        "effective_hz": round(profiled["effective_hz"], 1),
+        "final_interval_ms": profiled["interval_ms"],
+    }
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+
+    if profiled["cpu_ratio"] > args.budget:
+        print(f"采样线程 CPU 占比 {profiled['cpu_ratio']:.4f} 超出预算 {args.budget}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
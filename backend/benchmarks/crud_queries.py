@@ -0,0 +1,96 @@
+"""
+CRUD 热点查询基准测试
+
+对比每次调用都重新构建 select() 与使用预构建语句 + 绑定参数的单次调用开销，
+并输出 SQLAlchemy 编译缓存命中率。
+
+用法（在 backend 目录下）:
+    python -m benchmarks.crud_queries --users 1000 --calls 20000
+"""
+import argparse
+import time
+from collections.abc import Callable
+from typing import Any
+
+from sqlalchemy import event
+from sqlalchemy.pool import StaticPool
+from sqlmodel import Session, SQLModel, create_engine, select
+
+from app import crud
+from app.core.database import StatementCacheStats
+from app.models import Role, User
+
+
+def _seed(session: Session, users: int) -> None:
+    session.add(Role(name="admin", description="管理员"))
+    session.add(Role(name="user", description="普通用户"))
+    for i in range(users):
+        session.add(User(
+            username=f"user{i}",
+            email=f"user{i}@example.com",
+            full_name=f"用户{i}",
+            hashed_password="x",
+        ))
+    session.commit()
+
+
+def _adhoc_get_user_by_username(session: Session, username: str) -> User | None:
+    statement = select(User).where(User.username == username)
+    return session.exec(statement).first()
+
+
+def _adhoc_get_role_by_name(session: Session, name: str) -> Role | None:
+    statement = select(Role).where(Role.name == name)
+    return session.exec(statement).first()
+
+
+def _measure(
+    session: Session, func: Callable[[Session, str], Any], keys: list[str], calls: int
+) -> float:
+    start = time.perf_counter()
+    for i in range(calls):
+        func(session, keys[i % len(keys)])
+    return (time.perf_counter() - start) / calls * 1_000_000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="CRUD 热点查询基准测试")
+    parser.add_argument("--users", type=int, default=1000, help="预置用户数量")
+    parser.add_argument("--calls", type=int, default=20000, help="每个场景的调用次数")
+    args = parser.parse_args()
+
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    stats = StatementCacheStats()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _record(
+        _conn: Any, _cursor: Any, _statement: Any, _parameters: Any, context: Any, _executemany: bool
+    ) -> None:
+        stats.record(getattr(context, "cache_hit", None))
+
+    SQLModel.metadata.create_all(engine)
+    usernames = [f"user{i}" for i in range(args.users)]
+
+    with Session(engine) as session:
+        _seed(session, args.users)
+
+        scenarios: list[tuple[str, Callable[[Session, str], Any], list[str]]] = [
+            ("get_user_by_username (每次构建)", _adhoc_get_user_by_username, usernames),
+            ("get_user_by_username (预构建)", crud.get_user_by_username, usernames),
+            ("get_role_by_name (每次构建)", _adhoc_get_role_by_name, ["admin", "user"]),
+            ("get_role_by_name (预构建)", crud.get_role_by_name, ["admin", "user"]),
+        ]
+
+        print(f"{'场景':<36}{'单次耗时(µs)':>14}{'缓存命中率':>12}")
+        for name, func, keys in scenarios:
+            # 预热，确保编译结果已进入缓存
+            func(session, keys[0])
+            stats.reset()
+            per_call = _measure(session, func, keys, args.calls)
+            print(f"{name:<36}{per_call:>14.1f}{stats.snapshot()['hit_rate']:>12.2%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,646 @@
+"""
+HTTP 负载生成工具（开环 / 闭环，HDR 延迟直方图）
+
+对本机运行的真实服务（uvicorn 进程）施加负载，用于容量规划:
+    - 开环（open）：按固定到达率（或泊松到达）发送请求，不受服务端响应速度影响；
+      延迟从计划发送时间开始计算，因此服务变慢时排队等待的时间也会计入
+      （coordinated omission 校正），同时记录从实际发送开始的服务时间
+    - 闭环（closed）：固定数量的并发连接循环发送；指定 --expected-interval-ms 时
+      按 HDR 的 recordCorrectedValue 方式为超过预期间隔的请求补齐缺失的样本
+
+场景由带权重的步骤组成，可以混合登录、刷新令牌和带认证的读取请求；认证令牌在
+开始时通过 /api/v1/auth/sessions 获取，刷新成功后替换为新令牌。内置场景见
+SCENARIOS，也可以传入同样结构的 JSON 文件:
+    {"name": "custom", "steps": [
+        {"name": "login", "action": "login", "weight": 1},
+        {"name": "refresh", "action": "refresh", "weight": 2},
+        {"name": "users_me", "action": "request", "path": "/api/v1/users/me", "weight": 20}
+    ]}
+
+结果包含每个步骤和总体的延迟分位数（校正后/未校正）、吞吐量和错误数，写入 JSON，
+并可导出 HDR 格式的百分位分布（.hgrm，可用 HdrHistogram 绘图工具查看）。
+--compare 对多个结果文件（例如不同提交的运行结果）生成对比报告。
+
+用法（在 backend 目录下）:
+    python -m benchmarks.load_generator --spawn --seed-users 10000 --mode open --rate 200 --duration 30
+    python -m benchmarks.load_generator --url http://127.0.0.1:8000 --credentials admin:admin123 \\
+        --mode closed --concurrency 32 --duration 60 --scenario reads --output /tmp/run.json --hgrm /tmp/run
+    python -m benchmarks.load_generator --compare /tmp/base.json /tmp/run.json --threshold 0.2
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import shutil
+import socket
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from bisect import bisect
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from itertools import accumulate
+from pathlib import Path
+from typing import Any
+
+import httpx
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+API_PREFIX = "/api/v1"
+# --spawn 时生成用户的密码
+SPAWN_PASSWORD = "Load#Pass2024"
+
+SCENARIOS: dict[str, dict[str, Any]] = {
+    "mixed": {"name": "mixed", "steps": [
+        {"name": "login", "action": "login", "weight": 1},
+        {"name": "refresh", "action": "refresh", "weight": 4},
+        {"name": "users_me", "action": "request", "path": "/api/v1/users/me", "weight": 40},
+        {"name": "users_list", "action": "request", "path": "/api/v1/users/?limit=20", "weight": 20},
+        {"name": "roles_list", "action": "request", "path": "/api/v1/roles/", "weight": 10},
+        {"name": "async_routes", "action": "request", "path": "/api/v1/get-async-routes", "weight": 25},
+    ]},
+    "reads": {"name": "reads", "steps": [
+        {"name": "users_me", "action": "request", "path": "/api/v1/users/me", "weight": 50},
+        {"name": "users_list", "action": "request", "path": "/api/v1/users/?limit=20", "weight": 20},
+        {"name": "async_routes", "action": "request", "path": "/api/v1/get-async-routes", "weight": 30},
+    ]},
+    "auth": {"name": "auth", "steps": [
+        {"name": "login", "action": "login", "weight": 1},
+        {"name": "refresh", "action": "refresh", "weight": 3},
+    ]},
+}
+ACTIONS = ("login", "refresh", "request")
+
+# 汇总中输出的分位数：字段名 -> 百分位
+SUMMARY_PERCENTILES = {"p50_ms": 50.0, "p90_ms": 90.0, "p99_ms": 99.0, "p99_9_ms": 99.9}
+
+
+class HdrHistogram:
+    """
+    HDR 风格的对数-线性直方图：记录整数微秒，保持指定的有效数字精度
+
+    每个 2 的幂区间分为固定数量的线性子桶，桶以下界为键保存在字典中，
+    分位数返回所在桶的上界（与 HdrHistogram 的 highestEquivalentValue 一致）。
+    """
+
+    def __init__(self, significant_figures: int = 3) -> None:
+        self.significant_figures = significant_figures
+        self.sub_bucket_bits = math.ceil(math.log2(2 * 10 ** significant_figures))
+        self.counts: dict[int, int] = {}
+        self.total = 0
+        self.min = 0
+        self.max = 0
+        self._sum = 0.0
+        self._sum_squares = 0.0
+
+    def _lowest_equivalent(self, value: int) -> int:
+        shift = max(0, value.bit_length() - self.sub_bucket_bits)
+        return (value >> shift) << shift
+
+    def _highest_equivalent(self, lowest: int) -> int:
+        shift = max(0, lowest.bit_length() - self.sub_bucket_bits)
+        return lowest + (1 << shift) - 1
+
+    def record(self, value: int, count: int = 1) -> None:
+        value = max(0, int(value))
+        key = self._lowest_equivalent(value)
+        self.counts[key] = self.counts.get(key, 0) + count
+        self.min = value if self.total == 0 else min(self.min, value)
+        self.max = max(self.max, value)
+        self.total += count
+        self._sum += value * count
+        self._sum_squares += value * value * count
+
+    def record_corrected(self, value: int, expected_interval: int) -> None:
+        """记录一个值，并补齐请求阻塞期间本应发出的请求（coordinated omission 校正）"""
+        self.record(value)
+        if expected_interval <= 0:
+            return
+        missing = value - expected_interval
+        while missing >= expected_interval:
+            self.record(missing)
+            missing -= expected_interval
+
+    def merge(self, other: "HdrHistogram") -> None:
+        for key, count in other.counts.items():
+            self.counts[key] = self.counts.get(key, 0) + count
+        if other.total:
+            self.min = other.min if self.total == 0 else min(self.min, other.min)
+            self.max = max(self.max, other.max)
+        self.total += other.total
+        self._sum += other._sum
+        self._sum_squares += other._sum_squares
+
+    @property
+    def mean(self) -> float:
+        return self._sum / self.total if self.total else 0.0
+
+    @property
+    def stddev(self) -> float:
+        if not self.total:
+            return 0.0
+        return math.sqrt(max(0.0, self._sum_squares / self.total - self.mean ** 2))
+
+    def _iter_cumulative(self) -> Iterator[tuple[int, int]]:
+        cumulative = 0
+        for key in sorted(self.counts):
+            cumulative += self.counts[key]
+            yield key, cumulative
+
+    def value_at_percentile(self, percentile: float) -> int:
+        if not self.total:
+            return 0
+        target = max(1, math.ceil(percentile / 100 * self.total))
+        for key, cumulative in self._iter_cumulative():
+            if cumulative >= target:
+                return min(self._highest_equivalent(key), self.max)
+        return self.max
+
+    def percentile_distribution(self, ticks_per_half_distance: int = 5, scale: float = 1000.0) -> str:
+        """HDR 百分位分布文本（.hgrm 格式），数值除以 scale（默认微秒 -> 毫秒）"""
+        lines = [f"{'Value':>12} {'Percentile':>14} {'TotalCount':>10} {'1/(1-Percentile)':>14}", ""]
+        if self.total:
+            cumulative = list(self._iter_cumulative())
+            counts = [count for _, count in cumulative]
+            percentile = 0.0
+            while True:
+                target = max(1, math.ceil(percentile / 100 * self.total))
+                index = bisect(counts, target - 1)
+                key, count = cumulative[index]
+                value = min(self._highest_equivalent(key), self.max) / scale
+                if count >= self.total:
+                    lines.append(f"{value:12.3f} {1.0:14.12f} {count:10d}")
+                    break
+                inverse = 1 / (1 - percentile / 100)
+                lines.append(f"{value:12.3f} {percentile / 100:14.12f} {count:10d} {inverse:14.2f}")
+                # 与 HdrHistogram 相同的刻度：每接近 100% 一半距离，输出固定数量的刻度
+                half_distances = 2 ** (int(math.log2(inverse)) + 1)
+                percentile += 100 / (ticks_per_half_distance * half_distances)
+        lines.append(f"#[Mean    = {self.mean / scale:12.3f}, StdDeviation   = {self.stddev / scale:12.3f}]")
+        lines.append(f"#[Max     = {self.max / scale:12.3f}, Total count    = {self.total:12d}]")
+        lines.append(f"#[Buckets = {len(self.counts):12d}, SubBuckets     = {1 << self.sub_bucket_bits:12d}]")
+        return "\n".join(lines) + "\n"
+
+    def summary(self) -> dict[str, Any]:
+        result: dict[str, Any] = {"count": self.total, "mean_ms": round(self.mean / 1000, 3)}
+        for name, percentile in SUMMARY_PERCENTILES.items():
+            result[name] = round(self.value_at_percentile(percentile) / 1000, 3)
+        result["max_ms"] = round(self.max / 1000, 3)
+        return result
+
+
+@dataclass
+class StepStats:
+    corrected: HdrHistogram = field(default_factory=HdrHistogram)
+    uncorrected: HdrHistogram = field(default_factory=HdrHistogram)
+    statuses: dict[str, int] = field(default_factory=dict)
+    errors: int = 0
+
+    def record(self, status: str, corrected_us: int, service_us: int, expected_interval_us: int = 0) -> None:
+        self.statuses[status] = self.statuses.get(status, 0) + 1
+        if not status.isdigit() or int(status) >= 400:
+            self.errors += 1
+        if expected_interval_us:
+            self.corrected.record_corrected(corrected_us, expected_interval_us)
+        else:
+            self.corrected.record(corrected_us)
+        self.uncorrected.record(service_us)
+
+
+@dataclass
+class AuthSession:
+    username: str
+    password: str
+    access_token: str = ""
+    refresh_token: str = ""
+
+
+class LoadContext:
+    """一次运行的共享状态：HTTP 客户端、认证会话、步骤选择和统计"""
+
+    def __init__(
+        self,
+        client: httpx.AsyncClient,
+        scenario: dict[str, Any],
+        sessions: list[AuthSession],
+        seed: int,
+        record_after: float,
+    ) -> None:
+        self.client = client
+        self.steps: list[dict[str, Any]] = scenario["steps"]
+        self.sessions = sessions
+        self.rng = random.Random(seed)
+        self.cum_weights = list(accumulate(float(step.get("weight", 1)) for step in self.steps))
+        self.stats = {step["name"]: StepStats() for step in self.steps}
+        self.record_after = record_after
+        self.max_schedule_lag = 0.0
+        self._next_session = 0
+
+    def pick_step(self) -> dict[str, Any]:
+        return self.steps[bisect(self.cum_weights, self.rng.random() * self.cum_weights[-1])]
+
+    def next_session(self) -> AuthSession:
+        session = self.sessions[self._next_session % len(self.sessions)]
+        self._next_session += 1
+        return session
+
+    async def execute(self, step: dict[str, Any]) -> str:
+        """执行一个步骤，返回状态码字符串；网络异常返回异常类名"""
+        session = self.next_session()
+        try:
+            if step["action"] == "login":
+                response = await self.client.post(
+                    f"{API_PREFIX}/auth/login",
+                    data={"username": session.username, "password": session.password},
+                )
+            elif step["action"] == "refresh":
+                response = await self.client.post(
+                    f"{API_PREFIX}/auth/refresh-token", json={"refresh_token": session.refresh_token}
+                )
+                if response.status_code == 200:
+                    tokens = response.json()["data"]
+                    session.access_token = tokens["accessToken"]
+                    session.refresh_token = tokens["refreshToken"]
+            else:
+                headers = {}
+                if step.get("auth", True):
+                    headers["Authorization"] = f"Bearer {session.access_token}"
+                response = await self.client.request(
+                    step.get("method", "GET"), step["path"], json=step.get("json"), headers=headers
+                )
+        except httpx.HTTPError as e:
+            return type(e).__name__
+        return str(response.status_code)
+
+    async def fire(self, step: dict[str, Any], intended: float, expected_interval_us: int = 0) -> None:
+        sent = time.perf_counter()
+        self.max_schedule_lag = max(self.max_schedule_lag, sent - intended)
+        status = await self.execute(step)
+        done = time.perf_counter()
+        if intended >= self.record_after:
+            self.stats[step["name"]].record(
+                status, int((done - intended) * 1e6), int((done - sent) * 1e6), expected_interval_us
+            )
+
+
+async def run_open_loop(
+    ctx: LoadContext, rate: float, duration: float, max_in_flight: int, poisson: bool
+) -> None:
+    """开环：按计划时间发送，延迟从计划时间算起；超过 max_in_flight 的请求在客户端排队"""
+    semaphore = asyncio.Semaphore(max_in_flight)
+    tasks: set[asyncio.Task[None]] = set()
+    start = time.perf_counter()
+    offset = 0.0
+
+    async def bounded(step: dict[str, Any], intended: float) -> None:
+        async with semaphore:
+            await ctx.fire(step, intended)
+
+    while offset < duration:
+        delay = start + offset - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        task = asyncio.create_task(bounded(ctx.pick_step(), start + offset))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+        offset += ctx.rng.expovariate(rate) if poisson else 1 / rate
+    if tasks:
+        await asyncio.gather(*tasks)
+
+
+async def run_closed_loop(
+    ctx: LoadContext, concurrency: int, duration: float, expected_interval_us: int
+) -> None:
+    """闭环：每个连接收到响应后立即发送下一个请求"""
+    deadline = time.perf_counter() + duration
+
+    async def worker() -> None:
+        while (now := time.perf_counter()) < deadline:
+            await ctx.fire(ctx.pick_step(), now, expected_interval_us)
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+
+
+async def open_sessions(client: httpx.AsyncClient, credentials: list[tuple[str, str]]) -> list[AuthSession]:
+    sessions = []
+    for username, password in credentials:
+        response = await client.post(
+            f"{API_PREFIX}/auth/sessions", json={"username": username, "password": password}
+        )
+        if response.status_code != 200:
+            raise SystemExit(f"获取令牌失败: {username}: {response.status_code} {response.text[:200]}")
+        tokens = response.json()["data"]
+        sessions.append(AuthSession(username, password, tokens["accessToken"], tokens["refreshToken"]))
+    return sessions
+
+
+async def run_load(args: argparse.Namespace, url: str, credentials: list[tuple[str, str]]) -> dict[str, Any]:
+    scenario = load_scenario(args.scenario)
+    connections = args.max_in_flight if args.mode == "open" else args.concurrency
+    limits = httpx.Limits(max_connections=connections, max_keepalive_connections=connections)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=args.timeout) as client:
+        sessions = await open_sessions(client, credentials)
+        record_after = time.perf_counter() + args.warmup
+        ctx = LoadContext(client, scenario, sessions, args.seed, record_after)
+        total_duration = args.warmup + args.duration
+        if args.mode == "open":
+            await run_open_loop(ctx, args.rate, total_duration, args.max_in_flight, args.poisson)
+        else:
+            expected_interval_us = int(args.expected_interval_ms * 1000) if args.expected_interval_ms else 0
+            await run_closed_loop(ctx, args.concurrency, total_duration, expected_interval_us)
+        elapsed = time.perf_counter() - record_after
+
+    overall = StepStats()
+    steps = {}
+    for name, stats in ctx.stats.items():
+        overall.corrected.merge(stats.corrected)
+        overall.uncorrected.merge(stats.uncorrected)
+        overall.errors += stats.errors
+        for status, count in stats.statuses.items():
+            overall.statuses[status] = overall.statuses.get(status, 0) + count
+        steps[name] = _summarize(stats, elapsed)
+    if args.hgrm:
+        Path(f"{args.hgrm}.hgrm").write_text(overall.corrected.percentile_distribution(), encoding="utf-8")
+        Path(f"{args.hgrm}.uncorrected.hgrm").write_text(
+            overall.uncorrected.percentile_distribution(), encoding="utf-8"
+        )
+    return {
+        "meta": {
+            "label": args.label or _git_revision() or "unknown",
+            "commit": _git_revision(),
+            "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "url": url,
+            "scenario": scenario["name"],
+            "mode": args.mode,
+            "rate": args.rate if args.mode == "open" else None,
+            "arrival": ("poisson" if args.poisson else "constant") if args.mode == "open" else None,
+            "concurrency": args.concurrency if args.mode == "closed" else None,
+            "max_in_flight": args.max_in_flight if args.mode == "open" else None,
+            "expected_interval_ms": args.expected_interval_ms if args.mode == "closed" else None,
+            "duration": args.duration,
+            "warmup": args.warmup,
+            "sessions": len(sessions),
+            "max_schedule_lag_ms": round(ctx.max_schedule_lag * 1000, 3),
+        },
+        "overall": _summarize(overall, elapsed),
+        "steps": steps,
+    }
+
+
+def _summarize(stats: StepStats, elapsed: float) -> dict[str, Any]:
+    requests = sum(stats.statuses.values())
+    return {
+        "requests": requests,
+        "errors": stats.errors,
+        "throughput": round(requests / elapsed, 1) if elapsed > 0 else 0.0,
+        "statuses": dict(sorted(stats.statuses.items())),
+        "latency": stats.corrected.summary(),
+        "service_time": stats.uncorrected.summary(),
+    }
+
+
+def load_scenario(name_or_path: str) -> dict[str, Any]:
+    if name_or_path in SCENARIOS:
+        scenario = SCENARIOS[name_or_path]
+    else:
+        scenario = json.loads(Path(name_or_path).read_text(encoding="utf-8"))
+        scenario.setdefault("name", Path(name_or_path).stem)
+    for step in scenario.get("steps", []):
+        if step.get("action") not in ACTIONS or "name" not in step:
+            raise SystemExit(f"无效的场景步骤（需要 name 和 action: {'/'.join(ACTIONS)}）: {step}")
+        if step["action"] == "request" and "path" not in step:
+            raise SystemExit(f"request 步骤缺少 path: {step}")
+    if not scenario.get("steps"):
+        raise SystemExit(f"场景没有步骤: {name_or_path}")
+    return scenario
+
+
+def _git_revision() -> str | None:
+    try:
+        revision = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+        dirty = subprocess.run(
+            ["git", "status", "--porcelain", "--untracked-files=no"],
+            cwd=BACKEND_DIR, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return f"{revision}-dirty" if dirty else revision
+
+
+# 子进程中创建管理员账号（app.initial_data 的默认密码不满足 create_user 的密码强度校验）
+_CREATE_ADMIN = r"""
+from sqlmodel import Session
+from app.core.database import engine
+from app.core.security import get_password_hash
+from app.models import User
+with Session(engine) as session:
+    session.add(User(username="admin", email="admin@example.com", full_name="系统管理员",
+                     is_superuser=True, hashed_password=get_password_hash("admin123")))
+    session.commit()
+"""
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port: int = sock.getsockname()[1]
+        return port
+
+
+@contextmanager
+def spawned_server(args: argparse.Namespace) -> Iterator[tuple[str, list[tuple[str, str]]]]:
+    """在临时目录中生成测试数据并启动 uvicorn，返回 (服务地址, 登录凭据)"""
+    workdir = tempfile.mkdtemp(prefix="tadmin-load-")
+    database = Path(workdir) / "load.db"
+    env = dict(os.environ)
+    env["PYTHONPATH"] = str(BACKEND_DIR) + os.pathsep + env.get("PYTHONPATH", "")
+    env["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{database}"
+    env["DB_AUTO_CREATE_TABLES"] = "true"
+    env["INVALIDATION_BUS_PATH"] = f"{workdir}/invalidation_bus.db"
+    # 登录场景会反复使用少量账号，关闭限流以免测到的是 429
+    env["RATE_LIMIT_ENABLED"] = "false"
+    port = _free_port()
+    server = None
+    try:
+        for command in (
+            ["-m", "app.data_generator", "--users", str(args.seed_users), "--password", SPAWN_PASSWORD,
+             "--create-tables"],
+            ["-c", _CREATE_ADMIN],
+        ):
+            subprocess.run([sys.executable, *command], cwd=workdir, env=env, check=True, capture_output=True)
+        with sqlite3.connect(database) as conn:
+            # 使用拥有 admin 角色的普通用户，场景中的用户/角色列表请求才不会返回 403
+            usernames = [row[0] for row in conn.execute(
+                "SELECT DISTINCT users.username FROM users"
+                " JOIN user_role_links ON user_role_links.user_id = users.id"
+                " JOIN roles ON roles.id = user_role_links.role_id"
+                " WHERE roles.name = 'admin' AND users.is_active AND NOT users.is_superuser"
+                " ORDER BY users.id LIMIT ?",
+                (args.spawn_sessions,),
+            )]
+        server = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port),
+             "--workers", str(args.spawn_workers), "--log-level", "warning", "--no-access-log"],
+            cwd=workdir, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        url = f"http://127.0.0.1:{port}"
+        deadline = time.monotonic() + 60
+        while True:
+            if server.poll() is not None:
+                raise SystemExit(f"服务启动失败，退出码 {server.returncode}")
+            try:
+                if httpx.get(f"{url}/health", timeout=1).status_code == 200:
+                    break
+            except httpx.HTTPError:
+                pass
+            if time.monotonic() > deadline:
+                raise SystemExit("等待服务启动超时")
+            time.sleep(0.2)
+        yield url, [("admin", "admin123")] + [(name, SPAWN_PASSWORD) for name in usernames]
+    finally:
+        if server is not None:
+            server.terminate()
+            try:
+                server.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                server.kill()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def print_run(result: dict[str, Any]) -> None:
+    meta = result["meta"]
+    print(f"{meta['label']}  {meta['mode']}  场景 {meta['scenario']}  时长 {meta['duration']}s  "
+          f"最大调度延迟 {meta['max_schedule_lag_ms']}ms", file=sys.stderr)
+    print(f"{'步骤':<14}{'请求/秒':>10}{'错误':>7}{'p50':>10}{'p90':>10}{'p99':>10}{'p99.9':>10}{'max':>10}"
+          f"{'服务p99':>10}", file=sys.stderr)
+    for name, summary in [*result["steps"].items(), ("(总体)", result["overall"])]:
+        latency = summary["latency"]
+        print(f"{name:<16}{summary['throughput']:>10.1f}{summary['errors']:>7}{latency['p50_ms']:>10.2f}"
+              f"{latency['p90_ms']:>10.2f}{latency['p99_ms']:>10.2f}{latency['p99_9_ms']:>10.2f}"
+              f"{latency['max_ms']:>10.2f}{summary['service_time']['p99_ms']:>10.2f}", file=sys.stderr)
+
+
+def _run_config(meta: dict[str, Any]) -> str:
+    if meta["mode"] == "open":
+        return f"open@{meta['rate']:g}/s"
+    return f"closed x{meta['concurrency']}"
+
+
+def compare_runs(runs: list[dict[str, Any]], threshold: float | None) -> list[str]:
+    """打印多次运行的对比报告（以第一个为基准），返回超过阈值的回归项"""
+    metrics: list[tuple[str, Callable[[dict[str, Any]], float], bool]] = [
+        ("throughput", lambda s: s["throughput"], True),
+        ("errors", lambda s: s["errors"], False),
+        ("p50_ms", lambda s: s["latency"]["p50_ms"], False),
+        ("p99_ms", lambda s: s["latency"]["p99_ms"], False),
+        ("p99_9_ms", lambda s: s["latency"]["p99_9_ms"], False),
+        ("max_ms", lambda s: s["latency"]["max_ms"], False),
+    ]
+    rows = [
+        ("", [run["meta"]["label"] for run in runs]),
+        ("config", [f"{_run_config(run['meta'])} {run['meta']['scenario']}" for run in runs]),
+    ]
+    regressions = []
+    for name in ["(总体)", *runs[0]["steps"]]:
+        summaries = [run["overall"] if name == "(总体)" else run["steps"].get(name) for run in runs]
+        for metric, value_of, higher_is_better in metrics:
+            base_value = value_of(summaries[0]) if summaries[0] else None
+            cells = []
+            for summary in summaries:
+                if summary is None:
+                    cells.append("-")
+                    continue
+                value = value_of(summary)
+                cell = f"{value:g}"
+                if summary is not summaries[0] and base_value:
+                    cell += f" ({(value - base_value) / base_value:+.0%})"
+                cells.append(cell)
+            rows.append((f"{name}.{metric}", cells))
+            last = summaries[-1]
+            if threshold is None or last is None or not base_value or metric in ("errors", "max_ms"):
+                continue
+            change = (value_of(last) - base_value) / base_value
+            if change < -threshold if higher_is_better else change > threshold:
+                regressions.append(f"{name}.{metric}: {base_value} -> {value_of(last)} ({change:+.1%})")
+
+    name_width = max(len(name) for name, _ in rows) + 2
+    width = max(len(cell) for _, cells in rows for cell in cells) + 2
+    for name, cells in rows:
+        print(f"{name:<{name_width}}" + "".join(f"{cell:>{width}}" for cell in cells))
+    return regressions
+
+
+def _parse_credential(value: str) -> tuple[str, str]:
+    username, sep, password = value.partition(":")
+    if not sep:
+        raise argparse.ArgumentTypeError("凭据格式应为 用户名:密码")
+    return username, password
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="HTTP 负载生成工具（开环/闭环，HDR 延迟直方图）")
+    target = parser.add_argument_group("目标服务")
+    target.add_argument("--url", default="http://127.0.0.1:8000", help="服务地址")
+    target.add_argument("--credentials", type=_parse_credential, action="append",
+                        help="获取令牌的账号（用户名:密码，可重复），默认 admin:admin123")
+    target.add_argument("--spawn", action="store_true", help="生成测试数据并在本机启动 uvicorn")
+    target.add_argument("--seed-users", type=int, default=10000, help="--spawn 时生成的用户数")
+    target.add_argument("--spawn-workers", type=int, default=1, help="--spawn 时的 uvicorn 工作进程数")
+    target.add_argument("--spawn-sessions", type=int, default=20, help="--spawn 时额外使用的账号数（拥有 admin 角色的生成用户）")
+    load = parser.add_argument_group("负载")
+    load.add_argument("--scenario", default="mixed", help=f"内置场景（{'/'.join(SCENARIOS)}）或场景 JSON 文件")
+    load.add_argument("--mode", choices=("open", "closed"), default="open")
+    load.add_argument("--rate", type=float, default=100.0, help="开环：每秒请求数")
+    load.add_argument("--poisson", action="store_true", help="开环：泊松到达（默认固定间隔）")
+    load.add_argument("--max-in-flight", type=int, default=256, help="开环：最大并发请求数（连接数）")
+    load.add_argument("--concurrency", type=int, default=16, help="闭环：并发连接数")
+    load.add_argument("--expected-interval-ms", type=float, help="闭环：预期请求间隔，用于 coordinated omission 校正")
+    load.add_argument("--duration", type=float, default=30.0, help="统计时长（秒）")
+    load.add_argument("--warmup", type=float, default=5.0, help="预热时长（秒），不计入统计")
+    load.add_argument("--timeout", type=float, default=30.0, help="单个请求超时（秒）")
+    load.add_argument("--seed", type=int, default=42)
+    output = parser.add_argument_group("输出")
+    output.add_argument("--label", help="运行标签（默认为当前 git 提交）")
+    output.add_argument("--output", help="结果 JSON 输出路径（默认输出到标准输出）")
+    output.add_argument("--hgrm", help="HDR 百分位分布输出路径前缀（生成 .hgrm 和 .uncorrected.hgrm）")
+    output.add_argument("--compare", nargs="+", metavar="RESULT", help="对比多个结果文件，不运行负载")
+    output.add_argument("--threshold", type=float, help="--compare 时允许的回归比例，超过则以非零状态码退出")
+    args = parser.parse_args()
+
+    if args.compare:
+        runs = [json.loads(Path(path).read_text(encoding="utf-8")) for path in args.compare]
+        regressions = compare_runs(runs, args.threshold)
+        if regressions:
+            print(f"性能回归（阈值 {args.threshold:.0%}）:", file=sys.stderr)
+            for line in regressions:
+                print(f"  {line}", file=sys.stderr)
+            sys.exit(1)
+        return
+
+    if args.mode == "open" and args.rate <= 0:
+        parser.error("--rate 必须大于 0")
+    load_scenario(args.scenario)
+    if args.spawn:
+        with spawned_server(args) as (url, credentials):
+            result = asyncio.run(run_load(args, url, args.credentials or credentials))
+    else:
+        result = asyncio.run(run_load(args, args.url, args.credentials or [("admin", "admin123")]))
+
+    print_run(result)
+    text = json.dumps(result, ensure_ascii=False, indent=2)
+    if args.output:
+        Path(args.output).write_text(text + "\n", encoding="utf-8")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
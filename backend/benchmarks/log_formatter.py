@@ -0,0 +1,173 @@
+"""
+JSON 日志格式化器基准测试与兼容性检查
+
+对比原始实现（逐条 datetime 格式化 + json.dumps）与当前 JSONFormatter /
+RequestResponseFormatter 的每秒记录数。每次运行都先用一组覆盖中文、控制字符、
+浮点数、异常和额外字段的记录校验当前实现与原始实现的输出逐字节一致，不一致时
+以非零状态码退出、不输出吞吐量；--check 只运行这项校验（适合放入 CI）。
+
+用法（在 backend 目录下）:
+    python -m benchmarks.log_formatter --records 100000
+    python -m benchmarks.log_formatter --check
+"""
+import argparse
+import json
+import logging
+import sys
+import time
+from datetime import datetime
+from typing import Any
+
+from app.core.logging_config import JSONFormatter, RequestResponseFormatter
+
+try:
+    import orjson
+except ImportError:  # 未安装 speedups 可选依赖时跳过紧凑编码场景
+    orjson = None  # type: ignore[assignment]
+
+
+class LegacyJSONFormatter(logging.Formatter):
+    """原始实现（时间取自 record.created 以便逐字节比较）"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        log_entry = {
+            "timestamp": datetime.utcfromtimestamp(record.created).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "module": record.module,
+            "function": record.funcName,
+            "line": record.lineno,
+        }
+        if hasattr(record, 'extra_fields') and record.extra_fields:
+            log_entry.update(record.extra_fields)
+        if record.exc_info:
+            log_entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(log_entry, ensure_ascii=False)
+
+
+class LegacyRequestResponseFormatter(logging.Formatter):
+    """原始实现（时间取自 record.created 以便逐字节比较）"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        log_entry = {
+            "timestamp": datetime.utcfromtimestamp(record.created).isoformat(),
+            "level": record.levelname,
+            "type": "http_request",
+            "client_ip": getattr(record, 'client_ip', 'unknown'),
+            "method": getattr(record, 'method', 'unknown'),
+            "path": getattr(record, 'path', 'unknown'),
+            "status_code": getattr(record, 'status_code', None),
+            "response_time": getattr(record, 'response_time', None),
+            "user_agent": getattr(record, 'user_agent', ''),
+        }
+        return json.dumps(log_entry, ensure_ascii=False)
+
+
+def _make_record(msg: str, level: int = logging.INFO, created: float | None = None, **extra: Any) -> logging.LogRecord:
+    record = logging.LogRecord("api", level, __file__, 42, msg, None, None, func="handler")
+    if created is not None:
+        record.created = created
+    for key, value in extra.items():
+        setattr(record, key, value)
+    return record
+
+
+def _app_records() -> list[logging.LogRecord]:
+    try:
+        raise ValueError("测试异常 \"quoted\"")
+    except ValueError:
+        exc_info = sys.exc_info()
+
+    records = [
+        _make_record("普通消息"),
+        _make_record("控制字符 \x00\x01\x1f\t\n\r\b\f 引号\" 反斜杠\\ /斜杠"),
+        _make_record("emoji 😀    组合字符 é"),
+        _make_record("整秒时间", created=1760000000.0),
+        _make_record("进位时间", created=1760000000.9999996),
+        _make_record("微秒时间", created=1760000000.000001),
+        _make_record("额外字段", extra_fields={"user_id": 7, "ratio": 1.5e-05, "ok": True, "none": None}),
+        _make_record("嵌套额外字段", extra_fields={"details": {"a": [1, 2.5, "三"]}, "big": 10**20}),
+        _make_record("覆盖基础字段", extra_fields={"message": "override", "line": "x"}),
+        _make_record("特殊浮点", extra_fields={"nan": float("nan"), "inf": float("inf")}),
+        _make_record("错误", level=logging.ERROR),
+    ]
+    exc_record = _make_record("带异常")
+    exc_record.exc_info = exc_info
+    records.append(exc_record)
+    records.append(logging.LogRecord("api", logging.WARNING, __file__, 1, "参数 %s %d", ("值", 3), None))
+    return records
+
+
+def _request_records() -> list[logging.LogRecord]:
+    return [
+        _make_record("HTTP请求开始", client_ip="127.0.0.1", method="GET", path="/api/v1/users/", user_agent="curl/8", status_code=None, response_time=None),
+        _make_record("HTTP请求完成", client_ip="10.0.0.1", method="POST", path="/api/v1/auth/sessions", status_code=200, response_time=0.0123456, user_agent="Mozilla/5.0 中文"),
+        _make_record("HTTP请求完成", status_code=500, response_time=3.2e-06, path="/路径/\"x\""),
+        _make_record("缺省字段"),
+    ]
+
+
+def check() -> bool:
+    ok = True
+    pairs = [
+        (LegacyJSONFormatter(), JSONFormatter(), _app_records()),
+        (LegacyRequestResponseFormatter(), RequestResponseFormatter(), _request_records()),
+    ]
+    for legacy, current, records in pairs:
+        for record in records:
+            expected = legacy.format(record)
+            actual = current.format(record)
+            if expected != actual:
+                ok = False
+                print(f"不一致 [{type(current).__name__}] {record.msg!r}\n  期望: {expected}\n  实际: {actual}")
+    print("兼容性检查通过" if ok else "兼容性检查失败")
+    return ok
+
+
+def _throughput(formatter: logging.Formatter, records: list[logging.LogRecord], count: int) -> float:
+    start = time.perf_counter()
+    for i in range(count):
+        formatter.format(records[i % len(records)])
+    return count / (time.perf_counter() - start)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="JSON 日志格式化器基准测试")
+    parser.add_argument("--records", type=int, default=100000, help="每个场景格式化的记录数")
+    parser.add_argument("--check", action="store_true", help="只运行逐字节兼容性检查")
+    args = parser.parse_args()
+
+    # 吞吐量只对输出兼容的实现有意义
+    if not check():
+        sys.exit(1)
+    if args.check:
+        return
+
+    app_records = [_make_record(f"用户 user{i} 登录成功", extra_fields={"user_id": i}) for i in range(100)]
+    request_records = [
+        _make_record("HTTP请求完成", client_ip="127.0.0.1", method="GET", path=f"/api/v1/users/{i}",
+                     status_code=200, response_time=0.001 * i, user_agent="Mozilla/5.0")
+        for i in range(100)
+    ]
+
+    scenarios: list[tuple[str, logging.Formatter, list[logging.LogRecord]]] = [
+        ("JSONFormatter (原始)", LegacyJSONFormatter(), app_records),
+        ("JSONFormatter", JSONFormatter(), app_records),
+        ("JSONFormatter (无源码位置)", JSONFormatter(include_location=False), app_records),
+        ("RequestResponseFormatter (原始)", LegacyRequestResponseFormatter(), request_records),
+        ("RequestResponseFormatter", RequestResponseFormatter(), request_records),
+    ]
+    if orjson is not None:
+        scenarios += [
+            ("JSONFormatter (orjson 紧凑)", JSONFormatter(compact=True), app_records),
+            ("RequestResponseFormatter (orjson 紧凑)", RequestResponseFormatter(compact=True), request_records),
+        ]
+
+    print(f"{'格式化器':<40}{'记录/秒':>14}")
+    for name, formatter, records in scenarios:
+        print(f"{name:<40}{_throughput(formatter, records, args.records):>14.0f}")
+
+
+if __name__ == "__main__":
+    main()
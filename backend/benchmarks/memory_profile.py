@@ -0,0 +1,265 @@
+"""
+列表接口内存分析
+
+在进程内按请求规模逐个调用列表接口，记录每个请求的:
+    - tracemalloc 峰值：请求期间 Python 分配的峰值增量（含线程池中的端点和流式序列化）
+    - 保留内存：请求结束并回收垃圾后，前后两次快照的差值（用于发现泄漏）
+    - RSS 峰值：后台线程按固定间隔采样 /proc/self/statm，相对请求开始时的最大增量
+      （只在 Linux 上可用；已被之前更大的请求撑大的进程不会再增长，因此按规模从小到大执行）
+
+请求通过原始 ASGI 调用发送，响应体只计数不缓存，测得的内存只包含服务端部分。
+默认关闭响应缓存、限流和并发限制；--unbounded 同时放开最大页大小和分块序列化阈值，
+用于与旧行为对比。--peak-budget-kb 指定时，任一被接受的请求超出预算即以非零状态码退出。
+
+用法（在 backend 目录下）:
+    python -m benchmarks.memory_profile --users 20000 --sizes 10 100 1000 5000
+    python -m benchmarks.memory_profile --users 20000 --unbounded --top 10 --output /tmp/memory.json
+"""
+import argparse
+import asyncio
+import gc
+import json
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+from typing import Any
+
+ENDPOINTS = {
+    "users_list": "/api/v1/users/?limit={size}",
+    "users_search": "/api/v1/users/?search=wang&limit={size}",
+    "role_users": "/api/v1/roles/1/users?limit={size}",
+}
+
+
+class RSSSampler:
+    """后台线程采样常驻内存，记录 start() 之后的峰值"""
+
+    def __init__(self, interval: float) -> None:
+        self.interval = interval
+        self.page_size = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+        self.available = self.read() is not None
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def read(self) -> int | None:
+        try:
+            with open("/proc/self/statm", "rb") as f:
+                return int(f.read().split()[1]) * self.page_size
+        except (OSError, IndexError, ValueError):
+            return None
+
+    def start(self) -> int:
+        baseline = self.read() or 0
+        self.peak = baseline
+        if self.available:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+        return baseline
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.peak = max(self.peak, self.read() or 0)
+
+    def stop(self) -> int:
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+        self.peak = max(self.peak, self.read() or 0)
+        return self.peak
+
+
+async def _call(app: Any, path: str, token: str) -> tuple[int, int]:
+    """发送一个 GET 请求，返回 (状态码, 响应体字节数)；响应体不保留"""
+    raw_path, _, query = path.partition("?")
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": raw_path,
+        "raw_path": raw_path.encode(),
+        "query_string": query.encode(),
+        "root_path": "",
+        "headers": [(b"host", b"testserver"), (b"authorization", f"Bearer {token}".encode())],
+        "client": ("127.0.0.1", 50000),
+        "server": ("testserver", 80),
+    }
+    status = 0
+    size = 0
+    request_sent = False
+    response_done = asyncio.Event()
+
+    async def receive() -> dict[str, Any]:
+        nonlocal request_sent
+        if not request_sent:
+            request_sent = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        # 流式响应会等待客户端断开；响应发送完之前保持挂起
+        await response_done.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message: dict[str, Any]) -> None:
+        nonlocal status, size
+        if message["type"] == "http.response.start":
+            status = message["status"]
+        elif message["type"] == "http.response.body":
+            size += len(message.get("body", b""))
+            if not message.get("more_body", False):
+                response_done.set()
+
+    await app(scope, receive, send)
+    return status, size
+
+
+def _seed(users: int, seed: int) -> str:
+    """写入管理员和测试用户（所有用户拥有 role_id=1 的 user 角色），返回管理员访问令牌"""
+    from sqlalchemy import insert
+
+    from app.core.database import create_db_and_tables, engine
+    from app.core.security import create_access_token, get_password_hash
+    from app.data_generator import generate
+    from app.models import User
+
+    create_db_and_tables()
+    now = datetime.utcnow()
+    with engine.begin() as conn:
+        conn.execute(insert(User), [{
+            "username": "admin", "email": "admin@example.com", "full_name": "系统管理员",
+            "is_active": True, "is_superuser": True, "hashed_password": get_password_hash("admin123"),
+            "created_at": now, "updated_at": now,
+        }])
+    generate(users, {"user": 1.0}, extra_role_ratio=0.0, hash_pool=1, seed=seed)
+    return create_access_token(subject="admin")
+
+
+async def _profile(args: argparse.Namespace, token: str) -> list[dict[str, Any]]:
+    from app.main import app
+
+    sampler = RSSSampler(args.rss_interval)
+    results = []
+    async with app.router.lifespan_context(app):
+        # 预热：导入、SQL 编译缓存等一次性分配不计入结果
+        for template in ENDPOINTS.values():
+            await _call(app, template.format(size=10), token)
+
+        tracemalloc.start(args.frames)
+        for name in args.endpoints:
+            for size in sorted(args.sizes):
+                path = ENDPOINTS[name].format(size=size)
+                peaks, retained, rss_peaks, durations = [], [], [], []
+                status = body_size = 0
+                top: list[str] = []
+                for _ in range(args.repeat):
+                    gc.collect()
+                    before = tracemalloc.take_snapshot() if args.top else None
+                    tracemalloc.reset_peak()
+                    traced_before = tracemalloc.get_traced_memory()[0]
+                    rss_before = sampler.start()
+                    start = time.perf_counter()
+                    status, body_size = await _call(app, path, token)
+                    durations.append(time.perf_counter() - start)
+                    rss_peaks.append(sampler.stop() - rss_before)
+                    peaks.append(tracemalloc.get_traced_memory()[1] - traced_before)
+                    gc.collect()
+                    retained.append(tracemalloc.get_traced_memory()[0] - traced_before)
+                    if before is not None:
+                        diff = tracemalloc.take_snapshot().compare_to(before, "lineno")
+                        top = [str(stat) for stat in diff[:args.top]]
+                results.append({
+                    "endpoint": name,
+                    "size": size,
+                    "status": status,
+                    "response_kb": round(body_size / 1024, 1),
+                    "peak_kb": round(max(peaks) / 1024, 1),
+                    "retained_kb": round(statistics.median(retained) / 1024, 1),
+                    "rss_peak_kb": round(max(rss_peaks) / 1024, 1) if sampler.available else None,
+                    "duration_ms": round(statistics.median(durations) * 1000, 2),
+                    **({"top_retained": top} if args.top else {}),
+                })
+                row = results[-1]
+                print(f"{name:<14}{size:>8}{status:>7}{row['response_kb']:>12}{row['peak_kb']:>12}"
+                      f"{row['retained_kb']:>12}{str(row['rss_peak_kb']):>12}{row['duration_ms']:>12}",
+                      file=sys.stderr)
+        tracemalloc.stop()
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="列表接口内存分析")
+    parser.add_argument("--users", type=int, default=20000, help="预置用户数量")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 500, 1000, 5000], help="请求的 limit")
+    parser.add_argument("--endpoints", nargs="+", choices=list(ENDPOINTS), default=list(ENDPOINTS))
+    parser.add_argument("--repeat", type=int, default=3, help="每个规模的请求次数（峰值取最大值）")
+    parser.add_argument("--unbounded", action="store_true", help="放开最大页大小并关闭分块序列化（旧行为）")
+    parser.add_argument("--frames", type=int, default=1, help="tracemalloc 记录的调用栈深度")
+    parser.add_argument("--top", type=int, default=0, help="输出每个规模保留内存最多的 N 个分配位置")
+    parser.add_argument("--rss-interval", type=float, default=0.002, help="RSS 采样间隔（秒）")
+    parser.add_argument("--peak-budget-kb", type=float, help="单个请求 tracemalloc 峰值预算（KB）")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="结果 JSON 输出路径（默认输出到标准输出）")
+    args = parser.parse_args()
+    if args.output:
+        args.output = str(Path(args.output).resolve())
+
+    # 必须在导入应用模块之前设置：临时数据库和工作目录，关闭缓存、限流和并发限制
+    workdir = tempfile.mkdtemp(prefix="tadmin-memory-")
+    os.chdir(workdir)
+    os.environ["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{workdir}/memory.db"
+    os.environ["DB_AUTO_CREATE_TABLES"] = "true"
+    os.environ["INVALIDATION_BUS_PATH"] = f"{workdir}/invalidation_bus.db"
+    os.environ["RATE_LIMIT_ENABLED"] = "false"
+    os.environ["CONCURRENCY_LIMIT_ENABLED"] = "false"
+    os.environ["RESPONSE_CACHE_ENABLED"] = "false"
+    os.environ["SINGLE_FLIGHT_ENABLED"] = "false"
+    if args.unbounded:
+        os.environ["LIST_MAX_PAGE_SIZE"] = str(10 ** 9)
+        os.environ["LIST_STREAM_THRESHOLD"] = str(10 ** 9)
+
+    import logging
+
+    logging.disable(logging.INFO)
+    token = _seed(args.users, args.seed)
+    print(f"{'接口':<12}{'limit':>8}{'状态':>5}{'响应KB':>10}{'峰值KB':>10}{'保留KB':>10}{'RSS峰值KB':>9}"
+          f"{'耗时ms':>10}", file=sys.stderr)
+    results = asyncio.run(_profile(args, token))
+
+    from app.core.config import settings
+
+    report = {
+        "meta": {
+            "users": args.users,
+            "mode": "unbounded" if args.unbounded else "bounded",
+            "max_page_size": settings.LIST_MAX_PAGE_SIZE,
+            "stream_threshold": settings.LIST_STREAM_THRESHOLD,
+            "stream_batch_size": settings.LIST_STREAM_BATCH_SIZE,
+            "python": sys.version.split()[0],
+        },
+        "results": results,
+    }
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        Path(args.output).write_text(text + "\n", encoding="utf-8")
+    else:
+        print(text)
+
+    if args.peak_budget_kb is not None:
+        over = [r for r in results if r["status"] == 200 and r["peak_kb"] > args.peak_budget_kb]
+        for r in over:
+            print(f"超出内存预算: {r['endpoint']} limit={r['size']} 峰值 {r['peak_kb']}KB > {args.peak_budget_kb}KB",
+                  file=sys.stderr)
+        if over:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,210 @@
+"""
+中间件栈基准测试
+
+直接以原始 ASGI 调用驱动一个只有 /health 路由的应用，对比旧的
+BaseHTTPMiddleware 栈（SecurityHeadersMiddleware + RequestLoggingMiddleware）
+与单层纯 ASGI 的 RequestContextMiddleware 的每秒请求数。
+
+用法（在 backend 目录下）:
+    python -m benchmarks.middleware_stack --requests 20000
+"""
+import argparse
+import asyncio
+import logging
+import time
+import uuid
+from collections.abc import Awaitable, Callable
+
+from fastapi import FastAPI, Request, Response
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.types import ASGIApp, Message
+
+from app.core.global_middleware import RequestContextMiddleware
+
+logger = logging.getLogger("middleware")
+
+
+class SecurityHeadersMiddleware(BaseHTTPMiddleware):
+    """安全头中间件（旧实现）"""
+
+    async def dispatch(self, request: Request, call_next: Callable[[Request], Awaitable[Response]]) -> Response:
+        response = await call_next(request)
+
+        # 添加安全头
+        response.headers["X-Content-Type-Options"] = "nosniff"
+        response.headers["X-Frame-Options"] = "DENY"
+        response.headers["X-XSS-Protection"] = "1; mode=block"
+        response.headers["Referrer-Policy"] = "strict-origin-when-cross-origin"
+
+        # 在生产环境中添加HSTS
+        if not getattr(request.app.state, 'DEBUG', True):
+            response.headers["Strict-Transport-Security"] = "max-age=31536000; includeSubDomains"
+
+        return response
+
+
+class RequestLoggingMiddleware(BaseHTTPMiddleware):
+    """请求日志中间件（旧实现）"""
+
+    async def dispatch(self, request: Request, call_next: Callable[[Request], Awaitable[Response]]) -> Response:
+        # 生成请求ID
+        request_id = str(uuid.uuid4())
+        request.state.request_id = request_id
+
+        # 记录请求开始时间
+        start_time = time.time()
+
+        # 记录请求信息
+        client_ip = request.client.host if request.client else "unknown"
+        method = request.method
+
+        # 调试日志
+        logger.info(f"RequestLoggingMiddleware: {method} {request.url.path} from {client_ip}")
+
+        # 创建请求日志记录 - 使用extra参数
+        request_logger = logging.getLogger("http_request")
+        request_logger.info(
+            "HTTP请求开始",
+            extra={
+                "client_ip": client_ip,
+                "method": method,
+                "path": request.url.path,
+                "user_agent": request.headers.get("user-agent", ""),
+                "status_code": None,
+                "response_time": None
+            }
+        )
+
+        try:
+            # 处理请求
+            response = await call_next(request)
+
+            # 计算处理时间
+            process_time = time.time() - start_time
+
+            # 记录响应信息
+            request_logger.info(
+                "HTTP请求完成",
+                extra={
+                    "client_ip": client_ip,
+                    "method": method,
+                    "path": request.url.path,
+                    "status_code": response.status_code,
+                    "response_time": process_time,
+                    "user_agent": request.headers.get("user-agent", "")
+                }
+            )
+
+            # 添加响应头
+            response.headers["X-Request-ID"] = request_id
+            response.headers["X-Process-Time"] = f"{process_time:.3f}"
+
+            return response
+
+        except Exception as e:
+            # 计算处理时间
+            process_time = time.time() - start_time
+
+            # 记录错误信息
+            log_record = request_logger.makeRecord(
+                request_logger.name,
+                logging.ERROR,
+                "", 0,  # filename, lineno
+                "HTTP请求失败",
+                (), None  # args, exc_info
+            )
+            # 设置自定义属性
+            log_record.client_ip = client_ip
+            log_record.method = method
+            log_record.path = request.url.path
+            log_record.status_code = 500
+            log_record.response_time = process_time
+            log_record.user_agent = request.headers.get("user-agent", "")
+            log_record.error = str(e)
+
+            request_logger.handle(log_record)
+
+            # 重新抛出异常让全局异常处理器处理
+            raise
+
+
+
+def _build_app(stack: str) -> FastAPI:
+    app = FastAPI()
+    app.state.DEBUG = True
+
+    @app.get("/health")
+    def health_check() -> dict[str, str]:
+        return {"status": "healthy"}
+
+    if stack == "old":
+        app.add_middleware(SecurityHeadersMiddleware)
+        app.add_middleware(RequestLoggingMiddleware)
+    else:
+        app.add_middleware(RequestContextMiddleware)
+    return app
+
+
+async def _call(app: ASGIApp) -> int:
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": "/health",
+        "raw_path": b"/health",
+        "query_string": b"",
+        "root_path": "",
+        "headers": [(b"host", b"testserver"), (b"user-agent", b"bench")],
+        "client": ("127.0.0.1", 50000),
+        "server": ("testserver", 80),
+    }
+    status = 0
+
+    async def receive() -> Message:
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message: Message) -> None:
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+
+    await app(scope, receive, send)
+    return status
+
+
+async def _run(stack: str, requests: int, concurrency: int) -> float:
+    app = _build_app(stack)
+    # 预热：触发中间件栈构建
+    assert await _call(app) == 200
+
+    remaining = requests
+
+    async def worker() -> None:
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            await _call(app)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return requests / (time.perf_counter() - start)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="中间件栈基准测试")
+    parser.add_argument("--requests", type=int, default=20000, help="每个栈的请求数")
+    parser.add_argument("--concurrency", type=int, default=16, help="并发协程数")
+    args = parser.parse_args()
+
+    results = {stack: asyncio.run(_run(stack, args.requests, args.concurrency)) for stack in ("old", "new")}
+
+    print(f"{'中间件栈':<36}{'请求/秒':>12}")
+    print(f"{'BaseHTTPMiddleware x2 (旧)':<36}{results['old']:>12.0f}")
+    print(f"{'RequestContextMiddleware (新)':<36}{results['new']:>12.0f}")
+    print(f"提升: {results['new'] / results['old']:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+冷启动基准测试
+
+在独立子进程中分别测量 `import app.main` 的冷导入耗时，以及从进程启动到
+首个 /health 响应返回的耗时，取多次运行的中位数并与预算比较，超出预算时
+以非零状态码退出，可直接用于 CI 回归检查。
+
+用法（在 backend 目录下）:
+    python -m benchmarks.startup --runs 5 --import-budget-ms 1500 --first-response-budget-ms 2500
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+# 子进程中执行的测量代码：只输出一行 JSON
+_PROBE = r"""
+import json, time
+t0 = time.perf_counter()
+import app.main
+t1 = time.perf_counter()
+result = {"import_ms": (t1 - t0) * 1000}
+if {first_response}:
+    from fastapi.testclient import TestClient
+    with TestClient(app.main.app) as client:
+        response = client.get("/health")
+        assert response.status_code == 200
+    result["first_response_ms"] = (time.perf_counter() - t0) * 1000
+print(json.dumps(result))
+"""
+
+
+def _run_probe(first_response: bool, workdir: str) -> dict[str, float]:
+    env = dict(os.environ)
+    env["PYTHONPATH"] = str(BACKEND_DIR) + os.pathsep + env.get("PYTHONPATH", "")
+    env.setdefault("SQLALCHEMY_DATABASE_URI", f"sqlite:///{workdir}/startup.db")
+    output = subprocess.run(
+        [sys.executable, "-c", _PROBE.replace("{first_response}", str(first_response))],
+        cwd=workdir,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    result: dict[str, float] = json.loads(output.strip().splitlines()[-1])
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="冷启动基准测试")
+    parser.add_argument("--runs", type=int, default=5, help="每项测量的运行次数")
+    parser.add_argument("--import-budget-ms", type=float, default=1500.0, help="冷导入耗时预算（毫秒）")
+    parser.add_argument("--first-response-budget-ms", type=float, default=2500.0, help="首个响应耗时预算（毫秒）")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        # 预热一次，排除首次生成 .pyc 的开销
+        _run_probe(False, workdir)
+        import_times = [_run_probe(False, workdir)["import_ms"] for _ in range(args.runs)]
+        first_response_times = [_run_probe(True, workdir)["first_response_ms"] for _ in range(args.runs)]
+
+    results = {
+        "import_ms": statistics.median(import_times),
+        "first_response_ms": statistics.median(first_response_times),
+    }
+    budgets = {
+        "import_ms": args.import_budget_ms,
+        "first_response_ms": args.first_response_budget_ms,
+    }
+
+    failed = False
+    print(f"{'指标':<24}{'中位数(ms)':>12}{'预算(ms)':>12}{'结果':>8}")
+    for name, value in results.items():
+        ok = value <= budgets[name]
+        failed = failed or not ok
+        print(f"{name:<24}{value:>12.1f}{budgets[name]:>12.1f}{'通过' if ok else '超出':>8}")
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
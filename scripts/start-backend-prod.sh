@@ -0,0 +1,29 @@
+#!/bin/bash
+
+echo "启动后端服务（生产模式，多 worker）..."
+
+# 切换到backend目录
+cd "$(dirname "$0")/../backend"
+
+# 检查是否存在虚拟环境
+if [ ! -d ".venv" ]; then
+    echo "虚拟环境不存在，正在创建..."
+    uv sync
+fi
+
+# 激活虚拟环境并启动服务
+source .venv/bin/activate 2>/dev/null || source .venv/Scripts/activate
+
+# 检查环境变量文件
+if [ ! -f ".env" ]; then
+    echo "警告: .env 文件不存在，将使用默认配置"
+fi
+
+# worker 数量默认等于CPU核数，可通过 BACKEND_WORKERS 覆盖
+WORKERS=${BACKEND_WORKERS:-$(nproc 2>/dev/null || echo 2)}
+HOST=${BACKEND_HOST:-0.0.0.0}
+PORT=${BACKEND_PORT:-8000}
+
+echo "启动 FastAPI 服务: $HOST:$PORT, worker 数量: $WORKERS"
+echo "重新加载代码和配置（滚动替换 worker）: kill -HUP <主进程PID>"
+exec python -m app.launcher --host "$HOST" --port "$PORT" --workers "$WORKERS"
@@ -34,5 +34,9 @@ else
     echo "PostgreSQL数据库，请确保服务正在运行..."
 fi
 
+# 启动时不再自动建表（DB_AUTO_CREATE_TABLES 默认关闭），先把表结构迁移到最新
+echo "应用数据库迁移..."
+uv run alembic upgrade head
+
 echo "启动 FastAPI 服务..."
 exec uvicorn app.main:app --reload --host 0.0.0.0 --port 8000
\ No newline at end of file